@@ -0,0 +1,12 @@
+"""
+Benchmarks of the GRRM log parsers.
+
+loggen: generator of synthetic GRRM logs (OPT, FREQ, IRC, LUP and AFIR jobs of any size), also used by the tests
+suite: timing and memory profiling of GRRMSingleJob and each job class across size sweeps (JSON report)
+importtime: cold-start import time of grrmsv.grrm_single_job, the batch tool and the viewer (python -X importtime)
+
+Run from the repository root:
+    python -m benchmarks -o report.json
+    python -m benchmarks.loggen lup -a 30 -n 50 -f 4 -o lup.log
+    python -m benchmarks.importtime -o importtime.json
+"""
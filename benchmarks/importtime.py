@@ -0,0 +1,145 @@
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from benchmarks.suite import environment, _choice_list
+
+
+REPORT_FORMAT_VERSION = 1
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# code run in a new interpreter for each target. The viewer script is executed without starting the app
+# (imports and definitions before the window appears).
+TARGETS: Dict[str, str] = {
+    'grrm_single_job': 'import grrmsv.grrm_single_job',
+    'batch': 'import grrmsv.batch',
+    'viewer': "import runpy; runpy.run_path('grrm_single_viewer.pyw', run_name='importtime')",
+}
+
+# modules which should not be imported at startup (loaded on first use)
+HEAVY_MODULES = ('matplotlib', 'matplotlib.pyplot', 'asyncio', 'multiprocessing', 'turtledemo')
+
+
+class ImportRecord(NamedTuple):
+    name: str
+    self_time: float  # seconds
+    cumulative_time: float  # seconds (including the imports of the module)
+    depth: int  # 0: imported by the code itself
+
+
+def parse_importtime(text: str) -> List[ImportRecord]:
+    """
+    records of the output of python -X importtime (stderr), in the order of the output
+    """
+    records = []
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append(ImportRecord(name.strip(), int(fields[0]) / 1e6, int(fields[1]) / 1e6, depth))
+    return records
+
+
+def run_importtime(code: str, python: str = sys.executable) -> Dict[str, Any]:
+    """
+    run code in a new interpreter with -X importtime (cold start: nothing is imported yet)
+    :return: wall_time (seconds, including the interpreter startup), records and error (stderr if failed)
+    """
+    start = time.perf_counter()
+    process = subprocess.run([python, '-X', 'importtime', '-c', code], cwd=ROOT, capture_output=True, text=True)
+    wall_time = time.perf_counter() - start
+    error = None
+    if process.returncode != 0:
+        error = [line for line in process.stderr.splitlines() if not line.startswith('import time:')][-1:]
+        error = error[0] if error else 'exit status {:}'.format(process.returncode)
+    return {'wall_time': wall_time, 'records': parse_importtime(process.stderr), 'error': error}
+
+
+def summarize(records: List[ImportRecord], startup: Sequence[str], top: int) -> Dict[str, Any]:
+    """
+    import time of the code (records of the interpreter startup are excluded), the slowest modules (self time)
+    and heavy modules loaded
+    """
+    startup = set(startup)
+    records = [record for record in records if record.name not in startup]
+    names = {record.name for record in records}
+    slowest = sorted(records, key=lambda record: record.self_time, reverse=True)[:top]
+    return {'import_time': sum(record.cumulative_time for record in records if record.depth == 0),
+            'num_modules': len(records),
+            'slowest_modules': [{'name': record.name, 'self_time': record.self_time,
+                                 'cumulative_time': record.cumulative_time} for record in slowest],
+            'heavy_modules': [name for name in HEAVY_MODULES if name in names]}
+
+
+def run(targets: Sequence[str] = tuple(TARGETS), repeat: int = 5, top: int = 15,
+        progress: Optional[Callable] = None) -> Dict[str, Any]:
+    """
+    measure each target repeat times (the fastest run is reported) and return the report
+    :param progress: called with each result
+    """
+    baseline = [run_importtime('pass') for _ in range(repeat)]
+    startup = {record.name for run_result in baseline for record in run_result['records']}
+    results = []
+    for target in targets:
+        runs = [run_importtime(TARGETS[target]) for _ in range(repeat)]
+        best = min(runs, key=lambda run_result: run_result['wall_time'])
+        result = {'target': target, 'code': TARGETS[target], 'error': best['error'],
+                  'wall_time_min': best['wall_time'],
+                  'wall_times': [run_result['wall_time'] for run_result in runs]}
+        result.update(summarize(best['records'], startup, top))
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return {'format_version': REPORT_FORMAT_VERSION,
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'environment': environment(), 'settings': {'targets': list(targets), 'repeat': repeat},
+            'interpreter_startup': min(run_result['wall_time'] for run_result in baseline),
+            'results': results}
+
+
+def _print_result(result: Dict[str, Any]):
+    text = '{:<16}{:>8.3f} s import {:>8.3f} s wall {:>5} modules'.format(
+        result['target'], result['import_time'], result['wall_time_min'], result['num_modules'])
+    if result['heavy_modules']:
+        text += '  heavy: ' + ', '.join(result['heavy_modules'])
+    if result['error'] is not None:
+        text += '  error: ' + result['error']
+    print(text, file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Cold-start import time of grrmsv and the viewer '
+                                                 '(python -X importtime in a new interpreter).')
+    parser.add_argument('-o', '--output', default='importtime_report.json',
+                        help='JSON report file (default: importtime_report.json, -: stdout)')
+    parser.add_argument('--targets', type=_choice_list(tuple(TARGETS)), default=list(TARGETS),
+                        help='comma separated targets (default: all; {:})'.format(', '.join(TARGETS)))
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='runs per target (default: 5)')
+    parser.add_argument('--top', type=int, default=15, help='number of slowest modules reported (default: 15)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not print results while running')
+    args = parser.parse_args(argv)
+
+    report = run(args.targets, max(args.repeat, 1), args.top, progress=None if args.quiet else _print_result)
+
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=1)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+            f.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,308 @@
+import argparse
+import os
+import random
+import sys
+from typing import List, Optional, Tuple
+
+from grrmsv.tokenizer import OPT_SEPARATOR, IRC_SEPARATOR, FREQ_SEPARATOR, LUP_SEPARATOR
+
+
+ELEMENTS = ('C', 'H', 'H', 'O', 'C', 'H', 'N', 'H', 'Cl', 'Fe')
+ENERGY_FORMATS = ('grrm17', 'grrm23')
+LOG_KINDS = ('min', 'saddle_irc', 'lup', 'afir')
+
+CONVERGENCE_ITEMS = (('Maximum  Force', '0.000300000000', 0.0006),
+                     ('RMS      Force', '0.000200000000', 0.0004),
+                     ('Maximum  Displacement', '0.001800000000', 0.0036),
+                     ('RMS      Displacement', '0.001200000000', 0.0024))
+THERMAL_ITEMS = ('E(el)', 'ZPVE', 'Enthalpie(0K)', 'E(tr)', 'E(rot)', 'E(vib)', 'H-E(el)', 'Enthalpie',
+                 'S(el)', 'S(tr)', 'S(rot)', 'S(vib)', 'G-E(el)', 'Free Energy')
+IRC_FORWARD = 'IRC FOLLOWING (FORWARD) STARTING FROM 1ST-ORDER SADDLE POINT'
+IRC_BACKWARD = 'IRC FOLLOWING (BACKWARD) STARTING FROM 1ST-ORDER SADDLE POINT'
+TERMINATION = 'Normal termination of the GRRM Program\n'
+
+
+class LogGenerator:
+    """
+    Generator of synthetic GRRM logs. The layout of each block is that of GRRM17/GRRM23 logs, values are random
+    (reproducible with seed). Block methods return the text of the block.
+    """
+
+    def __init__(self, num_atom: int = 10, num_frozen: int = 0, energy_format: str = 'grrm23', seed: int = 0):
+        """
+        :param num_atom: number of (not frozen) atoms
+        :param num_frozen: number of frozen atoms (written only in the com file)
+        :param energy_format: grrm17 (ENERGY value) or grrm23 (ENERGY value (e1 : e2)) for OPT iterations
+        :param seed: seed of random values
+        """
+        if energy_format not in ENERGY_FORMATS:
+            raise ValueError('unknown energy format: ' + str(energy_format))
+        self.num_atom: int = num_atom
+        self.num_frozen: int = num_frozen
+        self.energy_format: str = energy_format
+        self.random: random.Random = random.Random(seed)
+        self.atoms: List[str] = [ELEMENTS[i % len(ELEMENTS)] for i in range(num_atom)]
+        self.frozen_atoms: List[str] = [ELEMENTS[(i + 3) % len(ELEMENTS)] for i in range(num_frozen)]
+
+    def _value(self, low: float, high: float) -> str:
+        return '{:.12f}'.format(self.random.uniform(low, high))
+
+    def _energy(self) -> str:
+        return '{:.12f}'.format(-1234.5 + self.random.uniform(-0.1, 0.1))
+
+    def _coordinates(self, atoms: List[str]) -> str:
+        return ''.join('{:<2}  {:>20}{:>20}{:>20}\n'.format(atom, self._value(-8.0, 8.0), self._value(-8.0, 8.0),
+                                                             self._value(-8.0, 8.0)) for atom in atoms)
+
+    def geometry(self) -> str:
+        """
+        coordinate lines of the atoms
+        """
+        return self._coordinates(self.atoms)
+
+    def frozen_atom_coordinates(self) -> List[str]:
+        """
+        coordinate lines of the frozen atoms (as in the com file)
+        """
+        return self._coordinates(self.frozen_atoms).splitlines(keepends=True)
+
+    def _energy_line(self, prefix: str) -> str:
+        line = prefix + self._energy()
+        if self.energy_format == 'grrm23':
+            line += '    ({:} : {:})'.format(self._energy(), self._energy())
+        return line + '\n'
+
+    def header(self, job: str = 'MIN') -> str:
+        """
+        head of log (before the first job)
+        """
+        return ('GRRM Program\n'
+                'Synthetic log for benchmarks ({:}, {:} atoms, {:} frozen atoms)\n'
+                '\n'
+                '# {:}/B3LYP/6-31G*\n'
+                '\n').format(self.energy_format, self.num_atom, self.num_frozen, job)
+
+    def com(self, job: str = 'MIN') -> str:
+        """
+        com file of the log (the frozen atoms are read from this file)
+        """
+        text = '# {:}/B3LYP/6-31G*\n\n0 1\n'.format(job) + self.geometry()
+        if self.num_frozen > 0:
+            text += 'Frozen Atoms\n' + ''.join(self.frozen_atom_coordinates())
+        return text + 'Options\nMaxItr=1000\n'
+
+    def opt_block(self, num_itr: int, status: Optional[str] = 'Minimum point was found') -> str:
+        """
+        OPT job of num_itr iterations
+        :param status: last line of optimized job, or None for a running job (no optimized structure and separator)
+        """
+        out = [OPT_SEPARATOR + '\n', 'Geometry Optimization\n']
+        for i in range(num_itr):
+            out.append('# ITR. {:}\n'.format(i))
+            out.append(self.geometry())
+            out.append('Item            Value           Threshold\n')
+            out.append(self._energy_line('ENERGY         '))
+            out.append('Spin(**2)        {:}\n'.format(self._value(0.0, 0.01)))
+            out.append('LAMDA            {:}\n'.format(self._value(-1.0, 0.0)))
+            out.append('TRUST RADII      {:}\n'.format(self._value(0.0, 0.3)))
+            out.append('STEP RADII       {:}\n'.format(self._value(0.0, 0.3)))
+            for (item, threshold, high) in CONVERGENCE_ITEMS:
+                out.append('{:}   {:}   {:}\n'.format(item, self._value(0.0, high), threshold))
+            out.append('\n')
+        if status is None:
+            return ''.join(out)
+        out.append('Optimized structure\n')
+        out.append(self.geometry())
+        out.append(self._energy_line('ENERGY    =   '))
+        out.append('Spin(**2) =   {:}\n'.format(self._value(0.0, 0.01)))
+        out.append(status + '\n')
+        out.append(OPT_SEPARATOR + '\n')
+        return ''.join(out)
+
+    def freq_block(self, num_thermal: int = 2) -> str:
+        """
+        FREQ job (3N-6 normal modes, num_thermal thermochemistry blocks)
+        """
+        out = [FREQ_SEPARATOR + '\n', 'Geometry (Origin = Center of Mass, Axes = Principal Axes, Angstrom)\n',
+               self.geometry(), '\n']
+        num_modes = max(3 * self.num_atom - 6, 1)
+        for start in range(0, num_modes, 3):
+            columns = range(start, min(start + 3, num_modes))
+            out.append('            ' + '   '.join(str(column) for column in columns) + '\n')
+            out.append('Freq.  :   ' + '   '.join('{:.8f}'.format(self.random.uniform(-300.0, 3500.0))
+                                                   for _ in columns) + '\n')
+            out.append('I.R.   :   ' + '   '.join('{:.8f}'.format(self.random.uniform(0.0, 50.0))
+                                                   for _ in columns) + '\n')
+            for (i, atom) in enumerate(self.atoms):
+                for axis in 'XYZ':
+                    out.append('{:} {:} {:} :  '.format(atom, i + 1, axis) +
+                               '   '.join('{:.8f}'.format(self.random.uniform(-0.5, 0.5)) for _ in columns) + '\n')
+            out.append('\n')
+        for t in range(num_thermal):
+            out.append('Thermochemistry at 298.150 K and 1.000 Atm' + (' (quasi-RRHO)' if t > 0 else '') + '\n')
+            for item in THERMAL_ITEMS:
+                out.append('{:<16} =  {:}  ( {:} kcal/mol)\n'.format(item, self._value(-1.0, 1.0),
+                                                                      self._value(0.0, 10.0)))
+            out.append('\n')
+        out.append(FREQ_SEPARATOR + '\n')
+        return ''.join(out)
+
+    def irc_path_block(self, header: str, num_step: int) -> str:
+        """
+        one direction of IRC (num_step steps followed by OPT and FREQ of the end point)
+        """
+        out = [header + '\n']
+        for step in range(1, num_step + 1):
+            out.append('# STEP {:}\n'.format(step))
+            out.append(self.geometry())
+            out.append('ENERGY    =  {:}\n'.format(self._energy()))
+            out.append('Spin(**2) =  {:}\n'.format(self._value(0.0, 0.01)))
+            out.append('\n')
+        out.append(self.opt_block(3))
+        out.append(self.freq_block(1))
+        return ''.join(out)
+
+    def irc_block(self, num_step: int, init_freq: bool = True) -> str:
+        """
+        IRC job with forward and backward paths of num_step steps and the energy profile
+        """
+        out = [IRC_SEPARATOR + '\n', 'INITIAL STRUCTURE\n', self.geometry(),
+               'ENERGY    {:}\n'.format(self._energy()), 'Spin(**2)  0.000000000000\n']
+        if init_freq:
+            out.append(self.freq_block(1))
+        out.append(self.irc_path_block(IRC_FORWARD, num_step))
+        out.append(self.irc_path_block(IRC_BACKWARD, num_step))
+        out.append('Energy profile along IRC\n')
+        out.append('   length      energy\n')
+        for k in range(-num_step, num_step + 1):
+            out.append('  {:.6f}   {:}\n'.format(k * 0.1, self._energy()))
+        out.append('\n')
+        out.append(IRC_SEPARATOR + '\n')
+        return ''.join(out)
+
+    def _approximate_structures(self, num_node: int) -> str:
+        out = []
+        for i in range(0, num_node - 1, 2):
+            out.append('---Approximate TS geometry between NODE {:} and NODE {:}\n'.format(i, i + 1))
+            out.append(self.geometry())
+            out.append('ENERGY    =  {:}\n'.format(self._energy()))
+            out.append('---Approximate EQ geometry at NODE {:}\n'.format(i + 1))
+            out.append(self.geometry())
+            out.append('ENERGY    =  {:}\n'.format(self._energy()))
+        return ''.join(out)
+
+    def lup_block(self, num_itr: int, num_node: int = 10, app_geometry: bool = True) -> str:
+        """
+        LUP job of num_itr iterations of num_node nodes, approximate TS/EQ and their subjobs
+        :param app_geometry: subjobs follow '# Geometry of AppTS/AppEQ' lines (OPT + IRC for TS, OPT + FREQ for EQ)
+        """
+        out = [LUP_SEPARATOR + '\n']
+        for i in range(num_itr):
+            out.append('ITR. {:} of LUP-path optimization\n'.format(i))
+            for node in range(num_node):
+                out.append('# NODE {:}\n'.format(node))
+                out.append(self.geometry())
+                out.append('ENERGY   {:}\n'.format(self._energy()))
+            out.append('\n---Profile of LUP path\n')
+            out.append('  NODE   length   energy\n')
+            for node in range(num_node):
+                out.append('  {:}   {:.6f}   {:}\n'.format(node, node * 0.3, self._energy()))
+            out.append('\n')
+        out.append('-' * 60 + '\n')
+        out.append(self._approximate_structures(num_node))
+        if app_geometry:
+            out.append('# Geometry of AppTS 0, is optimized\n')
+            out.append(self.opt_block(3, '1st-Order Saddle point was found'))
+            out.append(self.irc_block(3, init_freq=False))
+            out.append('# Geometry of AppEQ 0, is optimized\n')
+            out.append(self.opt_block(3))
+            out.append(self.freq_block(1))
+        out.append(LUP_SEPARATOR + '\n')
+        return ''.join(out)
+
+    def afir_profile_block(self, num_point: int) -> str:
+        """
+        AFIR path profile of num_point points and approximate TS/EQ (to the end of log)
+        """
+        out = ['---Profile of AFIR path\n', '  ITR.   length   energy\n']
+        for i in range(num_point):
+            out.append('  {:}   {:.6f}   {:}\n'.format(i, i * 0.2, self._energy()))
+        out.append('\n')
+        out.append(self._approximate_structures(4))
+        return ''.join(out)
+
+    def log(self, kind: str, num_itr: int, num_node: int = 10) -> str:
+        """
+        whole log of kind
+        min: OPT (num_itr iterations) + FREQ
+        saddle_irc: OPT of saddle point + FREQ + IRC (num_itr steps in each direction)
+        lup: LUP (num_itr iterations of num_node nodes) with subjobs
+        afir: OPT (num_itr iterations) + AFIR profile
+        """
+        if kind == 'min':
+            body = self.opt_block(num_itr) + self.freq_block()
+        elif kind == 'saddle_irc':
+            body = (self.opt_block(num_itr, '1st-Order Saddle point was found') + self.freq_block() +
+                    self.irc_block(num_itr))
+        elif kind == 'lup':
+            body = self.lup_block(num_itr, num_node)
+        elif kind == 'afir':
+            body = self.opt_block(num_itr) + self.afir_profile_block(num_itr + 1)
+        else:
+            raise ValueError('unknown log kind: ' + str(kind))
+        return self.header(job_name(kind)) + body + TERMINATION
+
+
+def job_name(kind: str) -> str:
+    """
+    GRRM job name (of the com file) for log kind
+    """
+    return {'min': 'MIN', 'saddle_irc': 'SADDLE', 'lup': 'LUP', 'afir': 'MIN'}[kind]
+
+
+def write_log(directory: str, kind: str, num_itr: int, num_atom: int = 10, num_frozen: int = 0,
+              energy_format: str = 'grrm23', num_node: int = 10, seed: int = 0,
+              name: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """
+    write a synthetic log (and the com file if num_frozen > 0) into directory
+    :return: log file, com file (None if not written)
+    """
+    if name is None:
+        name = '{:}_{:}_a{:}_i{:}_f{:}'.format(kind, energy_format, num_atom, num_itr, num_frozen)
+    generator = LogGenerator(num_atom, num_frozen, energy_format, seed)
+    log_file = os.path.join(directory, name + '.log')
+    with open(log_file, 'w') as f:
+        f.write(generator.log(kind, num_itr, num_node))
+    com_file = None
+    if num_frozen > 0:
+        com_file = os.path.join(directory, name + '.com')
+        with open(com_file, 'w') as f:
+            f.write(generator.com(job_name(kind)))
+    return log_file, com_file
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Write a synthetic GRRM log (and its com file with frozen atoms).')
+    parser.add_argument('kind', choices=LOG_KINDS, help='kind of log')
+    parser.add_argument('-o', '--output', required=True, help='log file (the com file is written next to it)')
+    parser.add_argument('-a', '--atoms', type=int, default=10, help='number of atoms (default: 10)')
+    parser.add_argument('-n', '--iterations', type=int, default=20,
+                        help='number of OPT/LUP iterations or IRC steps (default: 20)')
+    parser.add_argument('-f', '--frozen', type=int, default=0, help='number of frozen atoms (default: 0)')
+    parser.add_argument('--nodes', type=int, default=10, help='number of LUP nodes (default: 10)')
+    parser.add_argument('-e', '--energy-format', choices=ENERGY_FORMATS, default='grrm23',
+                        help='energy format of OPT iterations (default: grrm23)')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='seed of random values (default: 0)')
+    args = parser.parse_args(argv)
+
+    directory, file = os.path.split(os.path.abspath(args.output))
+    log_file, com_file = write_log(directory, args.kind, args.iterations, args.atoms, args.frozen,
+                                   args.energy_format, args.nodes, args.seed, name=os.path.splitext(file)[0])
+    print(log_file)
+    if com_file is not None:
+        print(com_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
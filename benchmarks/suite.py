@@ -0,0 +1,225 @@
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from benchmarks.loggen import LogGenerator, write_log, ENERGY_FORMATS, LOG_KINDS
+from grrmsv.afirpath import AFIRPath
+from grrmsv.freq import FREQJob
+from grrmsv.grrm_single_job import GRRMSingleJob
+from grrmsv.irc import IRCJob
+from grrmsv.lup import LUPJob
+from grrmsv.opt import OPTJob
+from grrmsv.utils import NUMERIC_EXACT, NUMERIC_MODES
+
+
+REPORT_FORMAT_VERSION = 1
+
+# job class targets: (class, function of (generator, num_itr, num_node) returning the block text)
+JOB_TARGETS: Dict[str, Any] = {
+    'OPTJob': (OPTJob, lambda generator, num_itr, num_node: generator.opt_block(num_itr)),
+    'FREQJob': (FREQJob, lambda generator, num_itr, num_node: generator.freq_block()),
+    'IRCJob': (IRCJob, lambda generator, num_itr, num_node: generator.irc_block(num_itr)),
+    'LUPJob': (LUPJob, lambda generator, num_itr, num_node: generator.lup_block(num_itr, num_node)),
+    'AFIRPath': (AFIRPath, lambda generator, num_itr, num_node: generator.afir_profile_block(num_itr)),
+}
+TARGETS = ('GRRMSingleJob',) + tuple(JOB_TARGETS)
+
+# (atoms, iterations) of the size sweeps
+SWEEPS = {
+    'quick': ((5, 20), (5, 20)),
+    'default': ((10, 50, 150), (10, 50, 200)),
+    'large': ((10, 100, 300), (10, 100, 500)),
+}
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """
+    time func repeat times, then run it once more under tracemalloc.
+    peak_memory is the peak of memory allocated during the call, retained_memory is the memory still allocated
+    while the result is alive (bytes).
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+        del result
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        retained_memory, peak_memory = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+    return {'time_min': min(times), 'time_median': statistics.median(times), 'times': times,
+            'peak_memory': peak_memory, 'retained_memory': retained_memory}
+
+
+def bench_log(directory: str, kind: str, num_atom: int, num_itr: int, num_frozen: int, num_node: int,
+              energy_format: str, numeric_mode: str, repeat: int) -> Dict[str, Any]:
+    """
+    benchmark of GRRMSingleJob for a synthetic log of kind (the time includes reading the files)
+    """
+    log_file, com_file = write_log(directory, kind, num_itr, num_atom, num_frozen, energy_format, num_node)
+    try:
+        with open(log_file, 'rb') as f:
+            data = f.read()
+        result = measure(lambda: GRRMSingleJob(log_file, com_file=com_file, numeric_mode=numeric_mode), repeat)
+        result.update({'num_lines': data.count(b'\n'), 'num_bytes': len(data)})
+        return result
+    finally:
+        for file in (log_file, com_file):
+            if file is not None:
+                os.remove(file)
+
+
+def bench_job(target: str, num_atom: int, num_itr: int, num_frozen: int, num_node: int, energy_format: str,
+              numeric_mode: str, repeat: int) -> Dict[str, Any]:
+    """
+    benchmark of a job class for a synthetic block (lines in memory)
+    """
+    job_class, make_block = JOB_TARGETS[target]
+    generator = LogGenerator(num_atom, num_frozen, energy_format)
+    text = make_block(generator, num_itr, num_node)
+    lines = text.splitlines(keepends=True)
+    frozen_atom_coordinates = generator.frozen_atom_coordinates() if num_frozen > 0 else None
+    result = measure(lambda: job_class(lines, frozen_atom_coordinates=frozen_atom_coordinates,
+                                       numeric_mode=numeric_mode), repeat)
+    result.update({'num_lines': len(lines), 'num_bytes': len(text.encode('utf-8'))})
+    return result
+
+
+def iter_cases(targets: Sequence[str], kinds: Sequence[str], atoms: Sequence[int], iterations: Sequence[int],
+               frozen: int, nodes: int, energy_formats: Sequence[str], numeric_modes: Sequence[str]):
+    """
+    parameters of benchmark cases (FREQJob does not depend on iterations: atoms only)
+    """
+    for target in targets:
+        for kind in (kinds if target == 'GRRMSingleJob' else [None]):
+            for energy_format in energy_formats:
+                for numeric_mode in numeric_modes:
+                    for num_atom in atoms:
+                        for num_itr in (iterations if target != 'FREQJob' else iterations[:1]):
+                            yield {'target': target, 'kind': kind, 'num_atom': num_atom, 'num_itr': num_itr,
+                                   'num_frozen': frozen, 'num_node': nodes, 'energy_format': energy_format,
+                                   'numeric_mode': numeric_mode}
+
+
+def environment() -> Dict[str, Any]:
+    """
+    versions and machine of the run (commit is None if not in a git repository)
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+            'machine': platform.machine(), 'cpu_count': os.cpu_count(), 'commit': commit}
+
+
+def run(targets: Sequence[str] = TARGETS, kinds: Sequence[str] = LOG_KINDS, atoms: Sequence[int] = (10, 50),
+        iterations: Sequence[int] = (10, 50), frozen: int = 0, nodes: int = 10,
+        energy_formats: Sequence[str] = ENERGY_FORMATS, numeric_modes: Sequence[str] = (NUMERIC_EXACT,),
+        repeat: int = 3, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    run the benchmark cases and return the report
+    :param progress: called with each result
+    """
+    settings = {'targets': list(targets), 'kinds': list(kinds), 'atoms': list(atoms), 'iterations': list(iterations),
+                'frozen': frozen, 'nodes': nodes, 'energy_formats': list(energy_formats),
+                'numeric_modes': list(numeric_modes), 'repeat': repeat}
+    results = []
+    with tempfile.TemporaryDirectory(prefix='grrmsv-bench-') as directory:
+        for case in iter_cases(targets, kinds, atoms, iterations, frozen, nodes, energy_formats, numeric_modes):
+            if case['target'] == 'GRRMSingleJob':
+                result = bench_log(directory, case['kind'], case['num_atom'], case['num_itr'], frozen, nodes,
+                                   case['energy_format'], case['numeric_mode'], repeat)
+            else:
+                result = bench_job(case['target'], case['num_atom'], case['num_itr'], frozen, nodes,
+                                   case['energy_format'], case['numeric_mode'], repeat)
+            result = dict(case, **result)
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return {'format_version': REPORT_FORMAT_VERSION,
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'environment': environment(), 'settings': settings, 'results': results}
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(value) for value in text.split(',') if value.strip() != '']
+
+
+def _choice_list(choices: Sequence[str]) -> Callable[[str], List[str]]:
+    def parse(text: str) -> List[str]:
+        values = [value.strip() for value in text.split(',') if value.strip() != '']
+        for value in values:
+            if value not in choices:
+                raise argparse.ArgumentTypeError('invalid choice: {:} (choose from {:})'.format(
+                    value, ', '.join(choices)))
+        return values
+    return parse
+
+
+def _print_result(result: Dict[str, Any]):
+    print('{:<14}{:<11}{:<7}{:<6}atoms={:<5}itr={:<5}{:>10.4f} s {:>10.1f} MiB peak {:>10.1f} MiB retained'.format(
+        result['target'], result['kind'] or '', result['energy_format'], result['numeric_mode'], result['num_atom'],
+        result['num_itr'], result['time_min'], result['peak_memory'] / 2 ** 20, result['retained_memory'] / 2 ** 20), file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Time and memory-profile GRRM log parsers on synthetic logs.')
+    parser.add_argument('-o', '--output', default='benchmark_report.json',
+                        help='JSON report file (default: benchmark_report.json, -: stdout)')
+    parser.add_argument('--sweep', choices=list(SWEEPS), default='default',
+                        help='size sweep (default: default); --atoms and --iterations override it')
+    parser.add_argument('--atoms', type=_int_list, help='comma separated numbers of atoms')
+    parser.add_argument('--iterations', type=_int_list, help='comma separated numbers of iterations (IRC steps)')
+    parser.add_argument('--frozen', type=int, default=0, help='number of frozen atoms (default: 0)')
+    parser.add_argument('--nodes', type=int, default=10, help='number of LUP nodes (default: 10)')
+    parser.add_argument('--targets', type=_choice_list(TARGETS), default=list(TARGETS),
+                        help='comma separated targets (default: all; {:})'.format(', '.join(TARGETS)))
+    parser.add_argument('--kinds', type=_choice_list(LOG_KINDS), default=list(LOG_KINDS),
+                        help='comma separated log kinds for GRRMSingleJob (default: all; {:})'.format(
+                            ', '.join(LOG_KINDS)))
+    parser.add_argument('--energy-formats', type=_choice_list(ENERGY_FORMATS), default=list(ENERGY_FORMATS),
+                        help='comma separated energy formats (default: grrm17,grrm23)')
+    parser.add_argument('--numeric-modes', type=_choice_list(NUMERIC_MODES), default=[NUMERIC_EXACT],
+                        help='comma separated numeric modes (default: exact)')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='timed runs per case (default: 3)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not print results while running')
+    args = parser.parse_args(argv)
+
+    atoms, iterations = SWEEPS[args.sweep]
+    report = run(args.targets, args.kinds, args.atoms or atoms, args.iterations or iterations, args.frozen,
+                 args.nodes, args.energy_formats, args.numeric_modes, max(args.repeat, 1),
+                 progress=None if args.quiet else _print_result)
+
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=1)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+            f.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,6 +2,18 @@ from decimal import Decimal
 
 VIEWER_PATH = 'D:/programs/jmol/jmol.bat' # PATH for external software to open xyz file (Jmol)
 
+# Viewer session: one viewer process is kept, started with VIEWER_SESSION_ARGS, and each file is loaded by
+# VIEWER_LOAD_COMMAND ({file}: path) written to its standard input (Jmol: -I). If False (or the viewer exits at once),
+# a new viewer process is started for each file. None: used only if VIEWER_PATH is Jmol (the file name has 'jmol').
+VIEWER_SESSION = None
+VIEWER_SESSION_ARGS = ['-I']
+VIEWER_LOAD_COMMAND = 'load "{file}"'
+
+# Temporary xyz files for the viewer are reused when the same data is shown again. The least recently used files
+# are deleted beyond these limits (total bytes / number of files; None: no limit).
+TEMP_FILE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+TEMP_FILE_CACHE_MAX_FILES = 100
+
 # Default window size
 WINDOW_SIZE = (1080,650)
 
@@ -36,9 +48,36 @@ LUP_PATH_PLOT_SIZE = (12, 8)
 # AFIR Path Plot Settings
 AFIR_PATH_PLOT_SIZE = (12, 8)
 
+# Plots: series longer than PLOT_MAX_POINTS are downsampled (peaks are kept), and at most PLOT_MAX_LABELS points
+# are labeled (e.g. # ITR. of AFIR path)
+PLOT_MAX_POINTS = 2000
+PLOT_MAX_LABELS = 200
+
 # Text Window Size
 TEXT_VIEW_FRAME_SIZE = (800, 800)
 
+# Follow mode: interval (ms) to check a running job for appended lines
+FOLLOW_INTERVAL = 5000
+
+# Parse each job when it is selected in the job tree (faster loading of large logs)
+LAZY_LOAD = True
+
+# Number of worker processes to parse job blocks in parallel when LAZY_LOAD is False (0: not used)
+PARSE_WORKERS = 0
+
+# Logs of this size (bytes) or larger are read through mmap: lines are decoded only when they are parsed,
+# and the text of the log is not kept in memory (None: never)
+MEMORY_MAP_MIN_SIZE = 256 * 1024 * 1024
+
+# Values read from logs: 'exact' (Decimal of the original text) or 'fast' (float; faster and smaller).
+# Both give the same display strings.
+NUMERIC_MODE = 'exact'
+
+# Cache of parsed logs (None: disabled) and its size limit (bytes),
+# e.g. PARSE_CACHE_DIR = 'D:/grrmsv_cache'
+PARSE_CACHE_DIR = None
+PARSE_CACHE_SIZE_LIMIT = 512 * 1024 * 1024
+
 # DEBUG mode
 DEBUG = False
 
@@ -0,0 +1,15 @@
+"""
+Summarize GRRM log files without GUI: one row per job (type, status, energy, convergence, frequencies, thermal data)
+as CSV or JSON.
+
+usage: python grrm_batch.py DIR_OR_LOG [...] [-o summary.csv|summary.json] [-f csv|json] [-j WORKERS] [-p PATTERN]
+                            [-n exact|fast]
+(see readme.md for the columns)
+"""
+import sys
+
+from grrmsv.batch import main
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,9 @@
 import os
 import sys
 import os.path
-from asyncio import current_task
+import threading
 from decimal import Decimal
-from typing import Optional, List
+from typing import TYPE_CHECKING, Optional, List, Callable
 
 import wx
 import wx.grid
@@ -12,17 +12,23 @@ from wx import xrc
 APP_DIR = (os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(APP_DIR)
 
-from grrmsv.grrm_single_job import GRRMSingleJob
+from grrmsv.grrm_single_job import GRRMSingleJob, LoadCancelled
+from grrmsv.cache import ParseCache
 from grrmsv.opt import OPTJob
 from grrmsv.freq import FREQJob, ThermalData
 from grrmsv.irc import IRCPath, IRCJob
 from grrmsv.lup import LUPPath, LUPJob
 from grrmsv.afirpath import AFIRPath
+from grrmsv.lazyjob import LazyJob, resolve_job
+from grrmsv.profiling import ParseProfiler
 from grrmsv import molview
 from grrmsv import utils
 
 import config
 
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
 
 __VERSION__ = '1.3 on 2024/11/13'
 
@@ -37,6 +43,65 @@ class MyFileDropTarget(wx.FileDropTarget):
         return True
 
 
+class PlotFrame(wx.Frame):
+    """
+    Frame with a matplotlib canvas. The frame is reused for the next plot, and hidden (not destroyed) when closed.
+    """
+    def __init__(self, parent, size):
+        """
+        :param size: figure size (inch)
+        """
+        wx.Frame.__init__(self, parent, -1, 'Plot')
+
+        self.source = None  # job (or path) of the plot
+        self.draw: Optional[Callable[['Figure'], None]] = None
+        self.init_frame(size)
+
+    def init_frame(self, size):
+        # matplotlib is imported at the first plot (not at startup)
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg, NavigationToolbar2WxAgg
+
+        self.figure = Figure(figsize=size)
+        panel = wx.Panel(self, wx.ID_ANY)
+        layout = wx.BoxSizer(wx.VERTICAL)
+        self.canvas = FigureCanvasWxAgg(panel, wx.ID_ANY, self.figure)
+        self.toolbar = NavigationToolbar2WxAgg(self.canvas)
+        self.toolbar.Realize()
+        layout.Add(self.canvas, 1, wx.EXPAND)
+        layout.Add(self.toolbar, 0, wx.LEFT | wx.EXPAND)
+        panel.SetSizer(layout)
+        layout.Fit(self)
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+
+    def plot(self, title: str, source, draw: Callable[['Figure'], None]):
+        """
+        draw a plot and show the frame
+        :param source: job (or path) of the plot (see redraw)
+        :param draw: function drawing the plot on the figure (draw_plot of the job etc.)
+        """
+        self.SetTitle(title)
+        self.source = source
+        self.draw = draw
+        self.redraw()
+        self.Show(True)
+        self.Raise()
+
+    def redraw(self):
+        """
+        draw the plot again on the same canvas (e.g. when the selected step is changed)
+        """
+        if self.draw is None:
+            return
+        self.draw(self.figure)
+        self.canvas.draw_idle()
+
+    def on_close(self, event):
+        self.source = None
+        self.draw = None
+        self.Hide()
+
+
 class TextViewFrame(wx.Frame):
     def __init__(self, parent, title, text, job = None):
         wx.Frame.__init__(self, parent, -1, title)
@@ -204,6 +269,17 @@ class GRRMSingleViewerApp(wx.App):
         self.current_lup: Optional[LUPJob] = None
         self.current_lup_path: Optional[LUPPath] = None
         self.current_afirpath: Optional[AFIRPath] = None
+        self.follow_timer: Optional[wx.Timer] = None
+        self.parse_cache: Optional[ParseCache] = None
+        self.load_thread: Optional[threading.Thread] = None
+        self.load_cancel_event: Optional[threading.Event] = None
+        self.load_logged_percent: int = 0
+        # tree path of the selected job while the log is re-parsed for follow mode (None for a new file)
+        self.reload_selection: Optional[List[int]] = None
+        self.cache_thread: Optional[threading.Thread] = None  # stores a lazily loaded job in the parse cache
+        self.plot_frame: Optional[PlotFrame] = None
+        if config.PARSE_CACHE_DIR is not None:
+            self.parse_cache = ParseCache(config.PARSE_CACHE_DIR, config.PARSE_CACHE_SIZE_LIMIT)
         self.res: xrc.XmlResource = xrc.XmlResource('./wxgui.xrc')
         self.init_frame()
         return True
@@ -236,6 +312,8 @@ class GRRMSingleViewerApp(wx.App):
     def get_controls_from_xrc(self):
         self.tree_ctrl_jobs: wx.TreeCtrl = xrc.XRCCTRL(self.frame, 'tree_ctrl_jobs')
         self.text_ctrl_log: wx.TextCtrl = xrc.XRCCTRL(self.frame, 'text_ctrl_log')
+        self.gauge_load: wx.Gauge = xrc.XRCCTRL(self.frame, 'gauge_load')
+        self.button_load_cancel: wx.Button = xrc.XRCCTRL(self.frame, 'button_load_cancel')
 
         # notebook and panels
         self.notebook_detail: wx.Notebook = xrc.XRCCTRL(self.frame, 'notebook_detail')
@@ -432,6 +510,8 @@ class GRRMSingleViewerApp(wx.App):
 
         # Job Tree
         self.Bind(wx.EVT_TREE_ITEM_ACTIVATED, self.on_activated_tree_ctrl_jobs, self.tree_ctrl_jobs)
+        self.Bind(wx.EVT_TREE_ITEM_EXPANDING, self.on_expanding_tree_ctrl_jobs, self.tree_ctrl_jobs)
+        self.button_load_cancel.Bind(wx.EVT_BUTTON, self.on_button_load_cancel)
 
         # OPT
         self.text_ctrl_opt_step.Bind(wx.EVT_TEXT_ENTER, self.on_enter_text_ctrl_opt_step)
@@ -493,6 +573,13 @@ class GRRMSingleViewerApp(wx.App):
         menu_file = wx.Menu()
         menu_item_open = menu_file.Append(11, '&Open\tCtrl+O')
         self.Bind(wx.EVT_MENU, self.on_menu_open, menu_item_open)
+        menu_item_refresh = menu_file.Append(12, '&Refresh\tF5')
+        self.Bind(wx.EVT_MENU, self.on_menu_refresh, menu_item_refresh)
+        self.menu_item_follow = menu_file.AppendCheckItem(13, '&Follow\tCtrl+F')
+        self.Bind(wx.EVT_MENU, self.on_menu_follow, self.menu_item_follow)
+        # timer for follow mode
+        self.follow_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_timer_follow, self.follow_timer)
         # set menu bar
         menu_bar = wx.MenuBar()
         menu_bar.Append(menu_file, '&File')
@@ -571,61 +658,225 @@ class GRRMSingleViewerApp(wx.App):
         self.tree_ctrl_jobs.SetItemData(root, self.job)
 
         for (i, job) in enumerate(self.job.jobs):
-            if job.name is None:
-                label = '#.' + str(i+1) + ' : ' + job.type.upper()
-            else:
-                label = '#.' + str(i+1) + ' : ' + job.type.upper() + ' ({:})'.format(job.name).replace('-', ' ')
-            item = self.tree_ctrl_jobs.AppendItem(root, label)
-            self.tree_ctrl_jobs.SetItemData(item, job)
-
-            # In case IRC Job, OPT/FREQ Jobs in its Path are also added as the subitems.
-            if job.type == 'irc':
-                job : IRCJob
-                if job.init_freq_job is not None:
-                    subitem = self.tree_ctrl_jobs.AppendItem(item, 'initial/FREQ')
-                    self.tree_ctrl_jobs.SetItemData(subitem, job.init_freq_job)
-                for path in job.paths:
-                    if path.opt_job is not None:
-                        label = path.direction + '/' + 'OPT'
-                        subitem = self.tree_ctrl_jobs.AppendItem(item, label)
-                        self.tree_ctrl_jobs.SetItemData(subitem, path.opt_job)
-                    if path.freq_job is not None:
-                        label = path.direction + '/' + 'FREQ'
-                        subitem = self.tree_ctrl_jobs.AppendItem(item, label)
-                        self.tree_ctrl_jobs.SetItemData(subitem, path.freq_job)
-
-            # In case LUP Job, subjobs are added as subitems.
-            if job.type == 'lup':
-                job : LUPJob
-                for subjob in job.subjobs:
-                    label = subjob.name  + '/' + subjob.type.upper()
-                    subitem = self.tree_ctrl_jobs.AppendItem(item, label)
-                    self.tree_ctrl_jobs.SetItemData(subitem, subjob)
-
-                    # In case of IRC:
-                    if subjob.type == 'irc':
-                        subjob : IRCJob
-                        if subjob.init_freq_job is not None:
-                            subsubitem = self.tree_ctrl_jobs.AppendItem(subitem, 'initial/FREQ')
-                            self.tree_ctrl_jobs.SetItemData(subsubitem, subjob.init_freq_job)
-                        for path in subjob.paths:
-                            if path.opt_job is not None:
-                                label = path.direction + '/' + 'OPT'
-                                subsubitem = self.tree_ctrl_jobs.AppendItem(subitem, label)
-                                self.tree_ctrl_jobs.SetItemData(subsubitem, path.opt_job)
-                            if path.freq_job is not None:
-                                label = path.direction + '/' + 'FREQ'
-                                subsubitem = self.tree_ctrl_jobs.AppendItem(subitem, label)
-                                self.tree_ctrl_jobs.SetItemData(subsubitem, path.freq_job)
+            self.append_job_tree_item(root, i, job)
 
         if self.job.afirpath is not None:
             item = self.tree_ctrl_jobs.AppendItem(root, 'AFIR Path')
             self.tree_ctrl_jobs.SetItemData(item, self.job.afirpath)
 
-        self.tree_ctrl_jobs.ExpandAll()
+        self.tree_ctrl_jobs.Expand(root)
         self.current_general = self.job
         self.load_general()
 
+    def append_job_tree_item(self, root, i: int, job):
+        if job.name is None:
+            label = '#.' + str(i+1) + ' : ' + job.type.upper()
+        else:
+            label = '#.' + str(i+1) + ' : ' + job.type.upper() + ' ({:})'.format(job.name).replace('-', ' ')
+        item = self.tree_ctrl_jobs.AppendItem(root, label)
+        self.tree_ctrl_jobs.SetItemData(item, job)
+        self.append_subjob_tree_items(item, job)
+
+    def append_subjob_tree_items(self, item, job):
+        """
+        add subjobs of IRC/LUP job as subitems. For a job not parsed yet (lazy mode), subitems are added when
+        the item is expanded.
+        """
+        if job.type not in ('irc', 'lup'):
+            return
+        if isinstance(job, LazyJob) and not job.parsed:
+            self.tree_ctrl_jobs.SetItemHasChildren(item, True)
+            return
+
+        # In case IRC Job, OPT/FREQ Jobs in its Path are also added as the subitems.
+        if job.type == 'irc':
+            job : IRCJob
+            if job.init_freq_job is not None:
+                subitem = self.tree_ctrl_jobs.AppendItem(item, 'initial/FREQ')
+                self.tree_ctrl_jobs.SetItemData(subitem, job.init_freq_job)
+            for path in job.paths:
+                if path.opt_job is not None:
+                    label = path.direction + '/' + 'OPT'
+                    subitem = self.tree_ctrl_jobs.AppendItem(item, label)
+                    self.tree_ctrl_jobs.SetItemData(subitem, path.opt_job)
+                if path.freq_job is not None:
+                    label = path.direction + '/' + 'FREQ'
+                    subitem = self.tree_ctrl_jobs.AppendItem(item, label)
+                    self.tree_ctrl_jobs.SetItemData(subitem, path.freq_job)
+
+        # In case LUP Job, subjobs are added as subitems.
+        if job.type == 'lup':
+            job : LUPJob
+            for subjob in job.subjobs:
+                label = subjob.name  + '/' + subjob.type.upper()
+                subitem = self.tree_ctrl_jobs.AppendItem(item, label)
+                self.tree_ctrl_jobs.SetItemData(subitem, subjob)
+                # In case of IRC:
+                self.append_subjob_tree_items(subitem, subjob)
+
+        self.tree_ctrl_jobs.Expand(item)
+
+    def get_job_tree_signature(self) -> tuple:
+        """
+        identities of the jobs shown in the job tree (to check whether the tree must be rebuilt after refresh)
+        """
+        items = []
+        for job in self.job.jobs:
+            items.append(id(job))
+            if job.type == 'irc':
+                items.append(self.get_irc_signature(job))
+            if job.type == 'lup' and not (isinstance(job, LazyJob) and not job.parsed):
+                for subjob in job.subjobs:
+                    items.append(id(subjob))
+                    if subjob.type == 'irc':
+                        items.append(self.get_irc_signature(subjob))
+        items.append(id(self.job.afirpath))
+        return tuple(items)
+
+    @staticmethod
+    def get_irc_signature(job: IRCJob) -> tuple:
+        if isinstance(job, LazyJob) and not job.parsed:
+            return ()
+        items = [id(job.init_freq_job)]
+        for path in job.paths:
+            items.extend([id(path.opt_job), id(path.freq_job)])
+        return tuple(items)
+
+    def refresh_job(self):
+        """
+        read lines appended to the log (running job) and update the tree and the current panel
+        """
+        if self.job is None or self.load_thread is not None or self.cache_thread is not None:
+            return  # the job is not extended while it is being stored in the cache
+        if self.job.from_cache:
+            # the raw text is not kept in the cache: parse the log in the worker thread to read appended lines later.
+            # The current tree is kept until the parse is finished.
+            self.reload_selection = self.get_tree_item_path(self.get_current_job()) or []
+            self.logging('reload: ' + self.job.log_file)
+            self.start_load_thread(self.job.log_file, self.job.com_file, use_cache=False)
+            return
+
+        signature = self.get_job_tree_signature()
+        try:
+            if not self.job.refresh():
+                return
+        except Exception as e:
+            self.logging(['refresh failed: ', str(e)])
+            self.stop_follow()
+            return
+
+        if self.get_job_tree_signature() != signature:
+            # jobs are added or replaced (e.g. the last FREQ job): rebuild the tree and show the job at the position
+            # of the current one in the new tree (the current job object may have been replaced)
+            selection = self.get_tree_item_path(self.get_current_job())
+            self.load_job_tree()
+            if selection:
+                self.select_tree_item_path(selection)
+        else:
+            self.refresh_current_panel()
+
+    def get_current_job(self):
+        for job in (self.current_opt, self.current_freq, self.current_irc, self.current_lup, self.current_afirpath,
+                    self.current_general):
+            if job is not None:
+                return job
+        return None
+
+    def get_tree_children(self, item) -> list:
+        children = []
+        child, cookie = self.tree_ctrl_jobs.GetFirstChild(item)
+        while child.IsOk():
+            children.append(child)
+            child, cookie = self.tree_ctrl_jobs.GetNextChild(item, cookie)
+        return children
+
+    def get_tree_item_path(self, job) -> Optional[List[int]]:
+        """
+        child indices from the root to the tree item of job ([] for the root), None if not found
+        """
+        root = self.tree_ctrl_jobs.GetRootItem()
+        if job is None or not root.IsOk():
+            return None
+        if self.tree_ctrl_jobs.GetItemData(root) is job:
+            return []
+        stack = [(root, [])]
+        while len(stack) > 0:
+            item, path = stack.pop()
+            for (i, child) in enumerate(self.get_tree_children(item)):
+                if self.tree_ctrl_jobs.GetItemData(child) is job:
+                    return path + [i]
+                stack.append((child, path + [i]))
+        return None
+
+    def select_tree_item_path(self, path: List[int]):
+        """
+        select the tree item at path (see get_tree_item_path) and show its job. Subitems of jobs not parsed yet
+        (lazy mode) are added on the way. Nothing is done if the item is not found.
+        """
+        item = self.tree_ctrl_jobs.GetRootItem()
+        for index in path:
+            if item != self.tree_ctrl_jobs.GetRootItem() and self.tree_ctrl_jobs.GetChildrenCount(item, False) == 0:
+                self.append_subjob_tree_items(item, resolve_job(self.tree_ctrl_jobs.GetItemData(item)))
+            children = self.get_tree_children(item)
+            if index >= len(children):
+                return
+            item = children[index]
+        job = self.tree_ctrl_jobs.GetItemData(item)
+        if job is None:
+            return
+        self.tree_ctrl_jobs.SelectItem(item)
+        self.load_job(job)
+
+    def refresh_current_panel(self):
+        """
+        update the current panel with the extended job. The selected step is kept unless it was the last one.
+        """
+        if self.current_general is not None:
+            self.load_general()
+
+        elif self.current_opt is not None:
+            last_step = self.text_ctrl_opt_step.GetValue() == self.text_ctrl_opt_max_step.GetValue()
+            step = self.text_ctrl_opt_step.GetValue()
+            self.load_opt()
+            if not last_step:
+                self.text_ctrl_opt_step.SetValue(step)
+                if self.correct_opt_step():
+                    self.load_opt_grid()
+
+        elif self.current_irc is not None:
+            path = self.current_irc_path
+            if path is None or self.combo_box_irc_direction.GetCount() != len(self.current_irc.paths):
+                self.load_irc()
+                return
+            last_step = self.text_ctrl_irc_step.GetValue() == self.text_ctrl_irc_max_step.GetValue()
+            step = self.text_ctrl_irc_step.GetValue()
+            self.load_irc_path()
+            if not last_step:
+                self.text_ctrl_irc_step.SetValue(step)
+                if self.correct_irc_step():
+                    self.load_irc_grid()
+
+        elif self.current_lup is not None:
+            path = self.current_lup_path
+            if path is None or self.combo_box_lup_path.GetCount() != len(self.current_lup.itr_paths) or \
+                    self.list_box_lup_structures.GetCount() != len(self.current_lup.approximate_structures):
+                self.load_lup()
+                return
+            self.text_ctrl_lup_max_node.SetValue(str(path.num_node - 1))
+            self.redraw_plot(self.current_lup)
+
+        elif self.current_afirpath is not None:
+            self.load_afirpath()
+            self.redraw_plot(self.current_afirpath)
+
+    def start_follow(self):
+        self.follow_timer.Start(config.FOLLOW_INTERVAL)
+        self.menu_item_follow.Check(True)
+
+    def stop_follow(self):
+        self.follow_timer.Stop()
+        self.menu_item_follow.Check(False)
+
     def load_general(self):
         self.reset_detail_notebook()
         self.set_detail_panel('general')
@@ -657,8 +908,8 @@ class GRRMSingleViewerApp(wx.App):
         if job is None:
             return
 
-        self.text_ctrl_opt_step.SetValue(str(len(job.energy_list)-1))
-        self.text_ctrl_opt_max_step.SetValue(str(len(job.energy_list)-1))
+        self.text_ctrl_opt_step.SetValue(str(job.num_steps-1))
+        self.text_ctrl_opt_max_step.SetValue(str(job.num_steps-1))
         self.text_ctrl_opt_status.SetValue(utils.tostring(job.status))
         self.text_ctrl_opt_optimized_energy.SetValue(utils.tostring(job.optimized_energy))
         self.text_ctrl_opt_optimized_energy1.SetValue(utils.tostring(job.optimized_energy1))
@@ -669,25 +920,27 @@ class GRRMSingleViewerApp(wx.App):
     def load_opt_grid(self):
         step = int(self.text_ctrl_opt_step.GetValue())
         job = self.current_opt
-        self.grid_opt.SetCellValue(0, 0, utils.tostring(job.energy_list[step]))
-        self.grid_opt.SetCellValue(1, 0, utils.tostring(job.energy1_list[step]))
-        self.grid_opt.SetCellValue(2, 0, utils.tostring(job.energy2_list[step]))
-        self.grid_opt.SetCellValue(3, 0, utils.tostring(job.spin2_list[step]))
-        self.grid_opt.SetCellValue(4, 0, utils.tostring(job.lambda_list[step]))
-        self.grid_opt.SetCellValue(5, 0, utils.tostring(job.trust_radii_list[step]))
-        self.grid_opt.SetCellValue(6, 0, utils.tostring(job.step_radii_list[step]))
-        self.grid_opt.SetCellValue(7, 0, utils.tostring(job.maximum_force_list[step]))
-        self.grid_opt.SetCellValue(7, 1, utils.tostring(job.maximum_force_th_list[step]))
-        self.grid_opt.SetCellValue(7, 2, utils.tostring(job.maximum_force_conv_list[step]))
-        self.grid_opt.SetCellValue(8, 0, utils.tostring(job.rms_force_list[step]))
-        self.grid_opt.SetCellValue(8, 1, utils.tostring(job.rms_force_th_list[step]))
-        self.grid_opt.SetCellValue(8, 2, utils.tostring(job.rms_force_conv_list[step]))
-        self.grid_opt.SetCellValue(9, 0, utils.tostring(job.maximum_displacement_list[step]))
-        self.grid_opt.SetCellValue(9, 1, utils.tostring(job.maximum_displacement_th_list[step]))
-        self.grid_opt.SetCellValue(9, 2, utils.tostring(job.maximum_displacement_conv_list[step]))
-        self.grid_opt.SetCellValue(10, 0, utils.tostring(job.rms_displacement_list[step]))
-        self.grid_opt.SetCellValue(10, 1, utils.tostring(job.rms_displacement_th_list[step]))
-        self.grid_opt.SetCellValue(10, 2, utils.tostring(job.rms_displacement_conv_list[step]))
+        self.redraw_plot(job)
+        values = job.get_step_values(step)
+        self.grid_opt.SetCellValue(0, 0, utils.tostring(values['energy']))
+        self.grid_opt.SetCellValue(1, 0, utils.tostring(values['energy1']))
+        self.grid_opt.SetCellValue(2, 0, utils.tostring(values['energy2']))
+        self.grid_opt.SetCellValue(3, 0, utils.tostring(values['spin2']))
+        self.grid_opt.SetCellValue(4, 0, utils.tostring(values['lambda']))
+        self.grid_opt.SetCellValue(5, 0, utils.tostring(values['trust_radii']))
+        self.grid_opt.SetCellValue(6, 0, utils.tostring(values['step_radii']))
+        self.grid_opt.SetCellValue(7, 0, utils.tostring(values['maximum_force']))
+        self.grid_opt.SetCellValue(7, 1, utils.tostring(values['maximum_force_th']))
+        self.grid_opt.SetCellValue(7, 2, utils.tostring(values['maximum_force_conv']))
+        self.grid_opt.SetCellValue(8, 0, utils.tostring(values['rms_force']))
+        self.grid_opt.SetCellValue(8, 1, utils.tostring(values['rms_force_th']))
+        self.grid_opt.SetCellValue(8, 2, utils.tostring(values['rms_force_conv']))
+        self.grid_opt.SetCellValue(9, 0, utils.tostring(values['maximum_displacement']))
+        self.grid_opt.SetCellValue(9, 1, utils.tostring(values['maximum_displacement_th']))
+        self.grid_opt.SetCellValue(9, 2, utils.tostring(values['maximum_displacement_conv']))
+        self.grid_opt.SetCellValue(10, 0, utils.tostring(values['rms_displacement']))
+        self.grid_opt.SetCellValue(10, 1, utils.tostring(values['rms_displacement_th']))
+        self.grid_opt.SetCellValue(10, 2, utils.tostring(values['rms_displacement_conv']))
 
     def clear_opt_grid(self):
         for i in range(11):
@@ -702,7 +955,7 @@ class GRRMSingleViewerApp(wx.App):
         """
         job = self.current_opt
         try:
-            max_step = len(job.energy_list)-1
+            max_step = job.num_steps-1
         except:
             self.text_ctrl_opt_step.SetValue('')
             return False
@@ -732,7 +985,7 @@ class GRRMSingleViewerApp(wx.App):
         # List Box for Freq
         self.list_box_freq.Clear()
         for (i, freq) in enumerate(job.freq_list):
-            item = '# ' + str(i) + ' : ' + str(freq) + ' cm-1'
+            item = '# ' + str(i) + ' : ' + '{:.8f}'.format(freq) + ' cm-1'
             if freq < 0.0:
                 item += '  *imag'
             self.list_box_freq.Append(item)
@@ -831,6 +1084,7 @@ class GRRMSingleViewerApp(wx.App):
             return
 
         step = int(self.text_ctrl_irc_step.GetValue())
+        self.redraw_plot(irc_path)
         self.grid_irc.SetCellValue(0, 0, utils.tostring(irc_path.energy_list[step-1]))
         self.grid_irc.SetCellValue(1, 0, utils.tostring(irc_path.spin2_list[step-1]))
 
@@ -898,9 +1152,9 @@ class GRRMSingleViewerApp(wx.App):
         if len(job.itr_paths) == 0:
             return
 
-        for path in job.itr_paths:
-            path : LUPPath
-            self.combo_box_lup_path.Append(path.name)
+        # LUPPath is created only for the selected iteration
+        for name in job.itr_paths.names:
+            self.combo_box_lup_path.Append(name)
         self.combo_box_lup_path.SetSelection(len(job.itr_paths) - 1)
         self.current_lup_path = job.itr_paths[len(job.itr_paths) - 1]
         self.load_lup_path()
@@ -913,6 +1167,7 @@ class GRRMSingleViewerApp(wx.App):
             return
         self.text_ctrl_lup_node.SetValue(str(lup_path.num_node - 1))
         self.text_ctrl_lup_max_node.SetValue(str(lup_path.num_node - 1))
+        self.redraw_plot(self.current_lup)
 
     def correct_lup_node(self) -> bool:
         """
@@ -1013,6 +1268,34 @@ class GRRMSingleViewerApp(wx.App):
         else:
             pass
 
+    def show_plot(self, title: str, source, draw: Callable[['Figure'], None], size):
+        """
+        draw a plot on the plot frame (created at the first plot and reused)
+        :param source: job (or path) of the plot. The plot is redrawn by redraw_plot(source).
+        :param draw: function drawing the plot on the figure. It is called again at each redraw
+                     (e.g. reading the selected step at the time).
+        :param size: figure size (inch) of a new frame
+        """
+        if self.plot_frame is None:
+            self.plot_frame = PlotFrame(self.frame, size)
+        self.plot_frame.plot(title, source, draw)
+
+    def redraw_plot(self, source):
+        """
+        redraw the plot if the plot frame shows a plot of source (after refresh or a change of the selected step)
+        """
+        if source is not None and self.plot_frame is not None and self.plot_frame.source is source:
+            self.plot_frame.redraw()
+
+    def get_selected_step(self, text_ctrl) -> Optional[int]:
+        """
+        step (or node) number of text_ctrl, None if it is not a number
+        """
+        try:
+            return int(text_ctrl.GetValue())
+        except ValueError:
+            return None
+
     def show_text_frame(self, title: str, text: str):
         text_view = TextViewFrame(self.frame, title, text, self.job)
         text_view.Show(True)
@@ -1021,13 +1304,14 @@ class GRRMSingleViewerApp(wx.App):
     def load_file(self, file: str):
         """
         load file and set controls
-        :param file: com or log file
+        :param file: com or log file (or compressed log file: xxx.log.gz, .xz or .bz2)
         """
         dir = os.path.dirname(file)
-        base = os.path.basename(file)
+        base = os.path.basename(utils.split_compression_extension(file)[0])
         root, ext = os.path.splitext(base)
         if ext.lower() == '.com':
             log_file = os.path.join(dir, root + '.log')
+            log_file = utils.find_log_file(log_file) or log_file
             com_file = file
         elif ext.lower() == '.log':
             log_file = file
@@ -1042,23 +1326,161 @@ class GRRMSingleViewerApp(wx.App):
             else:
                 self.logging('Instead, ' + com_file + ' is found.')
 
+        if self.load_thread is not None:
+            self.logging('Another file is being loaded. Cancel it first.')
+            return
+
         self.logging('load: ' + log_file)
         if com_file is not None:
             self.logging('load: ' + com_file)
-        self.job = GRRMSingleJob(log_file=log_file, com_file=com_file)
+
+        # parse in a worker thread. The job tree is filled while loading.
+        self.stop_follow()
+        self.job = None
+        self.reset_detail_notebook()
+        self.purge_current_jobs()
+        self.set_detail_panel('none')
+        self.tree_ctrl_jobs.DeleteAllItems()
+        self.tree_ctrl_jobs.AddRoot(log_file)
+        self.reload_selection = None
+        self.start_load_thread(log_file, com_file)
+
+    def start_load_thread(self, log_file: str, com_file: Optional[str], use_cache: bool = True):
+        self.gauge_load.SetValue(0)
+        self.button_load_cancel.Enable()
+        self.load_logged_percent = 0
+        self.load_cancel_event = threading.Event()
+        self.load_thread = threading.Thread(target=self.load_job_in_thread,
+                                            args=(log_file, com_file, self.load_cancel_event, use_cache), daemon=True)
+        self.load_thread.start()
+
+    def load_job_in_thread(self, log_file: str, com_file: Optional[str], cancel_event: threading.Event,
+                           use_cache: bool = True):
+        """
+        (worker thread) parse the log and send the results to the main thread by wx.CallAfter
+        :param use_cache: False to parse the log even if it is in the parse cache (follow mode)
+        """
+        def progress(bytes_read: int, total_bytes: int, jobs: list) -> bool:
+            wx.CallAfter(self.on_load_progress, bytes_read, total_bytes, jobs[:])
+            return not cancel_event.is_set()
+
+        # timing of each parse stage is shown in DEBUG mode
+        profiler = ParseProfiler() if config.DEBUG else None
+        try:
+            cache = self.parse_cache if use_cache else None
+            job = GRRMSingleJob(log_file=log_file, com_file=com_file, cache=cache, lazy=config.LAZY_LOAD,
+                                progress=progress, workers=config.PARSE_WORKERS, profiler=profiler)
+        except LoadCancelled:
+            wx.CallAfter(self.on_load_finished, None, 'loading cancelled: ' + log_file, profiler)
+        except Exception as e:
+            wx.CallAfter(self.on_load_finished, None, 'loading failed: ' + str(e), profiler)
+        else:
+            wx.CallAfter(self.on_load_finished, job, 'loaded from cache' if job.from_cache else 'loaded', profiler)
+
+    def on_load_progress(self, bytes_read: int, total_bytes: int, jobs: list):
+        """
+        (main thread) show progress and add jobs parsed so far to the tree
+        """
+        if self.load_thread is None:
+            return
+        percent = 100 * bytes_read // max(total_bytes, 1)
+        self.gauge_load.SetValue(min(self.gauge_load.GetRange() * bytes_read // max(total_bytes, 1),
+                                     self.gauge_load.GetRange()))
+        if percent >= self.load_logged_percent + 10:
+            self.load_logged_percent = percent - percent % 10
+            self.logging('{:} % ({:.1f} / {:.1f} MB), {:} blocks found'.format(
+                percent, bytes_read / 1024 ** 2, total_bytes / 1024 ** 2, len(jobs)))
+        if self.reload_selection is not None:
+            return  # the current tree is kept while reloading
+        root = self.tree_ctrl_jobs.GetRootItem()
+        for i in range(self.tree_ctrl_jobs.GetChildrenCount(root, False), len(jobs)):
+            self.append_job_tree_item(root, i, jobs[i])
+        self.tree_ctrl_jobs.Expand(root)
+
+    def on_load_finished(self, job: Optional[GRRMSingleJob], message: str, profiler: Optional[ParseProfiler] = None):
+        """
+        (main thread) set the loaded job
+        :param profiler: parse profile of the job (DEBUG mode)
+        """
+        self.load_thread = None
+        self.load_cancel_event = None
+        self.button_load_cancel.Disable()
+        self.gauge_load.SetValue(0)
+        self.logging(message)
+        if profiler is not None:
+            self.logging('\n'.join(profiler.format_report()))
+        selection, self.reload_selection = self.reload_selection, None
+        if job is None:
+            if selection is None:
+                self.tree_ctrl_jobs.DeleteAllItems()
+            else:
+                self.stop_follow()  # the current (cached) job is kept
+            return
+        self.job = job
         self.load_job_tree()
+        if selection:
+            self.select_tree_item_path(selection)
+        if job.cache_pending:
+            # lazy mode: the jobs are parsed for the cache after the tree is shown
+            self.cache_thread = threading.Thread(target=self.store_cache_in_thread, args=(job,), daemon=True)
+            self.cache_thread.start()
+
+    def store_cache_in_thread(self, job: GRRMSingleJob):
+        """
+        (worker thread) parse the jobs deferred in lazy mode and store the job in the parse cache
+        """
+        try:
+            job.store_cache()
+        except Exception as e:
+            wx.CallAfter(self.logging, 'cache store failed: ' + str(e))
+        finally:
+            wx.CallAfter(self.on_cache_stored, threading.current_thread())
+
+    def on_cache_stored(self, thread: threading.Thread):
+        if self.cache_thread is thread:
+            self.cache_thread = None
 
     # Event Handlers ###################################################################################
     def on_exit(self, event):
         try:
-            pass
+            if self.follow_timer is not None:
+                self.follow_timer.Stop()
+            if self.load_cancel_event is not None:
+                self.load_cancel_event.set()
         finally:
             wx.Exit()
 
     def on_activated_tree_ctrl_jobs(self, event):
-        self.purge_current_jobs()
         item = event.GetItem()
         job = self.tree_ctrl_jobs.GetItemData(item)
+        if job is None:
+            return  # root item while loading
+        self.load_job(job)
+
+    def on_button_load_cancel(self, event):
+        if self.load_cancel_event is not None:
+            self.load_cancel_event.set()
+            self.button_load_cancel.Disable()
+
+    def on_expanding_tree_ctrl_jobs(self, event):
+        item = event.GetItem()
+        job = self.tree_ctrl_jobs.GetItemData(item)
+        if job is None or self.tree_ctrl_jobs.GetChildrenCount(item, False) > 0:
+            return
+        # subitems of a job not parsed yet (lazy mode): the job is parsed here
+        self.append_subjob_tree_items(item, resolve_job(job))
+
+    def load_job(self, job):
+        """
+        show the job (an item of the job tree) in the detail panel
+        """
+        if config.DEBUG and isinstance(job, LazyJob) and not job.parsed:
+            # timing of parsing the deferred job
+            profiler = ParseProfiler()
+            with activate(profiler):
+                job.get_job()
+            self.logging('\n'.join(profiler.format_report()))
+        self.purge_current_jobs()
         if job.type == 'general':
             self.current_general = job
             self.load_general()
@@ -1129,7 +1551,7 @@ class GRRMSingleViewerApp(wx.App):
         try:
             value = int(value)
         except:
-            max_step = len(job.energy_list) - 1
+            max_step = job.num_steps - 1
             self.text_ctrl_opt_step.SetValue(str(max_step))
             self.load_opt_grid()
             return
@@ -1146,14 +1568,16 @@ class GRRMSingleViewerApp(wx.App):
             self.clear_opt_grid()
             return
 
-        max_step = len(job.energy_list) - 1
+        max_step = job.num_steps - 1
         self.text_ctrl_opt_step.SetValue(str(max_step))
         self.load_opt_grid()
 
     def on_button_opt_plot(self, event):
         job = self.current_opt
         if job is not None:
-            job.show_plot()
+            self.show_plot('Optimization', job,
+                           lambda figure: job.draw_plot(figure, step=self.get_selected_step(self.text_ctrl_opt_step)),
+                           size=config.OPT_PLOT_SIZE)
 
     def on_button_opt_view_current(self, event):
         job = self.current_opt
@@ -1179,8 +1603,7 @@ class GRRMSingleViewerApp(wx.App):
         if job is None:
             return
 
-        file = utils.get_temp_file_name('opt_trajectory_', '.xyz')
-        job.save_xyz(file)
+        file = utils.get_temp_file('opt_trajectory_', '.xyz', job.save_xyz, job, len(job.structure_list))
         molview.show_multi_xyz(file)
 
     def on_button_opt_view_optimized(self, event):
@@ -1249,8 +1672,9 @@ class GRRMSingleViewerApp(wx.App):
         self.correct_freq_settings()
         step = int(self.text_ctrl_freq_step.GetValue())
         shift = float(self.text_ctrl_freq_shift.GetValue())
-        file = utils.get_temp_file_name('normal_mode_' + str(normal_mode) + '_' ,'.xyz')
-        job.save_xyz(normal_mode=normal_mode, file=file, step=step, max_shift=shift)
+        file = utils.get_temp_file('normal_mode_' + str(normal_mode) + '_', '.xyz',
+                                   lambda f: job.save_xyz(normal_mode=normal_mode, file=f, step=step, max_shift=shift),
+                                   job, normal_mode, step, shift)
         molview.show_multi_xyz(file)
 
     def  on_combo_box_thermal_data(self, event):
@@ -1270,22 +1694,27 @@ class GRRMSingleViewerApp(wx.App):
         if job is None:
             return
 
-        job.show_profile_plot(reverse_flag=False)
+        self.show_plot(job.profile_plot_title(False), job,
+                       lambda figure: job.draw_profile_plot(figure, reverse_flag=False),
+                       size=config.IRC_PROFILE_PLOT_SIZE)
 
     def on_button_irc_plot_profile_reversed(self, event):
         job = self.current_irc
         if job is None:
             return
 
-        job.show_profile_plot(reverse_flag=True)
+        self.show_plot(job.profile_plot_title(True), job,
+                       lambda figure: job.draw_profile_plot(figure, reverse_flag=True),
+                       size=config.IRC_PROFILE_PLOT_SIZE)
 
     def on_button_irc_full_trajectory_f2b(self, event):
         job = self.current_irc
         if job is None:
             return
 
-        file = utils.get_temp_file_name('irc_full_trajectory_f2b_', '.xyz')
-        job.save_full_irc_path_xyz(file, reverse_flag=False)
+        file = utils.get_temp_file('irc_full_trajectory_f2b_', '.xyz',
+                                   lambda f: job.save_full_irc_path_xyz(f, reverse_flag=False),
+                                   job, [len(path.structure_list) for path in job.paths], False)
         molview.show_multi_xyz(file)
 
     def on_button_irc_full_trajectory_b2f(self, event):
@@ -1293,8 +1722,9 @@ class GRRMSingleViewerApp(wx.App):
         if job is None:
             return
 
-        file = utils.get_temp_file_name('irc_full_trajectory_b2f_', '.xyz')
-        job.save_full_irc_path_xyz(file, reverse_flag=True)
+        file = utils.get_temp_file('irc_full_trajectory_b2f_', '.xyz',
+                                   lambda f: job.save_full_irc_path_xyz(f, reverse_flag=True),
+                                   job, [len(path.structure_list) for path in job.paths], True)
         molview.show_multi_xyz(file)
 
     def on_text_combo_box_irc_direction(self, event):
@@ -1402,15 +1832,16 @@ class GRRMSingleViewerApp(wx.App):
         if path is None:
             return
 
-        path.show_plot()
+        self.show_plot('IRC ({:})'.format(path.direction), path,
+                       lambda figure: path.draw_plot(figure, step=self.get_selected_step(self.text_ctrl_irc_step)),
+                       size=config.IRC_PLOT_SIZE)
 
     def on_button_irc_trajectory(self, event):
         path = self.current_irc_path
         if path is None:
             return
 
-        file = utils.get_temp_file_name('irc_trajectory_', '.xyz')
-        path.save_xyz(file)
+        file = utils.get_temp_file('irc_trajectory_', '.xyz', path.save_xyz, path, len(path.structure_list))
         molview.show_multi_xyz(file)
 
     def on_key_down_grid_irc(self, event):
@@ -1428,16 +1859,21 @@ class GRRMSingleViewerApp(wx.App):
         self.load_lup_path()
 
     def on_button_lup_plot_step(self, event):
-        job = self.current_lup_path
-        if job is None:
+        if self.current_lup_path is None:
             return
-        job.show_plot_by_step()
+        # the path of the selected iteration is plotted (also after the selection is changed)
+        self.show_plot('LUP Path Energy', self.current_lup,
+                       lambda figure: self.current_lup_path.draw_plot_by_step(
+                           figure, node=self.get_selected_step(self.text_ctrl_lup_node)),
+                       size=config.LUP_PATH_PLOT_SIZE)
 
     def on_button_button_lup_plot_length(self, event):
-        job = self.current_lup_path
-        if job is None:
+        if self.current_lup_path is None:
             return
-        job.show_plot_by_length()
+        self.show_plot('LUP Path Energy', self.current_lup,
+                       lambda figure: self.current_lup_path.draw_plot_by_length(
+                           figure, node=self.get_selected_step(self.text_ctrl_lup_node)),
+                       size=config.LUP_PATH_PLOT_SIZE)
 
     def on_button_lup_data(self, event):
         job = self.current_lup_path
@@ -1452,8 +1888,7 @@ class GRRMSingleViewerApp(wx.App):
         if job is None:
             return
 
-        file = utils.get_temp_file_name('lup_trajectory_', '.xyz')
-        job.save_xyz(file)
+        file = utils.get_temp_file('lup_trajectory_', '.xyz', job.save_xyz, job, len(job.structure_list))
         molview.show_multi_xyz(file)
 
     def on_button_lup_node_view(self, event):
@@ -1508,13 +1943,15 @@ class GRRMSingleViewerApp(wx.App):
         job = self.current_afirpath
         if job is None:
             return
-        job.show_plot_by_step()
+        self.show_plot('AFIR Path Energy', job, lambda figure: job.draw_plot_by_step(figure),
+                       size=config.AFIR_PATH_PLOT_SIZE)
 
     def on_button_afirpath_plot_length(self, event):
         job = self.current_afirpath
         if job is None:
             return
-        job.show_plot_by_length()
+        self.show_plot('AFIR Path Energy', job, lambda figure: job.draw_plot_by_length(figure),
+                       size=config.AFIR_PATH_PLOT_SIZE)
 
     def on_button_afirpath_data(self, event):
         job = self.current_afirpath
@@ -1552,7 +1989,7 @@ class GRRMSingleViewerApp(wx.App):
 
     def on_menu_open(self, event):
         dialog = wx.FileDialog(None,'Select GRRM file',
-                               wildcard='(*.com;*.log)|*.com;*.log',
+                               wildcard='(*.com;*.log;*.log.gz;*.log.xz;*.log.bz2)|*.com;*.log;*.log.gz;*.log.xz;*.log.bz2',
                                style=wx.FD_OPEN)
         if dialog.ShowModal() == wx.ID_OK:
             file = dialog.GetPath()
@@ -1562,6 +1999,18 @@ class GRRMSingleViewerApp(wx.App):
             dialog.Destroy()
             return
 
+    def on_menu_refresh(self, event):
+        self.refresh_job()
+
+    def on_menu_follow(self, event):
+        if self.menu_item_follow.IsChecked():
+            self.start_follow()
+        else:
+            self.stop_follow()
+
+    def on_timer_follow(self, event):
+        self.refresh_job()
+
 
 if __name__ == "__main__":
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
@@ -1,39 +1,53 @@
-import copy
 import dataclasses
 from decimal import Decimal
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional, Sequence, Union
 
-import matplotlib.pyplot as plt
-
-from grrmsv.structure import Structure
-from grrmsv.utils import calc_limit_for_plot
+from grrmsv.structure import Structure, FrozenAtoms, FrozenAtomsSource, to_frozen_atoms
+from grrmsv.plotting import plot_series, pyplot
+from grrmsv.profiling import profiled
+from grrmsv.tokenizer import LogEvent, scan_log_events
+from grrmsv.utils import to_number, NUMERIC_EXACT
 
 import config
 
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
 
 @dataclasses.dataclass
 class PathPoint:
     itr : int
-    length : Decimal
-    energy : Decimal
+    length : Union[Decimal, float]
+    energy : Union[Decimal, float]
 
 
 class AFIRPath:
-    def __init__(self, afir_path_block_data: List[str], frozen_atom_coordinates: Optional[List[str]] = None):
+    def __init__(self, afir_path_block_data: Sequence[str], frozen_atom_coordinates: FrozenAtomsSource = None,
+                 events: Optional[List[LogEvent]] = None, numeric_mode: str = NUMERIC_EXACT):
+        """
+        :param afir_path_block_data: lines from ---Profile of AFIR path to the end of log
+        :param events: events of afir_path_block_data (line offsets relative to the block). Scanned here if not given.
+        :param numeric_mode: values are Decimal (exact) or float (fast)
+        """
         assert (afir_path_block_data[0].startswith('---Profile of AFIR path'))
-        self.row_data: List[str] = copy.deepcopy(afir_path_block_data)
+        self.row_data: Sequence[str] = afir_path_block_data
         self.path_profile_data: List[str] = []
         self.points: List[PathPoint] = []
         self.num_atom: int = -1
         self.approximate_structures: List[Structure] = []
-        self.approximate_structure_energy_list: List[Decimal] = []
-        self.frozen_atom_coordinates: Optional[List[str]] = frozen_atom_coordinates
+        self.approximate_structure_energy_list: List[Union[Decimal, float]] = []
+        self.frozen_atom_coordinates: Optional[FrozenAtoms] = to_frozen_atoms(frozen_atom_coordinates)
+        self.numeric_mode: str = numeric_mode
 
         self.name: Optional[str] = None
 
-        self._parse_row_data()
+        if events is None:
+            events = list(scan_log_events(self.row_data))
+        self._parse_row_data(events)
 
-    def _parse_row_data(self):
+    @profiled('AFIRPath', lambda path: {'points': len(path.points),
+                                        'structures': len(path.approximate_structures)})
+    def _parse_row_data(self, events: List[LogEvent]):
 
         self.path_profile_data.append(self.row_data[0])
         self.path_profile_data.append(self.row_data[1])
@@ -45,60 +59,66 @@ class AFIRPath:
             self.path_profile_data.append(line)
             line_data = line.strip().split()
             itr = int(line_data[0])
-            length = Decimal(line_data[1])
-            energy = Decimal(line_data[2])
+            length = to_number(line_data[1], self.numeric_mode)
+            energy = to_number(line_data[2], self.numeric_mode)
             point = PathPoint(itr=itr, energy=energy, length=length)
             self.points.append(point)
 
         # check num atoms
-        start = -1
-        for (i, line) in enumerate(self.row_data):
-            if line.startswith('---Approximate'):
-                start = i + 1
-                break
-        if start == -1:   # Approximate TS/EQ not found.
+        approximate_events = [e for e in events if e.kind == 'approximate']
+        if len(approximate_events) == 0:   # Approximate TS/EQ not found.
             return
-        for (i, line) in enumerate(self.row_data[start:]):
-            if line.startswith('ENERGY'):
-                self.num_atom = i
+        start = approximate_events[0].line + 1
+        for i in range(start, len(self.row_data)):
+            if self.row_data[i].startswith('ENERGY'):
+                self.num_atom = i - start
                 break
 
         # get approximate EQ/TS structures
-        for (i, line) in enumerate(self.row_data):
-            if line.startswith('---Approximate'):
-                name = line.replace('---', '').replace(' geometry ', ' ').replace('between ', '').replace(' and ', '-')
-                self.approximate_structures.append(Structure(self.row_data[i+1:i+self.num_atom+1], name=name,
-                                                             frozen_atom_coordinates=self.frozen_atom_coordinates))
-                self.approximate_structure_energy_list.append(Decimal(self.row_data[i+self.num_atom+1].split()[2]))
+        for event in approximate_events:
+            i = event.line
+            name = event.text.replace('---', '').replace(' geometry ', ' ').replace('between ', '').replace(' and ', '-')
+            self.approximate_structures.append(Structure(self.row_data[i+1:i+self.num_atom+1], name=name,
+                                                         frozen_atom_coordinates=self.frozen_atom_coordinates))
+            self.approximate_structure_energy_list.append(to_number(self.row_data[i+self.num_atom+1].split()[2],
+                                                                   self.numeric_mode))
+
+    def draw_plot_by_step(self, figure: 'Figure'):
+        """
+        draw the energy of each iteration on figure (cleared first)
+        """
+        figure.clear()
+        axes = figure.add_subplot()
+        axes.set_title('AFIR Path Energy')
+        axes.set_xlabel('# ITR.')
+        axes.set_ylabel('Energy')
+        plot_series(axes, [p.itr for p in self.points], [p.energy for p in self.points], scatter=True)
+        figure.tight_layout()
+
+    def draw_plot_by_length(self, figure: 'Figure'):
+        """
+        draw the energy of each iteration along the path length on figure (cleared first).
+        Points are labeled with # ITR.
+        """
+        figure.clear()
+        axes = figure.add_subplot()
+        axes.set_title('AFIR Path Energy (labels = # ITR.)')
+        axes.set_xlabel('length (ang)')
+        axes.set_ylabel('Energy')
+        plot_series(axes, [p.length for p in self.points], [p.energy for p in self.points], scatter=True,
+                    labels=[p.itr for p in self.points])
+        figure.tight_layout()
 
     def show_plot_by_step(self):
-        xs = [p.itr for p in self.points]
-        ys = [p.energy for p in self.points]
-        plt.figure('AFIR Path Energy ', figsize=config.AFIR_PATH_PLOT_SIZE)
-        plt.title('AFIR Path Energy')
-        plt.ylim(*calc_limit_for_plot(ys))
-        plt.xlabel('# ITR.')
-        plt.ylabel('Energy')
-        plt.scatter(xs, ys)
-
-        plt.tight_layout()
+        plt = pyplot()
+        figure = plt.figure('AFIR Path Energy ', figsize=config.AFIR_PATH_PLOT_SIZE)
+        self.draw_plot_by_step(figure)
         plt.show()
 
     def show_plot_by_length(self):
-        labels = [p.itr for p in self.points]
-        xs = [p.length for p in self.points]
-        ys = [p.energy for p in self.points]
-        plt.figure('AFIR Path Energy ', figsize=config.AFIR_PATH_PLOT_SIZE)
-        plt.title('AFIR Path Energy (labels = # ITR.)')
-        plt.ylim(*calc_limit_for_plot(ys))
-        plt.xlabel('length (ang)')
-        plt.ylabel('Energy')
-
-        for (i, j, k) in zip(xs, ys, labels):
-            plt.plot(i, j, 'o', color='blue')
-            plt.annotate(str(k), xy=(float(i), float(j)))
-
-        plt.tight_layout()
+        plt = pyplot()
+        figure = plt.figure('AFIR Path Energy ', figsize=config.AFIR_PATH_PLOT_SIZE)
+        self.draw_plot_by_length(figure)
         plt.show()
 
     def get_profile_string(self) -> str:
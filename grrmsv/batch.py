@@ -0,0 +1,242 @@
+import argparse
+import csv
+import fnmatch
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, wait
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+import numpy as np
+
+from grrmsv.grrm_single_job import GRRMSingleJob
+from grrmsv.utils import find_parent_com_file, split_compression_extension, tostring, NUMERIC_FAST, NUMERIC_MODES
+
+
+# Columns of a summary row (one row per job). Energies (see summarize_job):
+#   energy: final energy of OPT, ts_energy/forward_energy/backward_energy: IRC, max_energy: LUP
+SUMMARY_COLUMNS = ('file', 'job_index', 'name', 'type', 'status', 'steps', 'energy', 'ts_energy', 'forward_energy',
+                   'backward_energy', 'max_energy', 'converged',
+                   'maximum_force_conv', 'rms_force_conv', 'maximum_displacement_conv', 'rms_displacement_conv',
+                   'num_imaginary_freq', 'lowest_freq', 'thermal_h', 'thermal_g', 'normal_termination', 'error')
+
+
+def find_com_file(log_file: str) -> Optional[str]:
+    """
+    com file of the log (xxx.com for xxx.log or xxx.log.gz, or the parent com file for xxx_EQ1.log etc.),
+    None if not found
+    """
+    com_file = os.path.splitext(split_compression_extension(log_file)[0])[0] + '.com'
+    if os.path.exists(com_file):
+        return com_file
+    return find_parent_com_file(log_file)
+
+
+def iter_log_files(root: str, pattern: str = '*.log') -> Iterator[str]:
+    """
+    log files under root (or root itself if it is a file), in sorted order
+    """
+    if os.path.isfile(root):
+        yield root
+        return
+    for (directory, sub_directories, files) in os.walk(root):
+        sub_directories.sort()
+        for file in sorted(files):
+            if fnmatch.fnmatch(file, pattern):
+                yield os.path.join(directory, file)
+
+
+def _freq_summary(job) -> Dict[str, Any]:
+    row = {'num_imaginary_freq': int(np.count_nonzero(job.freq_array < 0)),
+           'lowest_freq': float(job.freq_array.min()) if len(job.freq_array) > 0 else None}
+    if len(job.thermal_data_list) > 0:
+        row['thermal_h'] = job.thermal_data_list[0].h
+        row['thermal_g'] = job.thermal_data_list[0].g
+    return row
+
+
+def _irc_endpoint_energy(path) -> Any:
+    if path.opt_job is not None and path.opt_job.optimized_energy is not None:
+        return path.opt_job.optimized_energy
+    if len(path.energy_list) > 0:
+        return path.energy_list[-1]
+    return None
+
+
+def summarize_job(job) -> Dict[str, Any]:
+    """
+    summary values of a job (OPTJob, FREQJob, IRCJob or LUPJob). Values are Decimal, int, bool, str or None.
+    Energies:
+        OPT energy: the optimized energy, or the energy of the last step if not optimized
+        IRC ts_energy: the energy of the initial structure (TS)
+        IRC forward_energy, backward_energy: the energy of the end point of each path (the optimized energy of
+            the OPT job from the end point, or the energy of the last IRC step if not optimized)
+        LUP max_energy: the maximum node energy of the last iteration
+    """
+    row: Dict[str, Any] = {'name': job.name, 'type': job.type}
+    if job.type == 'opt':
+        row['status'] = job.status
+        row['steps'] = job.num_steps
+        row['energy'] = job.optimized_energy
+        if row['energy'] is None and job.num_steps > 0:
+            row['energy'] = job.energy_list[-1]
+        if job.num_steps > 0:
+            step_values = job.get_step_values(job.num_steps - 1)
+            for column in ('maximum_force_conv', 'rms_force_conv', 'maximum_displacement_conv',
+                           'rms_displacement_conv'):
+                row[column] = step_values[column]
+            row['converged'] = all(row[column] for column in ('maximum_force_conv', 'rms_force_conv',
+                                                               'maximum_displacement_conv', 'rms_displacement_conv'))
+    elif job.type == 'freq':
+        row['status'] = 'finished' if len(job.thermal_data_list) > 0 else 'unfinished'
+        row['steps'] = len(job.freq_list)
+        row.update(_freq_summary(job))
+    elif job.type == 'irc':
+        row['status'] = 'finished' if job.energy_profile_points is not None else 'unfinished'
+        row['steps'] = sum(len(path.energy_list) for path in job.paths)
+        row['ts_energy'] = job.init_energy
+        for path in job.paths:
+            if path.direction in ('forward', 'backward'):
+                row[path.direction + '_energy'] = _irc_endpoint_energy(path)
+        if job.init_freq_job is not None:
+            row.update(_freq_summary(job.init_freq_job))
+    elif job.type == 'lup':
+        row['status'] = 'finished' if len(job.approximate_structures) > 0 else 'unfinished'
+        row['steps'] = len(job.itr_paths)
+        if len(job.itr_paths) > 0 and len(job.itr_paths[-1].energy_list) > 0:
+            row['max_energy'] = max(job.itr_paths[-1].energy_list)
+    return row
+
+
+def summarize_log(log_file: str, numeric_mode: str = NUMERIC_FAST) -> List[Dict[str, Any]]:
+    """
+    summary rows of all jobs in the log. If the log cannot be read, one row with the error is returned.
+    """
+    try:
+        grrm_job = GRRMSingleJob(log_file, com_file=find_com_file(log_file), keep_log_data=False,
+                                 numeric_mode=numeric_mode)
+    except Exception as e:
+        return [{'file': log_file, 'status': 'error', 'error': '{:}: {:}'.format(type(e).__name__, e)}]
+
+    rows = []
+    for (i, job) in enumerate(grrm_job.jobs):
+        row = summarize_job(job)
+        row['file'] = log_file
+        row['job_index'] = i
+        row['normal_termination'] = grrm_job.normal_termination
+        rows.append(row)
+    if len(rows) == 0:
+        rows.append({'file': log_file, 'status': 'no job', 'normal_termination': grrm_job.normal_termination})
+    return rows
+
+
+def summarize_logs(log_files: Iterator[str], workers: int = 0,
+                   numeric_mode: str = NUMERIC_FAST) -> Iterator[Dict[str, Any]]:
+    """
+    summary rows of logs, yielded as soon as each log is parsed (in the order of completion if workers > 0).
+    :param workers: number of worker processes (0: parse in this process)
+    :param numeric_mode: numeric mode of GRRMSingleJob (the output is the same in both modes)
+    """
+    if workers <= 0:
+        for log_file in log_files:
+            yield from summarize_log(log_file, numeric_mode)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor  # multiprocessing is imported only for workers
+
+    # only a few logs per worker are in flight, so memory use does not grow with the number of logs
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for log_file in log_files:
+            pending.add(executor.submit(summarize_log, log_file, numeric_mode))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        while len(pending) > 0:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+class CSVRowWriter:
+    def __init__(self, f: TextIO):
+        self.writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS, lineterminator='\n')
+        self.writer.writeheader()
+
+    def write(self, row: Dict[str, Any]):
+        self.writer.writerow({column: self._format(value) for (column, value) in row.items()})
+
+    @staticmethod
+    def _format(value: Any) -> str:
+        if value is None:
+            return ''
+        if isinstance(value, (Decimal, float)):
+            return tostring(value)
+        return str(value)
+
+    def close(self):
+        pass
+
+
+class JSONRowWriter:
+    """
+    write rows as a JSON array, one row per line
+    """
+    def __init__(self, f: TextIO):
+        self.f: TextIO = f
+        self.num_rows: int = 0
+        self.f.write('[')
+
+    def write(self, row: Dict[str, Any]):
+        row = {column: row.get(column) for column in SUMMARY_COLUMNS}
+        self.f.write((',\n' if self.num_rows > 0 else '\n') + json.dumps(row, default=self._default))
+        self.num_rows += 1
+
+    @staticmethod
+    def _default(value: Any) -> Any:
+        if isinstance(value, Decimal):
+            return float(value)
+        raise TypeError('Object of type {:} is not JSON serializable'.format(type(value).__name__))
+
+    def close(self):
+        self.f.write('\n]\n')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Summarize GRRM log files (one row per job) as CSV or JSON.')
+    parser.add_argument('paths', nargs='+', help='log files or directories (searched recursively)')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    parser.add_argument('-f', '--format', choices=['csv', 'json'],
+                        help='output format (default: from the extension of output, or csv)')
+    parser.add_argument('-p', '--pattern', default='*.log', help='file name pattern in directories (default: *.log; e.g. *.log.gz for compressed logs)')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes (default: number of CPUs, 0: no worker process)')
+    parser.add_argument('-n', '--numeric-mode', choices=NUMERIC_MODES, default=NUMERIC_FAST,
+                        help='numeric mode of parsing (default: fast; the output is the same)')
+    args = parser.parse_args(argv)
+
+    output_format = args.format
+    if output_format is None:
+        output_format = 'json' if args.output is not None and args.output.lower().endswith('.json') else 'csv'
+
+    def log_files() -> Iterator[str]:
+        for path in args.paths:
+            yield from iter_log_files(path, args.pattern)
+
+    f = open(args.output, 'w', newline='', encoding='utf-8') if args.output is not None else sys.stdout
+    try:
+        writer = CSVRowWriter(f) if output_format == 'csv' else JSONRowWriter(f)
+        for row in summarize_logs(log_files(), workers=args.workers, numeric_mode=args.numeric_mode):
+            writer.write(row)
+            f.flush()
+        writer.close()
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
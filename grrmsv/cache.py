@@ -0,0 +1,210 @@
+import hashlib
+import importlib
+import io
+import os
+import pickle
+import zlib
+from typing import Any, Dict, List, Optional
+
+from grrmsv.logbuffer import LogBuffer, BlockView
+
+
+CACHE_FORMAT_VERSION = 5
+CACHE_FILE_SUFFIX = '.grrmsv-cache'
+_MAGIC = b'GRRMSVCACHE\n'
+_HASH_BLOCK_SIZE = 65536  # bytes of the head and the tail of a file used for the content hash
+
+DEFAULT_SIZE_LIMIT = 512 * 1024 * 1024
+
+# modules of the classes pickled in cache entries (see class_layout)
+LAYOUT_MODULES = ('grrmsv.grrm_single_job', 'grrmsv.lazyjob', 'grrmsv.logbuffer', 'grrmsv.tokenizer',
+                  'grrmsv.structure', 'grrmsv.trajectory', 'grrmsv.opt', 'grrmsv.freq', 'grrmsv.irc', 'grrmsv.lup',
+                  'grrmsv.afirpath')
+
+_class_layout: Optional[str] = None
+
+
+class _StatePickler(pickle.Pickler):
+    """
+    Pickler that saves LogBuffer and BlockView objects as references: the raw text of the log is not stored in
+    the cache.
+    """
+
+    def persistent_id(self, obj):
+        if type(obj) is LogBuffer:
+            return 'log_buffer'
+        if type(obj) is BlockView:
+            return 'block_view', obj.start, obj.end
+        return None
+
+
+class _StateUnpickler(pickle.Unpickler):
+    """
+    Unpickler that restores LogBuffer references as one released buffer (and BlockView references on it).
+    """
+
+    def __init__(self, file):
+        super().__init__(file)
+        self.log_buffer: LogBuffer = LogBuffer([])
+        self.log_buffer.release()
+
+    def persistent_load(self, pid):
+        if pid == 'log_buffer':
+            return self.log_buffer
+        if type(pid) is tuple and pid[0] == 'block_view':
+            return BlockView(self.log_buffer, pid[1], pid[2])
+        raise pickle.UnpicklingError('unknown persistent id: ' + str(pid))
+
+
+def class_layout() -> str:
+    """
+    hash of the source files of LAYOUT_MODULES. An entry pickled with other definitions of the job classes
+    (e.g. by another version of grrmsv) is not loaded, and the log is parsed again.
+    """
+    global _class_layout
+    if _class_layout is None:
+        digest = hashlib.sha1()
+        for name in LAYOUT_MODULES:
+            with open(importlib.import_module(name).__file__, 'rb') as f:
+                digest.update(f.read())
+        _class_layout = digest.hexdigest()
+    return _class_layout
+
+
+def file_identity(file: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    path, size, mtime and hash of the head and tail of the file (None if file is None)
+    """
+    if file is None:
+        return None
+    path = os.path.abspath(file)
+    stat = os.stat(path)
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        digest.update(f.read(_HASH_BLOCK_SIZE))
+        if stat.st_size > _HASH_BLOCK_SIZE:
+            f.seek(max(_HASH_BLOCK_SIZE, stat.st_size - _HASH_BLOCK_SIZE))
+            digest.update(f.read(_HASH_BLOCK_SIZE))
+    return {'path': os.path.normcase(path), 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+            'hash': digest.hexdigest()}
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed GRRM logs (GRRMSingleJob).
+    An entry is keyed by the identity of the log file and the com file (path, size, mtime, head/tail hash)
+    and is used only if both files and the job classes (class_layout) are unchanged. Entries are evicted in least
+    recently used order when the total size exceeds size_limit. Stale or broken entries are removed and the log is
+    parsed again.
+    """
+
+    def __init__(self, cache_dir: str, size_limit: int = DEFAULT_SIZE_LIMIT):
+        """
+        :param cache_dir: directory for cache files (created if not found)
+        :param size_limit: maximum total size of cache files (bytes)
+        """
+        self.cache_dir: str = cache_dir
+        self.size_limit: int = size_limit
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_file(self, log_file: str) -> str:
+        key = os.path.normcase(os.path.abspath(log_file))
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + CACHE_FILE_SUFFIX)
+
+    @staticmethod
+    def identity(log_file: str, com_file: Optional[str]) -> Dict[str, Any]:
+        """
+        identity of the files (and the cache format) checked when an entry is loaded
+        """
+        return {'version': CACHE_FORMAT_VERSION, 'layout': class_layout(), 'log': file_identity(log_file),
+                'com': file_identity(com_file)}
+
+    def load(self, log_file: str, com_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        return the cached state of GRRMSingleJob for the files, or None if not found, stale or broken.
+        """
+        entry_file = self._entry_file(log_file)
+        if not os.path.exists(entry_file):
+            return None
+        try:
+            identity = self.identity(log_file, com_file)
+            with open(entry_file, 'rb') as f:
+                if f.read(len(_MAGIC)) != _MAGIC:
+                    raise ValueError('not a cache file')
+                if pickle.load(f) != identity:
+                    self._remove(entry_file)
+                    return None
+                state = _StateUnpickler(io.BytesIO(zlib.decompress(f.read()))).load()
+        except Exception:
+            # broken cache file (or a file of an old version): parse the log again
+            self._remove(entry_file)
+            return None
+        # mark as recently used
+        try:
+            os.utime(entry_file)
+        except OSError:
+            pass
+        return state
+
+    def store(self, log_file: str, com_file: Optional[str], state: Dict[str, Any],
+              identity: Optional[Dict[str, Any]] = None):
+        """
+        save the state of GRRMSingleJob for the files, and evict old entries if size_limit is exceeded.
+        :param identity: identity of the files when they were parsed (see identity). The files now if None.
+        """
+        if identity is None:
+            identity = self.identity(log_file, com_file)
+        data = io.BytesIO()
+        _StatePickler(data, protocol=pickle.HIGHEST_PROTOCOL).dump(state)
+
+        entry_file = self._entry_file(log_file)
+        temp_file = entry_file + '.{:}.tmp'.format(os.getpid())
+        try:
+            with open(temp_file, 'wb') as f:
+                f.write(_MAGIC)
+                pickle.dump(identity, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.write(zlib.compress(data.getvalue(), 1))
+            os.replace(temp_file, entry_file)
+        finally:
+            self._remove(temp_file)
+        self._evict()
+
+    def invalidate(self, log_file: Optional[str] = None):
+        """
+        remove the entry of log_file, or all entries if log_file is None
+        """
+        if log_file is not None:
+            self._remove(self._entry_file(log_file))
+            return
+        for entry_file in self._entry_files():
+            self._remove(entry_file)
+
+    def _entry_files(self) -> List[str]:
+        return [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                if name.endswith(CACHE_FILE_SUFFIX)]
+
+    def _evict(self):
+        """
+        remove least recently used entries until the total size is within size_limit
+        """
+        entries = []
+        for entry_file in self._entry_files():
+            try:
+                stat = os.stat(entry_file)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry_file))
+        entries.sort()
+        total_size = sum(size for (_, size, _) in entries)
+        for (_, size, entry_file) in entries:
+            if total_size <= self.size_limit:
+                break
+            self._remove(entry_file)
+            total_size -= size
+
+    @staticmethod
+    def _remove(file: str):
+        try:
+            os.remove(file)
+        except OSError:
+            pass
@@ -1,116 +1,146 @@
-import copy
 import dataclasses
 from decimal import Decimal
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 
 from grrmsv import utils
-from grrmsv.structure import Structure
+from grrmsv.structure import Structure, FrozenAtoms, FrozenAtomsSource, to_frozen_atoms
+from grrmsv import profiling
+from grrmsv.tokenizer import LogEvent, scan_log_events
 
 
 @dataclasses.dataclass
 class ThermalData:
     header: str
-    temperature : Decimal
-    pressure : Decimal
-    e_el : Decimal
-    zpve : Decimal
-    h_zero: Decimal
-    e_tr: Decimal
-    e_rot: Decimal
-    e_vib: Decimal
-    h_corr : Decimal
-    h : Decimal
-    s_el: Decimal
-    s_tr: Decimal
-    s_rot: Decimal
-    s_vib: Decimal
-    g_corr : Decimal
-    g : Decimal
+    temperature : Union[Decimal, float]
+    pressure : Union[Decimal, float]
+    e_el : Union[Decimal, float]
+    zpve : Union[Decimal, float]
+    h_zero: Union[Decimal, float]
+    e_tr: Union[Decimal, float]
+    e_rot: Union[Decimal, float]
+    e_vib: Union[Decimal, float]
+    h_corr : Union[Decimal, float]
+    h : Union[Decimal, float]
+    s_el: Union[Decimal, float]
+    s_tr: Union[Decimal, float]
+    s_rot: Union[Decimal, float]
+    s_vib: Union[Decimal, float]
+    g_corr : Union[Decimal, float]
+    g : Union[Decimal, float]
 
 
 class FREQJob:
 
-    def __init__(self, freq_block_data: List[str], frozen_atom_coordinates: Optional[List[str]] = None):
+    def __init__(self, freq_block_data: Sequence[str], frozen_atom_coordinates: FrozenAtomsSource = None,
+                 events: Optional[List[LogEvent]] = None, numeric_mode: str = utils.NUMERIC_EXACT):
+        """
+        :param freq_block_data: lines from the FREQ separator
+        :param events: events of freq_block_data (line offsets relative to the block). Scanned here if not given.
+        :param numeric_mode: frequencies and thermal data are Decimal (exact) or float (fast)
+        """
         assert (freq_block_data[0].startswith('FREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQ'))
 
-        self.row_data: List[str] = copy.deepcopy(freq_block_data)
+        self.row_data: Sequence[str] = freq_block_data
         self.num_atom: int = -1
         self.init_structure: Optional[Structure] = None
-        self.freq_list: List[Decimal] = []  # frequency value list
-        self.freq_matrix_list: List[np.ndarray] = []  # List of array(num_atom, 3)
+        self.freq_list: List[Union[Decimal, float]] = []  # frequency values (n_modes)
+        self.freq_array: np.ndarray = np.zeros(0, dtype=np.float64)  # freq_list as float64 array
+        self.normal_modes: np.ndarray = np.zeros((0, 0, 3), dtype=np.float64)  # (n_modes, num_atom, 3)
         self.name: Optional[str] = None
-        self.frozen_atom_coordinates: Optional[List[str]] = frozen_atom_coordinates
+        self.frozen_atom_coordinates: Optional[FrozenAtoms] = to_frozen_atoms(frozen_atom_coordinates)
         self.thermal_data_list: List[ThermalData] = []
+        self.numeric_mode: str = numeric_mode
 
-        self._parse_row_data()
+        if events is None:
+            events = list(scan_log_events(self.row_data))
+        self._parse_row_data(events)
 
-    def _parse_row_data(self):
+    @profiling.profiled('FREQJob', lambda job: {'modes': len(job.freq_list)})
+    def _parse_row_data(self, events: List[LogEvent]):
         # Set initial structure and num_atom
         start_init_structure = -1
         end_init_structure = -1
-        for (i, line) in enumerate(self.row_data):
-            if line.startswith('Geometry (Origin = Center of Mass'):
-                start_init_structure = i
-            elif start_init_structure >= 0 and line.strip() == '':
-                end_init_structure = i
+        for event in events:
+            if event.kind == 'freq_geometry':
+                start_init_structure = event.line
                 break
+        if start_init_structure >= 0:
+            for i in range(start_init_structure + 1, len(self.row_data)):
+                if self.row_data[i].strip() == '':
+                    end_init_structure = i
+                    break
         self.init_structure = Structure(self.row_data[start_init_structure + 1:end_init_structure], name='Initial Structure',
                                         frozen_atom_coordinates=self.frozen_atom_coordinates)
         self.num_atom = self.init_structure.num_atom
 
-        # separate freq result into blocks
-        freq_blocks = []
-        block = []
-        i = end_init_structure + 1
-        first_start_thermochemistry_line = -1
-        while i < len(self.row_data):
-            # separated by a blank line
-            if self.row_data[i].strip() == '':
-                freq_blocks.append(copy.deepcopy(block))
-                block = []
-            # Thermochemistry line indicates the end.
-            elif self.row_data[i].startswith('Thermochemistry'):
-                first_start_thermochemistry_line = i
-                break
-            else:
-                block.append(self.row_data[i])
-            i += 1
-
-        if first_start_thermochemistry_line < 0:
+        # Thermochemistry line indicates the end.
+        thermochemistry_lines = [e.line for e in events if e.kind == 'thermochemistry' and e.line > end_init_structure]
+        if len(thermochemistry_lines) == 0:
             return
 
-        # read each freq sub-blocks
-        for block in freq_blocks:
-            # number of freq data in block (1, 2, 3)
-            column_num = len(block[0].strip().split())
-            assert 1<= column_num <= 3
-
-            # get freq values in
-            # Freq.  :	  1256.54809523	  1272.49620328	  1273.57870656
-            self.freq_list.extend([Decimal(f) for f in block[1].split(':')[1].strip().split()])
-
-            # retain freq matrix (num_atom*3; array) list in this block
-            freq_matrix_list_in_block = []
-            for c in range(column_num):
-                freq_matrix_list_in_block.append(np.zeros(shape=(self.num_atom, 3), dtype='float64'))
-
-            # read 3 lines at once （i:x, i+1:y, i+2:z）
-            for i in range(3, 3 * self.num_atom + 3, 3):
-                # _xs/_ys/_zs contains up to 3 values (str)
-                _xs = block[i].split(':')[1].strip().split()
-                _ys = block[i + 1].split(':')[1].strip().split()
-                _zs = block[i + 2].split(':')[1].strip().split()
+        # freq result blocks (separated by a blank line):
+        #             0   1   2
+        # Freq.  :	  1256.54809523	  1272.49620328	  1273.57870656
+        # I.R.   :    ...
+        # C 1 X :  0.30722642   0.14193726   0.30625784  (3 lines (x, y, z) for each atom)
+        block_ranges = self._get_freq_block_ranges(end_init_structure + 1, thermochemistry_lines[0])
+        column_nums = [len(self.row_data[start].split()) for (start, _) in block_ranges]
+        assert all(1 <= column_num <= 3 for column_num in column_nums)
+
+        freq_texts = []
+        self.normal_modes = np.empty((sum(column_nums), self.num_atom, 3), dtype=np.float64)
+        with profiling.stage('normal modes', lines=sum(end - start for (start, end) in block_ranges),
+                             modes=sum(column_nums)):
+            mode = 0
+            for ((start, end), column_num) in zip(block_ranges, column_nums):
+                freq_texts.extend(self.row_data[start + 1].split(':')[1].split())
+                # all x/y/z lines of the block at once: (num_atom, 3, column_num)
+                rows = self.row_data[start + 3:start + 3 * self.num_atom + 3]
+                assert len(rows) == 3 * self.num_atom
+                values = np.array(' '.join([row[row.index(':') + 1:] for row in rows]).split(), dtype=np.float64)
+                values = values.reshape(self.num_atom, 3, column_num)
+                self.normal_modes[mode:mode + column_num] = values.transpose(2, 0, 1)
+                mode += column_num
+        self.freq_array = np.array(freq_texts, dtype=np.float64)
+        if self.numeric_mode == utils.NUMERIC_EXACT:
+            self.freq_list = [Decimal(text) for text in freq_texts]
+        else:
+            self.freq_list = self.freq_array.tolist()
 
-                for c in range(column_num):
-                    freq_matrix_list_in_block[c][(i // 3) - 1] = (np.array([_xs[c], _ys[c], _zs[c]])).astype(dtype=float)
+        # Read after 'Thermochemistry' line
+        self._parse_thermal_data_part(self.row_data, thermochemistry_lines)
 
-            self.freq_matrix_list.extend(freq_matrix_list_in_block)
 
-        # Read after 'Thermochemistry' line
-        self._parse_thermal_data_part(self.row_data[first_start_thermochemistry_line:])
+    def _get_freq_block_ranges(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """
+        (start, end) line ranges of freq result blocks in row_data[start:end]. Each block ends with a blank line
+        (a block not closed before end is ignored).
+        """
+        block_ranges = []
+        block_length = 3 * self.num_atom + 3  # lines of a block
+        i = start
+        while i < end:
+            # usually the blank line is just after the block
+            j = i + block_length
+            if not (j < end and self.row_data[j].strip() == ''):
+                j = i
+                while j < end and self.row_data[j].strip() != '':
+                    j += 1
+                if j == end:
+                    break
+            if j > i:
+                block_ranges.append((i, j))
+            i = j + 1
+        return block_ranges
 
+    @property
+    def freq_matrix_list(self) -> List[np.ndarray]:
+        """
+        normal modes as a list of (num_atom, 3) arrays (views of normal_modes)
+        """
+        return list(self.normal_modes)
 
     def save_xyz(self, normal_mode: int, file: str, step: int = 20, max_shift: float = 0.5):
         """
@@ -122,98 +152,73 @@ class FREQJob:
         """
 
         # weight: move move_matrix * weight in each step
-        move_matrix = self.freq_matrix_list[normal_mode]
+        move_matrix = self.normal_modes[normal_mode]
         max_vector_size = np.sqrt(np.max(np.sum(move_matrix * move_matrix, axis=1)))
         weight = max_shift / (max_vector_size * step)
 
         init_coordinate = self.init_structure.get_coordinates_np()
         atoms = self.init_structure.get_atoms()
+        num_frozen_atom, frozen_atom_string = self._get_frozen_atom_string()
+        output_num_atom = self.num_atom + num_frozen_atom
 
-        output_num_atom = self.num_atom
-        frozen_atom_string = ''
-        if self.frozen_atom_coordinates is not None:
-            for line in self.frozen_atom_coordinates:
-                if line.strip() == '':
-                    continue
-                else:
-                    atom, x, y, z, *_ = line.strip().split()
-                    x = Decimal(x)
-                    y = Decimal(y)
-                    z = Decimal(z)
-                    atom = atom.capitalize()
-                    frozen_atom_string += '{0:<4} {1:>20.12f} {2:>20.12f} {3:>20.12f}\n'.format(atom, x, y, z)
-                    output_num_atom += 1
+        # all displaced frames at once: (step, num_atom, 3)
+        shifts = (np.arange(1, step + 1) * weight)[:, np.newaxis, np.newaxis] * move_matrix
+        forward_coordinates = init_coordinate + shifts
+        backward_coordinates = init_coordinate - shifts
 
-        with open(file, 'w') as f:
-            forward_coordinates = [init_coordinate + s * weight * move_matrix for s in range(1, step+1)]
-            backward_coordinates = [init_coordinate - s * weight * move_matrix for s in range(1, step+1)]
+        # frame text: header + moving atoms + frozen atoms
+        line_format = ''.join('{:<4}'.format(atom).replace('{', '{{').replace('}', '}}') +
+                              ' {:>20.12f} {:>20.12f} {:>20.12f}\n' for atom in atoms)
 
-            # forward
-            f.write(str(output_num_atom ) + '\n')
-            f.write('Initial Structure\n')
-            f.write(self._structure_string_from_atoms_and_coordinate_array(atoms, init_coordinate) + frozen_atom_string)
-            for coordinate in forward_coordinates:
-                f.write(str(output_num_atom ) + '\n')
-                f.write('\n')
-                f.write(self._structure_string_from_atoms_and_coordinate_array(atoms, coordinate) + frozen_atom_string)
-            for coordinate in reversed(forward_coordinates):
-                f.write(str(output_num_atom ) + '\n')
-                f.write('\n')
-                f.write(self._structure_string_from_atoms_and_coordinate_array(atoms, coordinate) + frozen_atom_string)
+        def frame_string(coordinate: np.ndarray, title: str = '') -> str:
+            return (str(output_num_atom) + '\n' + title + '\n' + line_format.format(*coordinate.ravel().tolist())
+                    + frozen_atom_string)
 
+        init_string = frame_string(init_coordinate, 'Initial Structure')
+        forward_strings = [frame_string(coordinate) for coordinate in forward_coordinates]
+        backward_strings = [frame_string(coordinate) for coordinate in backward_coordinates]
+
+        with open(file, 'w') as f:
+            # forward
+            f.write(init_string)
+            f.writelines(forward_strings)
+            f.writelines(reversed(forward_strings))
             # backward
-            f.write(str(output_num_atom ) + '\n')
-            f.write('Initial Structure\n')
-            f.write(self._structure_string_from_atoms_and_coordinate_array(atoms, init_coordinate) + frozen_atom_string)
-            for coordinate in backward_coordinates:
-                f.write(str(output_num_atom ) + '\n')
-                f.write('\n')
-                f.write(self._structure_string_from_atoms_and_coordinate_array(atoms, coordinate) + frozen_atom_string)
-            for coordinate in reversed(backward_coordinates):
-                f.write(str(output_num_atom ) + '\n')
-                f.write('\n')
-                f.write(self._structure_string_from_atoms_and_coordinate_array(atoms, coordinate) + frozen_atom_string)
-
-            f.write(str(output_num_atom ) + '\n')
-            f.write('Initial Structure\n')
-            f.write(self._structure_string_from_atoms_and_coordinate_array(atoms, init_coordinate) + frozen_atom_string)
-
-    @staticmethod
-    def _structure_string_from_atoms_and_coordinate_array(atoms: List[str], coordinate_array: np.ndarray):
-        structure_string = ''
-        assert len(atoms) == coordinate_array.shape[0]
-        for i in range(len(atoms)):
-            structure_string += '{0:<4} {1:>20.12f} {2:>20.12f} {3:>20.12f}\n'.format(
-                atoms[i], coordinate_array[i,0], coordinate_array[i,1], coordinate_array[i,2])
-        return structure_string
-
-    def _parse_thermal_data_part(self, data: List[str]):
-
-        def _check_and_read_value(_line: str, _start: str) -> Decimal:
-            assert _line.strip().startswith(_start)
-            return Decimal(_line.strip().split('=', maxsplit=1)[1].split('(')[0].strip())
+            f.write(init_string)
+            f.writelines(backward_strings)
+            f.writelines(reversed(backward_strings))
+            f.write(init_string)
+
+    def _get_frozen_atom_string(self) -> Tuple[int, str]:
+        """
+        number of frozen atoms and their xyz lines (the text formatted once in FrozenAtoms)
+        """
+        if self.frozen_atom_coordinates is None or self.frozen_atom_coordinates.num_atom == 0:
+            return 0, ''
+        return self.frozen_atom_coordinates.num_atom, self.frozen_atom_coordinates.get_text()
+
+    def _parse_thermal_data_part(self, data: Sequence[str], start_line_indices: List[int]):
 
-        start_line_indices = []
-        for i, line in enumerate(data):
-            if line.startswith('Thermochemistry'):
-                start_line_indices.append(i)
+        def _check_and_read_value(_line: str, _start: str) -> Union[Decimal, float]:
+            assert _line.strip().startswith(_start)
+            return utils.to_number(_line.strip().split('=', maxsplit=1)[1].split('(')[0].strip(), self.numeric_mode)
 
         for start_line in start_line_indices:
             # Header line including temp and press.
             header = utils.remove_extra_blanks(data[start_line]).strip()
             terms = header.split()
-            temperature = Decimal(-1)
-            pressure = Decimal(-1)
+            temperature = utils.to_number('-1', self.numeric_mode)
+            pressure = utils.to_number('-1', self.numeric_mode)
             for i in range(len(terms)-1):
                 try:
-                    v = Decimal(terms[i])
+                    Decimal(terms[i])
                 except:
                     continue
                 else:
                     if terms[i+1].startswith('K'):
-                        temperature = v
+                        temperature = utils.to_number(terms[i], self.numeric_mode)
                     elif terms[i+1].startswith('Atm'):
-                        pressure = v
+                        pressure = utils.to_number(terms[i], self.numeric_mode)
 
             e_el = _check_and_read_value(data[start_line+1], 'E(el)')
             zpve = _check_and_read_value(data[start_line+2], 'ZPVE')
@@ -1,4 +1,8 @@
-from typing import Optional, Union, List
+import io
+import os
+from concurrent.futures import Executor, Future
+from decimal import InvalidOperation
+from typing import Optional, Union, List, Iterator, Callable
 
 from grrmsv.opt import OPTJob
 from grrmsv.freq import FREQJob
@@ -6,17 +10,89 @@ from grrmsv.irc import IRCJob
 from grrmsv.lup import LUPJob
 from grrmsv.afirpath import AFIRPath
 
-from grrmsv.utils import get_line_type
+from grrmsv.cache import ParseCache
+from grrmsv.lazyjob import LazyJob, make_job, resolve_job
+from grrmsv.logbuffer import LogBuffer, MappedLines
+from grrmsv.parallel import submit_block
+from grrmsv import profiling
+from grrmsv.profiling import ParseProfiler
+from grrmsv.structure import FrozenAtoms
+from grrmsv.tokenizer import LogEvent, JobBlock, BlockGrouper, locate_events, locate_event_offsets, slice_events
+from grrmsv.utils import check_numeric_mode, split_compression_extension, open_decompressed
+
+import config
+
+
+# errors raised by job parsers for a block that is being written (running job)
+PARTIAL_DATA_ERRORS = (AssertionError, ValueError, IndexError, InvalidOperation)
+
+# the log file is read (and progress is reported) in chunks of this number of characters
+READ_CHUNK_SIZE = 2 * 1024 * 1024
+
+
+class LoadCancelled(Exception):
+    """
+    raised when loading is cancelled by the progress callback
+    """
+    pass
 
 
 class GRRMSingleJob:
-    def __init__(self, log_file: str, com_file: Optional[str] = None):
+    # attributes stored in ParseCache: parsed data only. The options of the constructor and the file paths
+    # of a job loaded from the cache are those given to the constructor.
+    CACHED_ATTRIBUTES = ('jobs', 'numeric_mode', 'compression', 'log_buffer', 'normal_termination', 'afirpath',
+                         '_num_complete_lines', 'com_data', 'link_options', 'method', 'method_options', 'charge',
+                         'multi', 'frozen_atom_coordinates')
+
+    def __init__(self, log_file: str, com_file: Optional[str] = None, keep_log_data: bool = True,
+                 cache: Optional[ParseCache] = None, lazy: bool = False,
+                 progress: Optional[Callable[[int, int, list], bool]] = None, workers: int = 0,
+                 numeric_mode: Optional[str] = None, profiler: Optional[ParseProfiler] = None,
+                 memory_map: Optional[bool] = None):
+        """
+        :param log_file: GRRM log file (or compressed log: xxx.log.gz, .xz or .bz2, read as a stream)
+        :param com_file: GRRM com file (optional)
+        :param keep_log_data: if False, the raw text of the log is dropped after parsing to save memory.
+        :param cache: parsed data are loaded from / stored in this cache (optional).
+                      Jobs loaded from the cache do not have the raw text (as keep_log_data=False).
+                      In lazy mode (with keep_log_data), the job is stored by store_cache, not in the constructor.
+        :param lazy: only block boundaries, types and names are read first. Each job (and subjob) is parsed
+                     on the first access (LazyJob). The job being written in a running log is parsed at once.
+        :param progress: called while loading with (bytes read, file size, jobs parsed so far), e.g. from a worker
+                         thread of GUI. If it returns False, loading is stopped and LoadCancelled is raised.
+        :param workers: number of worker processes to parse job blocks in parallel (0: parse in this process).
+                        Not used in lazy mode.
+        :param numeric_mode: 'exact' (values are Decimal of the original text) or 'fast' (float).
+                             config.NUMERIC_MODE if None.
+        :param profiler: wall time, line counts and object counts of each parse stage are recorded in this profiler
+                         (also in refresh). Jobs parsed in worker processes or later (lazy) are not recorded.
+        :param memory_map: read the log through mmap (MappedLines): lines are decoded only when a parser reads them,
+                           and the text of the log is not kept in memory. If None, logs of config.MEMORY_MAP_MIN_SIZE
+                           bytes or larger are mapped. Compressed logs are not mapped.
+        """
         # read from log
-        self.jobs: List[Union[OPTJob, FREQJob, IRCJob, LUPJob]] = []
+        self.jobs: List[Union[OPTJob, FREQJob, IRCJob, LUPJob, LazyJob]] = []
+        self.lazy: bool = lazy
+        self.workers: int = workers
+        self.numeric_mode: str = check_numeric_mode(numeric_mode if numeric_mode is not None else config.NUMERIC_MODE)
+        self.memory_map: Optional[bool] = memory_map
         self.log_file: Optional[str] = None
-        self.log_data: List[str] = []
+        self.compression: Optional[str] = None  # compression extension of the log file ('.gz' etc.)
+        self.log_data: Union[List[str], MappedLines] = []
+        self.log_buffer: Optional[LogBuffer] = None
         self.normal_termination: bool = False
         self.afirpath: Optional[AFIRPath] = None
+        # state for refresh (following a running job)
+        self._events: List[LogEvent] = []
+        self._grouper: BlockGrouper = BlockGrouper()
+        self._num_complete_lines: int = 0  # lines with line feed. The last line may be half-written.
+        self._read_offset: int = 0  # byte offset after the complete lines (in the decompressed data)
+        self._read_size: int = 0  # file size at the last read (compressed size for a compressed log)
+        self._open_block: Optional[JobBlock] = None  # block of the last job, not finished yet
+        self._afir_profile_line: int = -1
+        self._progress: Optional[Callable[[int, int, list], bool]] = None
+        self._progress_total: int = 0  # file size
+        self._progress_bytes: int = 0  # bytes read at the last report
         # read from com
         self.com_file: Optional[str] = None
         self.com_data: List[str] = []
@@ -25,73 +101,372 @@ class GRRMSingleJob:
         self.method_options: Optional[List[str]] = None
         self.charge: Optional[int] = None
         self.multi: Optional[int] = None
-        self.frozen_atom_coordinates: Optional[List[str]] = None
+        self.frozen_atom_coordinates: Optional[FrozenAtoms] = None  # parsed once, shared by all structures
+        self.from_cache: bool = False
+        self._pending_cache: Optional[tuple] = None  # (cache, identity of the files) for store_cache
+        self.profiler: Optional[ParseProfiler] = profiler
+
+        with profiling.activate(profiler), profiling.stage('GRRMSingleJob', label=log_file) as record:
+            self._load(log_file, com_file, keep_log_data, cache, progress)
+            record.lines = self._num_complete_lines
+            record.count(jobs=len(self.jobs))
+
+    def _load(self, log_file: str, com_file: Optional[str], keep_log_data: bool, cache: Optional[ParseCache],
+              progress: Optional[Callable[[int, int, list], bool]]):
+        if cache is not None:
+            with profiling.stage('cache load'):
+                state = cache.load(log_file, com_file)
+            if state is not None and state.get('numeric_mode') == self.numeric_mode:
+                for name in self.CACHED_ATTRIBUTES:
+                    setattr(self, name, state[name])
+                self.log_file = log_file
+                self.com_file = com_file
+                self.from_cache = True
+                return
+            # the files may grow while they are parsed (running job)
+            identity = cache.identity(log_file, com_file)
 
         if com_file is not None:
-            self._parse_com_file(com_file)
+            with profiling.stage('com file'):
+                self._parse_com_file(com_file)
+
+        self._progress = progress
+        try:
+            self._parse_log_file(log_file)
+        finally:
+            self._progress = None
 
-        self._parse_log_file(log_file)
+        if cache is not None:
+            self._pending_cache = (cache, identity)
+            if not (self.lazy and keep_log_data):
+                self.store_cache()
+
+        if not keep_log_data:
+            self.release_log_data()
+
+    @property
+    def cache_pending(self) -> bool:
+        """
+        True if the job is to be stored in the cache by store_cache (lazy mode)
+        """
+        return self._pending_cache is not None
+
+    def store_cache(self):
+        """
+        parse all jobs deferred in lazy mode and store the job in the cache given to the constructor
+        (nothing is done if it is already stored). This can be called from a background thread after the jobs are
+        shown, so that loading in lazy mode does not parse all jobs.
+        """
+        if self._pending_cache is None:
+            return
+        cache, identity = self._pending_cache
+        self._pending_cache = None
+        self.parse_all_jobs()
+        with profiling.stage('cache store'):
+            cache.store(self.log_file, self.com_file, self._get_cache_state(), identity)
+
+    def _get_cache_state(self) -> dict:
+        """
+        attributes to be stored in ParseCache (CACHED_ATTRIBUTES). The raw text of the log is not included.
+        """
+        return {name: getattr(self, name) for name in self.CACHED_ATTRIBUTES}
+
+    def parse_all_jobs(self):
+        """
+        parse all jobs and subjobs deferred in lazy mode
+        """
+        with profiling.stage('deferred jobs'):
+            for job in self.jobs:
+                self._parse_deferred_jobs(job)
+
+    @classmethod
+    def _parse_deferred_jobs(cls, job):
+        job = resolve_job(job)
+        if job.type == 'irc':
+            resolve_job(job.init_freq_job)
+            for path in job.paths:
+                resolve_job(path.opt_job)
+                resolve_job(path.freq_job)
+        if job.type == 'lup':
+            for subjob in job.subjobs:
+                cls._parse_deferred_jobs(subjob)
+
+    def release_log_data(self):
+        """
+        drop the raw text of the log. Parsed data are kept, but row_data of each job can no longer be read.
+        Jobs deferred in lazy mode are parsed before.
+        """
+        if self.log_buffer is not None and not self.log_buffer.released:
+            self.parse_all_jobs()
+        if self.log_buffer is not None:
+            self.log_buffer.release()
+        self.log_data = []
 
     def _parse_log_file(self, log_file: str):
 
         self.log_file = log_file
-        with open(self.log_file, 'r') as f:
-            self.log_data = f.readlines()
-
-        current_type = ''  # opt/freq/irc/lup
-        current_block_buffer = []
-        current_name = None
-        for (i, line) in enumerate(self.log_data):
-            if line.startswith('Normal termination of the GRRM Program'):
-                self.normal_termination = True
-            # For GRRM23 LUP job (followed by OPT job for appEQs)
-            if line.strip().startswith('>>Start') or line.strip().startswith('>>>Start') and current_type == '':
-                if 'AppEQ' in line.split()[-1]:
-                    current_name = line.split()[-1].strip()
-                else:
-                    current_name = None
-            line_type = get_line_type(line)
-            if line_type == 'data':
-                if current_type != '':
-                    current_block_buffer.append(line)
-                continue
-            if current_type == '':
-                current_type = line_type
-                current_block_buffer = [line]
-                continue
-            if current_type == line_type:
-                current_block_buffer.append(line)
-                self._parse_job_block(current_block_buffer, name=current_name)
-                current_name = None
-                current_block_buffer = []
-                current_type = ''
-                continue
+        self.compression = split_compression_extension(log_file)[1]
+        self._progress_total = os.path.getsize(log_file)
+        if self.compression is not None:
+            self.memory_map = False
+        elif self.memory_map is None:
+            self.memory_map = config.MEMORY_MAP_MIN_SIZE is not None and \
+                              self._progress_total >= config.MEMORY_MAP_MIN_SIZE
+        self.log_data = MappedLines(log_file) if self.memory_map else []
+        self.log_buffer = LogBuffer(self.log_data)
+
+        executor = None
+        if self.workers > 0 and not self.lazy:
+            from concurrent.futures import ProcessPoolExecutor  # multiprocessing is imported only for workers
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            # jobs are parsed while reading, as soon as their blocks are closed.
+            # The self time of this stage is reading the file and splitting it into blocks.
+            with profiling.stage('log file') as record:
+                futures = []
+                for block in self._grouper.feed(self._read_log_data()):
+                    if executor is None:
+                        self._parse_job_block(block, self._events, lazy=self.lazy)
+                    else:
+                        futures.append(self._submit_job_block(block, self._events, executor))
+                    self._report_progress()
+                record.lines = len(self.log_data)
+                record.count(events=len(self._events), blocks=len(self.jobs) + len(futures))
+            if executor is not None:
+                with profiling.stage('workers', jobs=len(futures)):
+                    self.jobs.extend(future.result() for future in futures)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        self._open_block = self._parse_open_block(self._grouper.open_block(self._num_complete_lines))
+
+        with profiling.stage('log end'):
+            self._parse_log_end(self._events)
+
+    def refresh(self) -> bool:
+        """
+        read lines appended to the log file after the last read (to follow a running job).
+        Only the new part is parsed: the last unfinished job is extended in place and new jobs are added.
+        :return: True if new data was found
+        """
+        if self.log_buffer is None or self.log_buffer.released:
+            raise RuntimeError('Log data has been released.')
+
+        with profiling.activate(self.profiler), profiling.stage('refresh', label=self.log_file):
+            return self._refresh()
+
+    def _refresh(self) -> bool:
+        with open(self.log_file, 'rb') as f:
+            size = f.seek(0, io.SEEK_END)
+        if size == self._read_size:
+            return False
+        if self.compression is not None:
+            raise RuntimeError('Compressed log file has been changed. Reload the file.')
+        if size < self._read_offset:
+            raise RuntimeError('Log file has been truncated. Reload the file.')
+
+        # the half-written last line is read again
+        start = self._num_complete_lines
+        del self.log_data[start:]
+        while len(self._events) > 0 and self._events[-1].line >= start:
+            self._events.pop()
+        num_events = len(self._events)
+
+        # extend the unfinished job or add new jobs
+        for block in self._grouper.feed(self._read_log_data()):
+            if self._open_block is not None and block.start == self._open_block.start:
+                self._extend_last_job(block)
             else:
-                current_block_buffer.append(line)
-                continue
+                self._parse_job_block(block, self._events, lazy=self.lazy)
+            self._open_block = None
+        open_block = self._grouper.open_block(self._num_complete_lines)
+        if open_block is not None and self._open_block is not None and open_block.start == self._open_block.start:
+            try:
+                self._extend_last_job(open_block)
+            except PARTIAL_DATA_ERRORS:
+                # a part of the job is being written: read again at the next refresh
+                pass
+        else:
+            self._open_block = self._parse_open_block(open_block)
 
-        if len(current_block_buffer) > 0 and current_type != '':
-            self._parse_job_block(current_block_buffer, name=current_name)
+        self._parse_log_end(self._events[num_events:])
+        return True
 
-        # check AFIR Path block
-        for (i, line) in enumerate(self.log_data):
-            if line.startswith('---Profile of AFIR path'):
-                self.afirpath = AFIRPath(self.log_data[i:])
+    def _parse_open_block(self, block: Optional[JobBlock]) -> Optional[JobBlock]:
+        """
+        parse the block of the running (unfinished) job
+        :return: the block, or None if the job could not be read yet (parsed again when the block grows)
+        """
+        if block is None:
+            return None
+        try:
+            self._parse_job_block(block, self._events)
+        except PARTIAL_DATA_ERRORS:
+            # the first part of the job is not written yet
+            return None
+        return block
+
+    def _read_log_data(self) -> Iterator[LogEvent]:
+        """
+        read the log file from self._read_offset and append lines to self.log_data and events to self._events.
+        The file is read in chunks, and the events of each chunk are located by one regular expression search
+        (see locate_events). Events of complete lines (except for the half-written last line) are yielded while reading.
+        """
+        if isinstance(self.log_data, MappedLines):
+            yield from self._map_log_data()
+            return
+        start = len(self.log_data)
+        with open(self.log_file, 'rb') as raw:
+            f = open_decompressed(raw, self.compression)
+            f.seek(self._read_offset)
+            text = io.TextIOWrapper(f)  # same decoding as open(log_file, 'r')
+            log_data = self.log_data
+            events = self._events
+            tail = ''  # incomplete last line of the chunk
+            while True:
+                chunk = text.read(READ_CHUNK_SIZE)
+                if chunk == '':
+                    break
+                chunk = tail + chunk
+                lines = io.StringIO(chunk).readlines()
+                tail = lines.pop() if not lines[-1].endswith('\n') else ''
+                first_line = len(log_data)
+                log_data.extend(lines)
+                for event in locate_events(chunk, first_line, len(chunk) - len(tail)):
+                    events.append(event)
+                    yield event
+                self._report_progress(raw.tell())  # compressed bytes for a compressed log (as the file size)
+            if tail:
+                # the half-written last line (its event is not yielded)
+                events.extend(locate_events(tail, len(log_data)))
+                log_data.append(tail)
+            self._read_size = raw.tell()
+            tail = ''
+            if len(self.log_data) > start and not self.log_data[-1].endswith('\n'):
+                tail = self.log_data[-1]
+            self._num_complete_lines = len(self.log_data) - (1 if tail else 0)
+            self._read_offset = f.tell() - len(tail.encode(text.encoding))
+            text.detach()
+            if f is not raw:
+                f.close()
+
+    def _map_log_data(self) -> Iterator[LogEvent]:
+        """
+        _read_log_data for a mapped log: lines from self._read_offset are indexed (not decoded) in chunks, and events
+        are located in the mapped bytes. Only the event lines are decoded here.
+        """
+        log_data: MappedLines = self.log_data
+        events = self._events
+        size = log_data.remap()
+        position = log_data.end_offset
+        while position < size:
+            end = log_data.next_line_end(position + READ_CHUNK_SIZE)
+            log_data.index(position, end)
+            for (kind, start, line_end) in locate_event_offsets(log_data.buffer, position, end):
+                event = LogEvent(kind, log_data.line_at(start), log_data.decode(start, min(line_end + 1, end)))
+                events.append(event)
+                if event.text.endswith('\n'):
+                    yield event
+            position = end
+            self._report_progress(position)
+        self._read_size = size
+        incomplete = log_data.end_offset > 0 and log_data.buffer[log_data.end_offset - 1] != ord('\n')
+        self._num_complete_lines = len(log_data) - (1 if incomplete else 0)
+        self._read_offset = log_data.offset(self._num_complete_lines)
+
+    def _report_progress(self, bytes_read: Optional[int] = None):
+        """
+        call the progress callback (while loading)
+        :param bytes_read: bytes read so far (the last value if None)
+        """
+        if self._progress is None:
+            return
+        if bytes_read is not None:
+            self._progress_bytes = bytes_read
+        if not self._progress(self._progress_bytes, self._progress_total, self.jobs):
+            raise LoadCancelled('Loading ' + self.log_file + ' was cancelled.')
+
+    def _parse_log_end(self, events: List[LogEvent]):
+        """
+        read normal termination and AFIR path (at the end of log) from events (all or new ones)
+        """
+        for event in events:
+            if event.kind == 'termination':
+                self.normal_termination = True
                 break
 
-    def _parse_job_block(self, block, name: Optional[str] = None):
-
-        if block[0].startswith('OPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPT'):
-            job = OPTJob(block, frozen_atom_coordinates=self.frozen_atom_coordinates)
-        if block[0].startswith('IRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRC'):
-            job = IRCJob(block, frozen_atom_coordinates=self.frozen_atom_coordinates)
-        if block[0].startswith('FREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQ'):
-            job = FREQJob(block, frozen_atom_coordinates=self.frozen_atom_coordinates)
-        if block[0].startswith('LUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUP'):
-            job = LUPJob(block, frozen_atom_coordinates=self.frozen_atom_coordinates)
-        job.name = name
+        # check AFIR Path block
+        if self._afir_profile_line == -1:
+            for event in events:
+                if event.kind == 'afir_profile':
+                    self._afir_profile_line = event.line
+                    break
+        i = self._afir_profile_line
+        if i >= 0 and (self.afirpath is None or i + len(self.afirpath.row_data) < len(self.log_data)):
+            try:
+                self.afirpath = AFIRPath(self.log_buffer.view(i),
+                                         events=slice_events(self._events, i, len(self.log_data)),
+                                         numeric_mode=self.numeric_mode)
+            except PARTIAL_DATA_ERRORS:
+                if self.normal_termination:
+                    raise
+                # the AFIR path block is being written: read again at the next refresh
+
+    def _extend_last_job(self, block: JobBlock):
+        """
+        extend the last job (made from an unfinished block) with the current data
+        """
+        block_data = self.log_buffer.view(block.start, block.end)
+        block_events = slice_events(self._events, block.start, block.end)
+        job = self.jobs[-1]
+        if block.type == 'freq':
+            job = FREQJob(block_data, frozen_atom_coordinates=self.frozen_atom_coordinates, events=block_events,
+                          numeric_mode=self.numeric_mode)
+            job.name = block.name
+            self.jobs[-1] = job
+        else:
+            job.extend(block_data, events=block_events)
+
+    def _parse_job_block(self, block: JobBlock, events: List[LogEvent], lazy: bool = False):
+        """
+        :param lazy: create LazyJob (the job and its subjobs are parsed on the first access)
+        """
+        block_data = self.log_buffer.view(block.start, block.end)
+        block_events = slice_events(events, block.start, block.end)
+        with profiling.stage(block.type + ' block', label=block.name, lines=block.end - block.start):
+            if block.type == 'opt':
+                job = make_job(OPTJob, block.type, block_data, block_events, self.frozen_atom_coordinates, block.name,
+                               lazy=lazy, numeric_mode=self.numeric_mode)
+            if block.type == 'irc':
+                job = make_job(IRCJob, block.type, block_data, block_events, self.frozen_atom_coordinates, block.name,
+                               lazy=lazy, lazy_subjobs=lazy, numeric_mode=self.numeric_mode)
+            if block.type == 'freq':
+                job = make_job(FREQJob, block.type, block_data, block_events, self.frozen_atom_coordinates,
+                               block.name, lazy=lazy, numeric_mode=self.numeric_mode)
+            if block.type == 'lup':
+                job = make_job(LUPJob, block.type, block_data, block_events, self.frozen_atom_coordinates, block.name,
+                               lazy=lazy, lazy_subjobs=lazy, numeric_mode=self.numeric_mode)
         self.jobs.append(job)
 
+    def _submit_job_block(self, block: JobBlock, events: List[LogEvent], executor: Executor) -> Future:
+        """
+        parse a job block in a worker process. LUP blocks are parsed here and their ITR. @ blocks and subjobs are
+        sent to the workers.
+        """
+        block_data = self.log_buffer.view(block.start, block.end)
+        block_events = slice_events(events, block.start, block.end)
+        if block.type == 'lup':
+            with profiling.stage('lup block', label=block.name, lines=block.end - block.start):
+                job = LUPJob(block_data, frozen_atom_coordinates=self.frozen_atom_coordinates, events=block_events,
+                             executor=executor, numeric_mode=self.numeric_mode)
+            job.name = block.name
+            future = Future()
+            future.set_result(job)
+            return future
+        job_class = {'opt': OPTJob, 'irc': IRCJob, 'freq': FREQJob}[block.type]
+        return submit_block(executor, job_class, block_data, block_events, name=block.name,
+                            frozen_atom_coordinates=self.frozen_atom_coordinates, numeric_mode=self.numeric_mode)
+
     def _parse_com_file(self, com_file: str):
         self.com_file = com_file
         with open(com_file, 'r') as f:
@@ -128,12 +503,13 @@ class GRRMSingleJob:
             if line.lstrip().lower().startswith('frozen atoms'):
                 frozen_atoms = i + 1
         if frozen_atoms >= 0:
-            self.frozen_atom_coordinates = []
+            frozen_atom_lines = []
             for line in self.com_data[frozen_atoms:]:
                 if line.strip() == '' or line.strip().lower().startswith('options'):
                     break
                 else:
-                    self.frozen_atom_coordinates.append(line)
+                    frozen_atom_lines.append(line)
+            self.frozen_atom_coordinates = FrozenAtoms(frozen_atom_lines)
 
     @property
     def type(self):
@@ -1,38 +1,52 @@
-import copy
 import dataclasses
 from decimal import Decimal
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple, Union
 
-import matplotlib.pyplot as plt
-
-from grrmsv.structure import Structure
+from grrmsv.structure import Structure, FrozenAtoms, FrozenAtomsSource, to_frozen_atoms
+from grrmsv.trajectory import Trajectory
 from grrmsv.opt import OPTJob
 from grrmsv.freq import FREQJob
-from grrmsv.utils import extract_sub_block, calc_limit_for_plot
+from grrmsv.lazyjob import make_job
+from grrmsv.plotting import plot_series, pyplot, pyplot_figure_exists, to_float_array
+from grrmsv.profiling import profiled
+from grrmsv.tokenizer import LogEvent, scan_log_events, slice_events, find_sub_block
+from grrmsv.utils import to_number, NUMERIC_EXACT
 
 import config
 
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
 
 @dataclasses.dataclass()
 class Point:
-    length : Decimal
-    energy : Decimal
+    length : Union[Decimal, float]
+    energy : Union[Decimal, float]
 
 
 class IRCPath:
-    def __init__(self, path_block: List[str], num_atom: int, frozen_atom_coordinates: Optional[List[str]] = None):
+    def __init__(self, path_block: Sequence[str], num_atom: int, frozen_atom_coordinates: FrozenAtomsSource = None,
+                 events: Optional[List[LogEvent]] = None, lazy_subjobs: bool = False,
+                 numeric_mode: str = NUMERIC_EXACT):
         """
         :param path_block: data black with first line =  IRC FOLLOWING (FORWARD) STARTING FROM or etc.
+        :param events: events of path_block (line offsets relative to the block). Scanned here if not given.
+        :param lazy_subjobs: OPT/FREQ jobs are parsed on the first access (LazyJob)
+        :param numeric_mode: values are Decimal (exact) or float (fast)
         """
-        self.structure_list: List[Structure] = []
-        self.energy_list: List[Decimal] = []
-        self.spin2_list: List[Decimal] = []
+        frozen_atom_coordinates = to_frozen_atoms(frozen_atom_coordinates)
+        self.trajectory: Trajectory = Trajectory.from_lines([], [], frozen_atom_coordinates)  # structures of steps
+        self.energy_list: List[Union[Decimal, float]] = []
+        self.spin2_list: List[Union[Decimal, float]] = []
         self.opt_job: Optional[OPTJob] = None
         self.freq_job: Optional[FREQJob] = None
         self.mode: Optional[str] = None  # irc or softest or nsp (from non-stationary point)
         self.direction: Optional[str] = None # forward or backward
         self.num_atom: int = num_atom
-        self.frozen_atom_coordinates: Optional[List[str]] = frozen_atom_coordinates
+        self.frozen_atom_coordinates: Optional[FrozenAtoms] = frozen_atom_coordinates
+        self._parsed_lines: int = 0  # lines before this offset have been read (for extend)
+        self.lazy_subjobs: bool = lazy_subjobs
+        self.numeric_mode: str = numeric_mode
 
         if path_block is None or len(path_block) == 0:
             raise ValueError('IRC Path block is in valid.')
@@ -54,24 +68,61 @@ class IRCPath:
             self.mode = 'nsp'
             self.direction = 'forward'
 
+        if events is None:
+            events = list(scan_log_events(path_block))
+        self._parse_path_block(path_block, events)
+
+    def extend(self, path_block: Sequence[str], events: Optional[List[LogEvent]] = None):
+        """
+        read lines appended to the path block of a running job. Only new steps are parsed.
+        """
+        if events is None:
+            events = list(scan_log_events(path_block))
+        self._parse_path_block(path_block, events)
+
+    @profiled('IRCPath', lambda path: {'structures': len(path.trajectory)})
+    def _parse_path_block(self, path_block: Sequence[str], events: List[LogEvent]):
         # Read path structures, energy, spin2
-        for (i, line) in enumerate(path_block):
-            if line.startswith('# STEP'):
-                self.structure_list.append(Structure(path_block[i + 1:i + 1 + self.num_atom], name=line.strip(),
-                                                     frozen_atom_coordinates=self.frozen_atom_coordinates))
+        frame_lines = []
+        frame_names = []
+        for event in events:
+            if event.kind == 'step' and event.line >= self._parsed_lines:
+                i = event.line
+                if i + 2 + self.num_atom >= len(path_block):
+                    break  # not written yet (running job)
+                frame_lines.append(path_block[i + 1:i + 1 + self.num_atom])
+                frame_names.append(event.text.strip())
                 assert 'ENERGY' in path_block[i + 1 + self.num_atom].upper()
-                self.energy_list.append(Decimal(path_block[i + 1 + self.num_atom].split('=')[1].strip().split()[0]))
+                self.energy_list.append(to_number(path_block[i + 1 + self.num_atom].split('=')[1].strip().split()[0],
+                                                  self.numeric_mode))
                 assert 'SPIN' in path_block[i + 2 + self.num_atom].upper()
-                self.spin2_list.append(Decimal(path_block[i + 2 + self.num_atom].split('=')[1].strip().split()[0]))
+                self.spin2_list.append(to_number(path_block[i + 2 + self.num_atom].split('=')[1].strip().split()[0],
+                                                 self.numeric_mode))
+                self._parsed_lines = i + 1
+
+        self.trajectory.extend(frame_lines, frame_names)
 
         # Read opt and freq job if found.
-        opt_block = extract_sub_block(path_block, 'opt')
-        if opt_block is not None:
-            self.opt_job = OPTJob(opt_block, frozen_atom_coordinates=self.frozen_atom_coordinates)
+        opt_range = find_sub_block(events, 'opt', len(path_block))
+        if opt_range is not None:
+            start, end = opt_range
+            if self.opt_job is None:
+                self.opt_job = make_job(OPTJob, 'opt', path_block[start:end], slice_events(events, start, end),
+                                        self.frozen_atom_coordinates, lazy=self.lazy_subjobs,
+                                        numeric_mode=self.numeric_mode)
+            else:
+                self.opt_job.extend(path_block[start:end], events=slice_events(events, start, end))
+
+        freq_range = find_sub_block(events, 'freq', len(path_block))
+        if freq_range is not None and self.freq_job is None:
+            start, end = freq_range
+            self.freq_job = make_job(FREQJob, 'freq', path_block[start:end], slice_events(events, start, end),
+                                     self.frozen_atom_coordinates, lazy=self.lazy_subjobs,
+                                     numeric_mode=self.numeric_mode)
 
-        freq_block = extract_sub_block(path_block, 'freq')
-        if freq_block is not None:
-            self.freq_job = FREQJob(freq_block, frozen_atom_coordinates=self.frozen_atom_coordinates)
+    @property
+    def structure_list(self) -> Trajectory:
+        return self.trajectory
 
     def save_xyz(self, file: str):
         with open(file, 'w') as f:
@@ -91,55 +142,115 @@ class IRCPath:
             xyz += s.get_string(include_frozen_atoms=True)
         return xyz
 
+    def draw_plot(self, figure: 'Figure', step: Optional[int] = None):
+        """
+        draw the energy of each step on figure (cleared first)
+        :param step: the step (# STEP., from 1) to be marked (optional)
+        """
+        figure.clear()
+        axes = figure.add_subplot()
+        axes.set_title('IRC ({:})'.format(self.direction))
+        axes.set_xlabel('# STEP.')
+        axes.set_ylabel('Energy (au)')
+        plot_series(axes, range(1, len(self.energy_list) + 1), self.energy_list, scatter=True,
+                    highlight=step - 1 if step is not None else None)
+        figure.tight_layout()
+
     def show_plot(self):
-        xs = range(1, len(self.energy_list)+1)
-        ys = self.energy_list
-
-        title = 'IRC ({:})'.format(self.direction)
-        plt.figure(title, figsize=config.IRC_PROFILE_PLOT_SIZE)
-        plt.title(title)
-        plt.ylim(*calc_limit_for_plot(ys))
-        plt.xlabel('# STEP.')
-        plt.ylabel('Energy (au)')
-        plt.scatter(xs, ys)
-
-        plt.tight_layout()
+        plt = pyplot()
+        figure = plt.figure('IRC ({:})'.format(self.direction), figsize=config.IRC_PROFILE_PLOT_SIZE)
+        self.draw_plot(figure)
         plt.show()
 
+    def refresh_plot(self) -> bool:
+        """
+        redraw the plot window with the current data if it is open (e.g. after refresh of a running job)
+        :return: True if redrawn
+        """
+        if not pyplot_figure_exists('IRC ({:})'.format(self.direction)):
+            return False
+        self.show_plot()
+        return True
+
 
 class IRCJob:
 
-    def __init__(self, irc_block_data: List[str], frozen_atom_coordinates: Optional[List[str]] = None):
+    def __init__(self, irc_block_data: Sequence[str], frozen_atom_coordinates: FrozenAtomsSource = None,
+                 events: Optional[List[LogEvent]] = None, lazy_subjobs: bool = False,
+                 numeric_mode: str = NUMERIC_EXACT):
+        """
+        :param irc_block_data: lines from the IRC separator
+        :param events: events of irc_block_data (line offsets relative to the block). Scanned here if not given.
+        :param lazy_subjobs: OPT/FREQ jobs in the block are parsed on the first access (LazyJob)
+        :param numeric_mode: values are Decimal (exact) or float (fast)
+        """
         assert (irc_block_data[0].startswith('IRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRC'))
 
-        self.row_data: List[str] = copy.deepcopy(irc_block_data)
+        self.row_data: Sequence[str] = irc_block_data
         self.num_atom: int = -1
         self.init_structure: Optional[Structure] = None
+        self.init_energy: Optional[Union[Decimal, float]] = None  # energy of the initial structure (TS)
         self.init_freq_job: Optional[FREQJob] = None
         self.paths: List[IRCPath] = []
         self.energy_profile_points: Optional[List[Point]] = None
-        self.frozen_atom_coordinates: Optional[List[str]] = frozen_atom_coordinates
+        self.frozen_atom_coordinates: Optional[FrozenAtoms] = to_frozen_atoms(frozen_atom_coordinates)
+        self._init_structure_finished: bool = False  # ENERGY line after the initial structure has been read
+        self.lazy_subjobs: bool = lazy_subjobs
+        self.numeric_mode: str = numeric_mode
 
-        self._read_initial_structure()
+        if events is None:
+            events = list(scan_log_events(self.row_data))
+
+        self._read_initial_structure(events)
         self.num_atom = self.init_structure.num_atom
 
         self.name: Optional[str] = None
 
+        self._parse_paths(events)
+
+    def extend(self, irc_block_data: Sequence[str], events: Optional[List[LogEvent]] = None):
+        """
+        read lines appended to the block of a running job. The last path is extended and new paths are added.
+        :param irc_block_data: lines from the IRC separator (the same start as before, longer end)
+        :param events: events of irc_block_data (line offsets relative to the block). Scanned here if not given.
+        """
+        self.row_data = irc_block_data
+        if events is None:
+            events = list(scan_log_events(self.row_data))
+        if not self._init_structure_finished:
+            self._read_initial_structure(events)
+            self.num_atom = self.init_structure.num_atom
+        self._parse_paths(events)
+
+    @profiled('IRCJob', lambda job: {'paths': len(job.paths)})
+    def _parse_paths(self, events: List[LogEvent]):
         # Get IRC Paths
-        path_blocks = self._get_path_blocks()  # separated to blocks
-        init_freq_block = extract_sub_block(path_blocks[0], job_type='freq')
-        if init_freq_block is not None:
-            self.init_freq_job = FREQJob(init_freq_block, frozen_atom_coordinates=self.frozen_atom_coordinates)
-        if len(path_blocks) > 1:
-            for block in path_blocks[1:]:
-                self.paths.append(IRCPath(block, num_atom=self.num_atom,
-                                          frozen_atom_coordinates=self.frozen_atom_coordinates))
+        path_ranges = self._get_path_ranges(events)  # separated to blocks
+        start, end = path_ranges[0]
+        if self.init_freq_job is None:
+            init_freq_range = find_sub_block(slice_events(events, start, end), 'freq', end - start)
+            if init_freq_range is not None:
+                freq_start, freq_end = init_freq_range[0] + start, init_freq_range[1] + start
+                self.init_freq_job = make_job(FREQJob, 'freq', self.row_data[freq_start:freq_end],
+                                              slice_events(events, freq_start, freq_end),
+                                              self.frozen_atom_coordinates, lazy=self.lazy_subjobs,
+                                              numeric_mode=self.numeric_mode)
+        for (n, (start, end)) in enumerate(path_ranges[1:]):
+            if n < len(self.paths) - 1:
+                continue  # finished path
+            elif n == len(self.paths) - 1:
+                self.paths[n].extend(self.row_data[start:end], events=slice_events(events, start, end))
+            else:
+                self.paths.append(IRCPath(self.row_data[start:end], num_atom=self.num_atom,
+                                          frozen_atom_coordinates=self.frozen_atom_coordinates,
+                                          events=slice_events(events, start, end),
+                                          lazy_subjobs=self.lazy_subjobs, numeric_mode=self.numeric_mode))
 
         # Get Energy Profile
         start_profile_line = -1
-        for (i, line) in enumerate(self.row_data):
-            if line.startswith('Energy profile along IRC'):
-                start_profile_line = i + 2
+        for event in events:
+            if event.kind == 'irc_profile':
+                start_profile_line = event.line + 2
         if start_profile_line > 0:
             self.energy_profile_points = []
             for line in self.row_data[start_profile_line:]:
@@ -147,71 +258,68 @@ class IRCJob:
                     break
                 else:
                     # TODO: SC-AFIRのとき、4列表示されてるものの解釈がわからない。とりあえず2列目をエネルギーとして取得
-                    path_energy_terms = [Decimal(x) for x in line.strip().split()]
+                    path_energy_terms = [to_number(x, self.numeric_mode) for x in line.strip().split()]
                     length = path_energy_terms[0]
                     energy = path_energy_terms[1]
                     self.energy_profile_points.append(Point(length=length, energy=energy))
 
-    def _get_path_blocks(self):
-
-        def is_block_start_line(l) -> bool:
-            return l.startswith('IRC FOLLOWING (FORWARD) STARTING FROM') or \
-                l.startswith('IRC FOLLOWING (BACKWARD) STARTING FROM') or \
-                l.startswith('SOFTEST MODE FOLLOWING (FORWARD) STARTING FROM') or \
-                l.startswith('SOFTEST MODE FOLLOWING (BACKWARD) STARTING FROM') or \
-                l.startswith('STEEPEST-DESCENT PATH FOLLOWING STARTING FROM NON-STATIONARY POINT')
-
-        path_blocks = []
-        current_block = []
-
-        for line in self.row_data:
-            if line.startswith('Energy profile along IRC'):
+    def _get_path_ranges(self, events: List[LogEvent]) -> List[Tuple[int, int]]:
+        """
+        (start, end) line ranges of [initial part, path 1, path 2, ...]. Each path starts with
+        IRC FOLLOWING (FORWARD) STARTING FROM or etc. and ends before the next path or Energy profile along IRC.
+        """
+        boundaries = [0]
+        end = len(self.row_data)
+        for event in events:
+            if event.kind == 'irc_profile':
+                end = event.line
                 break
-            if is_block_start_line(line):
-                if len(current_block) > 0:
-                    path_blocks.append(current_block)
-                current_block = [line]
-            else:
-                current_block.append(line)
-        if len(current_block) > 0:
-            path_blocks.append(current_block)
-
-        return path_blocks
+            if event.kind == 'irc_path' and event.line > 0:
+                boundaries.append(event.line)
+        boundaries.append(end)
+        return [(boundaries[n], boundaries[n+1]) for n in range(len(boundaries) - 1)]
 
-    def _read_initial_structure(self):
+    def _read_initial_structure(self, events: List[LogEvent]):
         start_init_structure = -1
         end_init_structure = -1
-        for (i, line) in enumerate(self.row_data):
-            if line.startswith('INITIAL STRUCTURE'):
-                if start_init_structure == -1:
-                    start_init_structure = i + 1
-                else:
-                    raise ValueError('More than two initial structures are detected in IRC log.')
-            if line.startswith('ENERGY'):
-                if start_init_structure != -1:
+        init_lines = [e.line for e in events if e.kind == 'init_structure']
+        if len(init_lines) > 0:
+            start_init_structure = init_lines[0] + 1
+            for i in range(start_init_structure, len(self.row_data)):
+                if self.row_data[i].startswith('ENERGY'):
                     end_init_structure = i
                     break
+            if len(init_lines) > 1 and (end_init_structure == -1 or init_lines[1] < end_init_structure):
+                raise ValueError('More than two initial structures are detected in IRC log.')
+        self._init_structure_finished = end_init_structure != -1
+        if self._init_structure_finished:
+            self.init_energy = to_number(self.row_data[end_init_structure].split()[1], self.numeric_mode)
 
         self.init_structure = Structure(self.row_data[start_init_structure:end_init_structure],
                                         name='Initial Structure', frozen_atom_coordinates=self.frozen_atom_coordinates)
 
+    def draw_profile_plot(self, figure: 'Figure', reverse_flag: bool = False):
+        """
+        draw the energy profile along IRC on figure (cleared first)
+        """
+        xs = to_float_array([p.length for p in self.energy_profile_points])
+        ys = [p.energy for p in self.energy_profile_points]
+        figure.clear()
+        axes = figure.add_subplot()
+        axes.set_title(self.profile_plot_title(reverse_flag))
+        axes.set_xlabel('Length (A amu1/2)')
+        axes.set_ylabel('Energy (au)')
+        plot_series(axes, -xs if reverse_flag else xs, ys, scatter=True)
+        figure.tight_layout()
+
+    @staticmethod
+    def profile_plot_title(reverse_flag: bool = False) -> str:
+        return 'Energy Profile along IRC (reversed)' if reverse_flag else 'Energy Profile along IRC'
+
     def show_profile_plot(self, reverse_flag: bool = False):
-        if reverse_flag:
-            title = 'Energy Profile along IRC (reversed)'
-            xs = [-p.length for p in self.energy_profile_points]
-            ys = [p.energy for p in self.energy_profile_points]
-        else:
-            title = 'Energy Profile along IRC'
-            xs = [p.length for p in self.energy_profile_points]
-            ys = [p.energy for p in self.energy_profile_points]
-        plt.figure(title, figsize=config.IRC_PROFILE_PLOT_SIZE)
-        plt.title(title)
-        plt.ylim(*calc_limit_for_plot(ys))
-        plt.xlabel('Length (A amu1/2)')
-        plt.ylabel('Energy (au)')
-        plt.scatter(xs, ys)
-
-        plt.tight_layout()
+        plt = pyplot()
+        figure = plt.figure(self.profile_plot_title(reverse_flag), figsize=config.IRC_PROFILE_PLOT_SIZE)
+        self.draw_profile_plot(figure, reverse_flag)
         plt.show()
 
     def save_full_irc_path_xyz(self, file: str, reverse_flag: bool = False):
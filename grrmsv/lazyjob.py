@@ -0,0 +1,103 @@
+import threading
+from typing import Any, List, Optional, Sequence
+
+from grrmsv.structure import FrozenAtomsSource
+from grrmsv.tokenizer import LogEvent
+
+
+class LazyJob:
+    """
+    Proxy of a job (OPTJob, FREQJob, IRCJob or LUPJob) which is parsed on the first access.
+    type and name are available without parsing. Other attributes and methods are those of the parsed job.
+    The job is parsed only once even if it is accessed from several threads (e.g. parse_all_jobs in a background
+    thread and a selection in GUI).
+    """
+
+    def __init__(self, job_class: type, job_type: str, block_data: Sequence[str], events: List[LogEvent],
+                 frozen_atom_coordinates: FrozenAtomsSource = None, name: Optional[str] = None, **options):
+        """
+        :param job_class: OPTJob, FREQJob, IRCJob or LUPJob
+        :param job_type: opt, freq, irc or lup
+        :param block_data: lines of the job block
+        :param events: events of block_data (line offsets relative to the block)
+        :param options: other keyword arguments of job_class
+        """
+        self.type: str = job_type
+        self.name: Optional[str] = name
+        self._job_class: type = job_class
+        self._block_data: Optional[Sequence[str]] = block_data
+        self._events: Optional[List[LogEvent]] = events
+        self._frozen_atom_coordinates: FrozenAtomsSource = frozen_atom_coordinates
+        self._options: dict = options
+        self._job: Any = None
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def parsed(self) -> bool:
+        return self._job is not None
+
+    def get_job(self) -> Any:
+        """
+        return the parsed job (parsed here at the first call)
+        """
+        if self._job is None:
+            with self._lock:
+                if self._job is None:
+                    job = self._job_class(self._block_data, frozen_atom_coordinates=self._frozen_atom_coordinates,
+                                          events=self._events, **self._options)
+                    job.name = self.name
+                    self._job = job
+                    self._block_data = None
+                    self._events = None
+        return self._job
+
+    def extend(self, block_data: Sequence[str], events: Optional[List[LogEvent]] = None):
+        """
+        same as extend of the job. If not parsed yet, the block is just replaced.
+        """
+        with self._lock:
+            if self._job is None:
+                self._block_data = block_data
+                self._events = events
+                return
+        self._job.extend(block_data, events=events)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        # called only for attributes not found in the proxy itself
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.get_job(), name)
+
+    def __repr__(self) -> str:
+        return 'LazyJob(type={:}, name={:}, parsed={:})'.format(self.type, self.name, self.parsed)
+
+
+def make_job(job_class: type, job_type: str, block_data: Sequence[str], events: List[LogEvent],
+             frozen_atom_coordinates: FrozenAtomsSource = None, name: Optional[str] = None, lazy: bool = False,
+             **options) -> Any:
+    """
+    create a job of job_class, or LazyJob of it if lazy
+    """
+    if lazy:
+        return LazyJob(job_class, job_type, block_data, events, frozen_atom_coordinates, name=name, **options)
+    job = job_class(block_data, frozen_atom_coordinates=frozen_atom_coordinates, events=events, **options)
+    job.name = name
+    return job
+
+
+def resolve_job(job: Any) -> Any:
+    """
+    return the parsed job for LazyJob, or job itself
+    """
+    if isinstance(job, LazyJob):
+        return job.get_job()
+    return job
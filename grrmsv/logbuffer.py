@@ -0,0 +1,300 @@
+import io
+import locale
+import mmap
+import uuid
+import weakref
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Union, overload
+
+import numpy as np
+
+
+# live buffers by token: pickled views (e.g. results of worker processes) are restored on these buffers
+_BUFFERS: 'weakref.WeakValueDictionary[str, LogBuffer]' = weakref.WeakValueDictionary()
+
+
+class LogBuffer:
+    """
+    Shared read-only buffer of log lines.
+    Job classes receive BlockView objects (start, end) on this buffer instead of copies of the lines.
+    A buffer is pickled as a reference (token) without the lines. When unpickled in the process that has
+    the buffer, the same buffer is used; otherwise a released buffer is created.
+    """
+
+    def __init__(self, lines: Union[List[str], 'MappedLines'], offset: int = 0, token: Optional[str] = None):
+        """
+        :param lines: lines of the log (list or MappedLines)
+        :param offset: line offset of lines[0] in the original buffer (for a part of a buffer sent to a worker process)
+        :param token: identity of the original buffer (new one if None)
+        """
+        self._lines: Union[None, List[str], MappedLines] = lines
+        self.offset: int = offset
+        self.token: str = token if token is not None else uuid.uuid4().hex
+        if offset == 0 and self.token not in _BUFFERS:
+            _BUFFERS[self.token] = self
+
+    @property
+    def lines(self) -> Union[List[str], 'MappedLines']:
+        if self._lines is None:
+            raise RuntimeError('Log data has been released.')
+        return self._lines
+
+    @property
+    def released(self) -> bool:
+        return self._lines is None
+
+    def release(self):
+        """
+        drop the raw text (or close the mapped file). Views on this buffer cannot be read after release.
+        """
+        if isinstance(self._lines, MappedLines):
+            self._lines.close()
+        self._lines = None
+
+    def view(self, start: int = 0, end: Optional[int] = None) -> 'BlockView':
+        num_lines = len(self.lines)
+        if end is None or end > num_lines:
+            end = num_lines
+        return BlockView(self, start, end)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __reduce__(self):
+        return _restore_buffer, (self.token,)
+
+
+def _restore_buffer(token: str) -> LogBuffer:
+    buffer = _BUFFERS.get(token)
+    if buffer is None:
+        buffer = LogBuffer([], token=token)
+        buffer.release()
+    return buffer
+
+
+def _restore_view(token: str, start: int, end: int) -> 'BlockView':
+    buffer = _restore_buffer(token)
+    return BlockView(buffer, start - buffer.offset, end - buffer.offset)
+
+
+class BlockView(Sequence[str]):
+    """
+    Lightweight read-only view of lines [start, end) of a LogBuffer.
+    Slicing a view returns a view of the same buffer (no line is copied).
+    """
+    __slots__ = ('buffer', 'start', 'end')
+
+    def __init__(self, buffer: LogBuffer, start: int, end: int):
+        self.buffer: LogBuffer = buffer
+        self.start: int = start
+        self.end: int = max(start, end)
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'BlockView': ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, 'BlockView']:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.end - self.start)
+            if step != 1:
+                return BlockView(LogBuffer(self.buffer.lines[self.start + start:self.start + stop:step]), 0,
+                                 len(range(start, stop, step)))
+            return BlockView(self.buffer, self.start + start, self.start + stop)
+        if index < 0:
+            index += self.end - self.start
+        if not 0 <= index < self.end - self.start:
+            raise IndexError('BlockView index out of range')
+        return self.buffer.lines[self.start + index]
+
+    def __iter__(self) -> Iterator[str]:
+        lines = self.buffer.lines
+        if isinstance(lines, MappedLines):
+            return lines.iter_range(self.start, self.end)
+        return iter(lines[self.start:self.end])
+
+    def __reversed__(self) -> Iterator[str]:
+        return reversed(self.buffer.lines[self.start:self.end])
+
+    def __reduce__(self):
+        # saved with line offsets in the original buffer
+        offset = self.buffer.offset
+        return _restore_view, (self.buffer.token, offset + self.start, offset + self.end)
+
+    def __repr__(self) -> str:
+        return 'BlockView(start={:}, end={:})'.format(self.start, self.end)
+
+
+class MappedLines(Sequence[str]):
+    """
+    Lines of a log file read through mmap. Only the byte offsets of lines are kept (8 bytes per line), and a line is
+    decoded when it is accessed, so that the text of the whole log is never held in memory.
+    Lines are split at b'\\n' and a trailing b'\\r\\n' is read as '\\n' (a lone b'\\r' is not a line break here).
+    Lines are added with index (also for a growing file, see remap).
+    """
+
+    ITER_CHUNK_LINES = 4096
+
+    def __init__(self, file: str, encoding: Optional[str] = None):
+        """
+        :param file: log file
+        :param encoding: encoding of the file (the default of open() if None)
+        """
+        self.file: str = file
+        self.encoding: str = encoding if encoding is not None else locale.getpreferredencoding(False)
+        self._file: Optional[BinaryIO] = open(file, 'rb')
+        self._map: Optional[mmap.mmap] = None
+        self.size: int = 0  # mapped bytes
+        # line i is bytes [_ends[i], _ends[i + 1]) (_ends[0] = 0). Storage grows geometrically.
+        self._ends: np.ndarray = np.zeros(1024, dtype=np.int64)
+        self._num_lines: int = 0
+
+    @property
+    def buffer(self) -> Union[mmap.mmap, bytes]:
+        """
+        the mapped bytes (e.g. for locate_event_offsets)
+        """
+        return self._map if self._map is not None else b''
+
+    @property
+    def end_offset(self) -> int:
+        """
+        byte offset after the last indexed line
+        """
+        return int(self._ends[self._num_lines])
+
+    def remap(self) -> int:
+        """
+        map the file again with the current size (to read a growing file). Indexed lines are kept.
+        :return: the size of the file
+        """
+        if self._file is None:
+            raise RuntimeError('Log data has been released.')
+        size = self._file.seek(0, io.SEEK_END)
+        if size != self.size or self._map is None:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if size > 0:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.size = size
+        return size
+
+    def next_line_end(self, offset: int) -> int:
+        """
+        byte offset after the first line feed at or after offset (the size if not found)
+        """
+        if offset >= self.size:
+            return self.size
+        position = self._map.find(b'\n', offset)
+        return position + 1 if position >= 0 else self.size
+
+    def index(self, start: int, end: int):
+        """
+        add lines of bytes [start, end). start must be end_offset. Bytes after the last line feed are added as
+        an incomplete last line (remove it with del before indexing the rest).
+        """
+        assert start == self.end_offset
+        if end <= start:
+            return
+        data = np.frombuffer(self._map, dtype=np.uint8, count=end - start, offset=start)
+        line_ends = np.flatnonzero(data == 10)
+        del data  # release the exported buffer of mmap
+        line_ends += start + 1
+        if len(line_ends) == 0 or line_ends[-1] != end:
+            line_ends = np.append(line_ends, end)
+        self._append_ends(line_ends)
+        if hasattr(mmap, 'MADV_DONTNEED'):
+            # the scanned pages are not needed any more (read again from the page cache if a line is accessed)
+            page_start = start - start % mmap.PAGESIZE
+            self._map.madvise(mmap.MADV_DONTNEED, page_start, end - page_start)
+
+    def _append_ends(self, line_ends: np.ndarray):
+        num_lines = self._num_lines + len(line_ends)
+        if num_lines + 1 > len(self._ends):
+            ends = np.empty(max(num_lines + 1, 2 * len(self._ends)), dtype=np.int64)
+            ends[:self._num_lines + 1] = self._ends[:self._num_lines + 1]
+            self._ends = ends
+        self._ends[self._num_lines + 1:num_lines + 1] = line_ends
+        self._num_lines = num_lines
+
+    def line_at(self, offset: int) -> int:
+        """
+        index of the line containing the byte offset
+        """
+        return int(np.searchsorted(self._ends[1:self._num_lines + 1], offset, side='right'))
+
+    def offset(self, line: int) -> int:
+        """
+        byte offset of the start of the line (or end_offset for line = len(self))
+        """
+        return int(self._ends[line])
+
+    def decode(self, start: int, end: int) -> str:
+        """
+        text of bytes [start, end) (line breaks are normalized to '\\n')
+        """
+        text = self._map[start:end].decode(self.encoding)
+        if '\r' in text:
+            text = text.replace('\r\n', '\n')
+        return text
+
+    def close(self):
+        """
+        close the mapped file (lines cannot be read after close)
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __len__(self) -> int:
+        return self._num_lines
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if self._map is None and self._num_lines > 0:
+            raise RuntimeError('Log data has been released.')
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._num_lines)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            if stop <= start:
+                return []
+            # one decode for the whole range
+            return io.StringIO(self.decode(int(self._ends[start]), int(self._ends[stop]))).readlines()
+        if index < 0:
+            index += self._num_lines
+        if not 0 <= index < self._num_lines:
+            raise IndexError('MappedLines index out of range')
+        return self.decode(int(self._ends[index]), int(self._ends[index + 1]))
+
+    def __delitem__(self, index: slice):
+        # only removal of the last lines is supported (e.g. the half-written last line of a running job)
+        start, stop, step = index.indices(self._num_lines)
+        if stop != self._num_lines or step != 1:
+            raise ValueError('only the last lines of MappedLines can be deleted')
+        self._num_lines = min(start, self._num_lines)
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_range(0, self._num_lines)
+
+    def iter_range(self, start: int, end: int) -> Iterator[str]:
+        """
+        iterator of lines [start, end), decoded in chunks of ITER_CHUNK_LINES lines (not the whole range at once)
+        """
+        for chunk_start in range(start, end, self.ITER_CHUNK_LINES):
+            yield from self[chunk_start:min(chunk_start + self.ITER_CHUNK_LINES, end)]
+
+    def __repr__(self) -> str:
+        return 'MappedLines(file={:}, num_lines={:})'.format(self.file, self._num_lines)
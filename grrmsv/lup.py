@@ -1,127 +1,169 @@
-import copy
 import dataclasses
+from concurrent.futures import Executor, Future
 from decimal import Decimal
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple, Union, overload
 
-import matplotlib.pyplot as plt
+import numpy as np
 
-from grrmsv.structure import Structure
+from grrmsv.structure import Structure, FrozenAtoms, FrozenAtomsSource, to_frozen_atoms
+from grrmsv.trajectory import Trajectory
 from grrmsv.opt import OPTJob
 from grrmsv.freq import FREQJob
 from grrmsv.irc import IRCJob
-from grrmsv.utils import get_line_type, calc_limit_for_plot
+from grrmsv.lazyjob import make_job
+from grrmsv.parallel import submit_block
+from grrmsv.plotting import plot_series, pyplot
+from grrmsv import profiling
+from grrmsv.tokenizer import LogEvent, scan_log_events, slice_events, group_job_blocks
+from grrmsv.utils import to_number, NUMERIC_EXACT, NUMERIC_FAST
 
 import config
 
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+
+# ITR. @ blocks parsed in a worker process at once (LUPJob with executor)
+ITR_CHUNK_SIZE = 20
 
 @dataclasses.dataclass
 class PathPoint:
     node : int
-    length : Decimal
-    energy : Decimal
+    length : Union[Decimal, float]
+    energy : Union[Decimal, float]
 
 
 class LUPPath:
-    def __init__(self, lup_itr_block_data: List[str], frozen_atom_coordinates: Optional[List[str]] = None):
+    def __init__(self, lup_itr_block_data: Sequence[str], frozen_atom_coordinates: FrozenAtomsSource = None,
+                 events: Optional[List[LogEvent]] = None, numeric_mode: str = NUMERIC_EXACT):
+        """
+        :param lup_itr_block_data: lines from ITR. @ of LUP-path optimization
+        :param events: events of lup_itr_block_data (line offsets relative to the block). Scanned here if not given.
+        :param numeric_mode: values are Decimal (exact) or float (fast)
+        """
         assert lup_itr_block_data[0].startswith('ITR.') and 'of LUP-path optimization' in lup_itr_block_data[0]
 
-        self.row_data: List[str] = copy.deepcopy(lup_itr_block_data)
+        self.row_data: Sequence[str] = lup_itr_block_data
         self.num_atom: int = -1
-        self.structure_list: List[Structure] = []
-        self.energy_list: List[Decimal] = []
+        self.trajectory: Optional[Trajectory] = None  # structures of nodes
+        self.energy_list: List[Union[Decimal, float]] = []
         self.path_profile_data: List[str] = []
         self.points: List[PathPoint] = []
         self.name: Optional[str] = None
-        self.frozen_atom_coordinates: Optional[List[str]] = frozen_atom_coordinates
-        self._parse_row_data()
-
-    def _set_num_atom(self):
+        self.frozen_atom_coordinates: Optional[FrozenAtoms] = to_frozen_atoms(frozen_atom_coordinates)
+        self.numeric_mode: str = numeric_mode
+        if events is None:
+            events = list(scan_log_events(self.row_data))
+        self._parse_row_data(events)
+
+    @staticmethod
+    def _read_block(row_data: Sequence[str], events: List[LogEvent]) -> Tuple[str, int, List[int], List[str], List[str],
+                                                                               List[str]]:
         """
-        set self.num_atom from self.row_data
+        read the text of an ITR. @ block (numbers are not converted here)
+        :return: name, num_atom, node start lines, node names, node energy texts, lines of ---Profile of LUP path
         """
-        for (i, line) in enumerate(self.row_data):
-            if line.startswith('# NODE'):
-                start_line_init = i
-            elif line.startswith('ENERGY'):
-                self.num_atom = i - 1 - start_line_init
-                break
-
-    def _parse_row_data(self):
-        self._set_num_atom()
-        self.name = self.row_data[0].split('of')[0].strip()  # name: ITR. @
-
         # get node start lines
-        node_start_line_list = []
-        for (i, line) in enumerate(self.row_data):
-            if line.startswith('# NODE'):
-                node_start_line_list.append(i)
-
-        # get node structures and energies
+        node_start_line_list = [e.line for e in events if e.kind == 'node']
+
+        # num_atom: lines between the first node and its ENERGY line
+        num_atom = -1
+        if len(node_start_line_list) > 0:
+            start_line_init = node_start_line_list[0]
+            for i in range(start_line_init + 1, len(row_data)):
+                if row_data[i].startswith('ENERGY'):
+                    num_atom = i - 1 - start_line_init
+                    break
+        name = row_data[0].split('of')[0].strip()  # name: ITR. @
+
+        # get node names and energies
+        node_names = []
+        energy_texts = []
         for node_start_line in node_start_line_list:
-            structure_block = self.row_data[node_start_line + 1 : node_start_line + self.num_atom + 1]
-            name = self.row_data[node_start_line].strip()
-            assert 'ENERGY' in self.row_data[node_start_line + self.num_atom + 1].upper()
-            energy = Decimal(self.row_data[node_start_line + self.num_atom + 1].split()[-1].strip())
-            self.structure_list.append(Structure(structure_block, name=name,
-                                                 frozen_atom_coordinates=self.frozen_atom_coordinates))
-            self.energy_list.append(energy)
+            node_names.append(row_data[node_start_line].strip())
+            assert 'ENERGY' in row_data[node_start_line + num_atom + 1].upper()
+            energy_texts.append(row_data[node_start_line + num_atom + 1].split()[-1].strip())
 
         # get start line for ---Profile of LUP path
         profile_start_line = -1
-        for (i, line) in enumerate(self.row_data):
-            if line.startswith('---Profile of LUP path'):
-                profile_start_line = i
+        for event in events:
+            if event.kind == 'lup_profile':
+                profile_start_line = event.line
 
         if profile_start_line == -1:
             raise ValueError('---Profile of LUP path section is not found.')
 
         # read profile
-        self.path_profile_data.append(self.row_data[profile_start_line])
-        self.path_profile_data.append(self.row_data[profile_start_line+1])
-        for line in self.row_data[profile_start_line+2:]:
+        profile_lines = [row_data[profile_start_line], row_data[profile_start_line+1]]
+        for line in row_data[profile_start_line+2:]:
             if line.strip() == '':
                 break
-            self.path_profile_data.append(line)
+            profile_lines.append(line)
+        return name, num_atom, node_start_line_list, node_names, energy_texts, profile_lines
+
+    @profiling.profiled('LUPPath', lambda path: {'structures': len(path.trajectory)})
+    def _parse_row_data(self, events: List[LogEvent]):
+        (self.name, self.num_atom, node_start_line_list, frame_names, energy_texts,
+         self.path_profile_data) = self._read_block(self.row_data, events)
+
+        # get node structures and energies
+        frame_lines = [self.row_data[node_start_line + 1: node_start_line + self.num_atom + 1]
+                       for node_start_line in node_start_line_list]
+        self.energy_list = [to_number(text, self.numeric_mode) for text in energy_texts]
+        self.trajectory = Trajectory.from_lines(frame_lines, frame_names,
+                                                frozen_atom_coordinates=self.frozen_atom_coordinates)
+        self.points = self._read_points(self.path_profile_data, self.numeric_mode)
+
+    @staticmethod
+    def _read_points(profile_lines: List[str], numeric_mode: str) -> List[PathPoint]:
+        points = []
+        for line in profile_lines[2:]:
             line_data = line.strip().split()
             node = int(line_data[0])
-            length = Decimal(line_data[1])
-            energy = Decimal(line_data[2])
-            point = PathPoint(node=node, energy=energy, length=length)
-            self.points.append(point)
+            length = to_number(line_data[1], numeric_mode)
+            energy = to_number(line_data[2], numeric_mode)
+            points.append(PathPoint(node=node, energy=energy, length=length))
+        return points
+
+    def draw_plot_by_step(self, figure: 'Figure', node: Optional[int] = None):
+        """
+        draw the energy of each node on figure (cleared first)
+        :param node: index of the node to be marked (optional)
+        """
+        figure.clear()
+        axes = figure.add_subplot()
+        axes.set_title('LUP Path Energy')
+        axes.set_xlabel('# NODE.')
+        axes.set_ylabel('Energy')
+        plot_series(axes, [p.node for p in self.points], [p.energy for p in self.points], scatter=True,
+                    highlight=node)
+        figure.tight_layout()
+
+    def draw_plot_by_length(self, figure: 'Figure', node: Optional[int] = None):
+        """
+        draw the energy of each node along the path length on figure (cleared first). Points are labeled with # NODE.
+        :param node: index of the node to be marked (optional)
+        """
+        figure.clear()
+        axes = figure.add_subplot()
+        axes.set_title('LUP Path Energy (labels = # NODE.)')
+        axes.set_xlabel('length (ang)')
+        axes.set_ylabel('Energy')
+        plot_series(axes, [p.length for p in self.points], [p.energy for p in self.points], scatter=True,
+                    labels=[p.node for p in self.points], highlight=node)
+        figure.tight_layout()
 
     def show_plot_by_step(self):
-        xs = [p.node for p in self.points]
-        ys = [p.energy for p in self.points]
-        plt.figure('LUP Path Energy ', figsize=config.LUP_PATH_PLOT_SIZE)
-        plt.title('LUP Path Energy')
-        plt.ylim(*calc_limit_for_plot(ys))
-        plt.xlabel('# NODE.')
-        plt.ylabel('Energy')
-        plt.scatter(xs, ys)
-
-        plt.tight_layout()
+        plt = pyplot()
+        figure = plt.figure('LUP Path Energy ', figsize=config.LUP_PATH_PLOT_SIZE)
+        self.draw_plot_by_step(figure)
         plt.show()
-        # plt.clf()
-        # plt.close()
 
     def show_plot_by_length(self):
-        labels = [p.node for p in self.points]
-        xs = [p.length for p in self.points]
-        ys = [p.energy for p in self.points]
-        plt.figure('LUP Path Energy ', figsize=config.AFIR_PATH_PLOT_SIZE)
-        plt.title('LUP Path Energy (labels = # NODE.)')
-        plt.ylim(*calc_limit_for_plot(ys))
-        plt.xlabel('length (ang)')
-        plt.ylabel('Energy')
-
-        for (i, j, k) in zip(xs, ys, labels):
-            plt.plot(i, j, 'o', color='blue')
-            plt.annotate(str(k), xy=(float(i), float(j)))
-
-        plt.tight_layout()
+        plt = pyplot()
+        figure = plt.figure('LUP Path Energy ', figsize=config.AFIR_PATH_PLOT_SIZE)
+        self.draw_plot_by_length(figure)
         plt.show()
-        # plt.clf()
-        # plt.close()
 
     def get_profile_string(self):
         return ''.join(self.path_profile_data)
@@ -133,16 +175,256 @@ class LUPPath:
                 f.write(s.name.replace('\n', ' ') + '\n')
                 f.write(s.get_string(include_frozen_atoms=True))
 
+    @property
+    def structure_list(self) -> Trajectory:
+        return self.trajectory
+
     @property
     def num_node(self):
         return len(self.structure_list)
 
 
+def _append_rows(buffer: np.ndarray, size: int, rows: np.ndarray) -> np.ndarray:
+    """
+    write rows at buffer[size:] and return the buffer. The buffer is reallocated if needed: the first axis grows
+    geometrically and the other axes are padded with NaN to the larger size (e.g. iterations with more nodes).
+    """
+    shape = tuple(max(a, b) for (a, b) in zip(buffer.shape[1:], rows.shape[1:]))
+    if size + len(rows) > len(buffer) or shape != buffer.shape[1:]:
+        new_buffer = np.full((max(size + len(rows), 2 * len(buffer)),) + shape, np.nan)
+        new_buffer[(slice(0, size),) + tuple(slice(0, n) for n in buffer.shape[1:])] = buffer[:size]
+        buffer = new_buffer
+    buffer[size:size + len(rows)] = np.nan
+    buffer[(slice(size, size + len(rows)),) + tuple(slice(0, n) for n in rows.shape[1:])] = rows
+    return buffer
+
+
+class LUPIterations(Sequence[LUPPath]):
+    """
+    LUP-path iterations (ITR. @ blocks) of LUPJob in a compact form.
+    Node coordinates of all iterations are saved in one (n_itr, n_node, n_atom, 3) float64 array, node energies and
+    the path profile (length, energy) in (n_itr, n_node) float64 arrays (padded with NaN if the number of nodes
+    differs). LUPPath objects are created on demand (e.g. when an iteration is selected) and cached.
+    """
+
+    def __init__(self, itr_block_data: Sequence[str] = (), frozen_atom_coordinates: FrozenAtomsSource = None,
+                 events: Optional[List[LogEvent]] = None, numeric_mode: str = NUMERIC_EXACT):
+        """
+        :param itr_block_data: lines of successive ITR. @ blocks (the last block ends at the end of the lines)
+        :param events: events of itr_block_data (line offsets relative to the block). Scanned here if not given.
+        :param numeric_mode: values of LUPPath are Decimal (exact) or float (fast; the energy text is not kept)
+        """
+        self.names: List[str] = []
+        self.num_atom: int = -1
+        self.num_nodes: List[int] = []
+        self.coordinates: np.ndarray = np.zeros((0, 0, 0, 3), dtype=np.float64)  # (n_itr, n_node, n_atom, 3)
+        self.node_energies: np.ndarray = np.zeros((0, 0), dtype=np.float64)  # (n_itr, n_node)
+        self.profile_lengths: np.ndarray = np.zeros((0, 0), dtype=np.float64)  # (n_itr, n_point)
+        self.profile_energies: np.ndarray = np.zeros((0, 0), dtype=np.float64)  # (n_itr, n_point)
+        self.frozen_atom_coordinates: Optional[FrozenAtoms] = to_frozen_atoms(frozen_atom_coordinates)
+        self.numeric_mode: str = numeric_mode
+        self.frozen_atom_block: Optional[FrozenAtoms] = self.frozen_atom_coordinates
+        # buffers of arrays (see _append_rows)
+        self._buffers: Dict[str, np.ndarray] = {}
+        # text and data to create LUPPath of each iteration
+        self._blocks: List[Sequence[str]] = []
+        self._node_start_lines: List[List[int]] = []
+        self._node_names: List[List[str]] = []
+        self._energy_texts: List[List[str]] = []
+        self._profile_lines: List[List[str]] = []
+        self._element_indices: List[np.ndarray] = []  # (n_atom) or (n_node, n_atom), usually the same object
+        self._float_exact: List[bool] = []
+        self._paths: Dict[int, LUPPath] = {}  # created LUPPath objects
+
+        if len(itr_block_data) > 0:
+            if events is None:
+                events = list(scan_log_events(itr_block_data))
+            self._parse_row_data(itr_block_data, events)
+
+    @profiling.profiled('LUPIterations', lambda iterations: {'iterations': len(iterations)})
+    def _parse_row_data(self, row_data: Sequence[str], events: List[LogEvent]):
+        start_lines = [e.line for e in events if e.kind == 'lup_itr']
+        end_lines = start_lines[1:] + [len(row_data)]
+
+        frame_lines = []
+        for (start, end) in zip(start_lines, end_lines):
+            block = row_data[start:end]
+            name, num_atom, node_start_lines, node_names, energy_texts, profile_lines = \
+                LUPPath._read_block(block, slice_events(events, start, end))
+            if num_atom >= 0:
+                if self.num_atom >= 0 and num_atom != self.num_atom:
+                    raise ValueError('Number of atoms is not the same in all iterations of LUP path.')
+                self.num_atom = num_atom
+            frame_lines.extend(block[line + 1:line + num_atom + 1] for line in node_start_lines)
+            self.names.append(name)
+            self.num_nodes.append(len(node_start_lines))
+            self._blocks.append(block)
+            self._node_start_lines.append(node_start_lines)
+            self._node_names.append(node_names)
+            self._energy_texts.append(energy_texts)
+            self._profile_lines.append(profile_lines)
+
+        num_itr = len(start_lines)
+        first = len(self.names) - num_itr
+        num_nodes = self.num_nodes[first:]
+        width = max(num_nodes, default=0)
+
+        # all nodes of all new iterations at once
+        coordinates = np.full((num_itr, width, max(self.num_atom, 0), 3), np.nan)
+        element_indices = np.zeros(0, dtype=np.uint16)
+        float_exact = True
+        if len(frame_lines) > 0:
+            element_indices, frames, float_exact = Trajectory._parse_frames(frame_lines)
+            if element_indices.ndim == 1 and first > 0 and \
+                    np.array_equal(element_indices, self._element_indices[first - 1]):
+                element_indices = self._element_indices[first - 1]
+            n = 0
+            for (i, num_node) in enumerate(num_nodes):
+                coordinates[i, :num_node] = frames[n:n + num_node]
+                n += num_node
+        n = 0
+        for num_node in num_nodes:
+            if element_indices.ndim == 2:
+                self._element_indices.append(element_indices[n:n + num_node])
+            else:
+                self._element_indices.append(element_indices)
+            self._float_exact.append(float_exact)
+            n += num_node
+
+        node_energies = np.full((num_itr, width), np.nan)
+        for (i, texts) in enumerate(self._energy_texts[first:]):
+            node_energies[i, :len(texts)] = np.array(texts, dtype=str).astype(np.float64)
+        if self.numeric_mode == NUMERIC_FAST:
+            # energies are kept only in node_energies
+            self._energy_texts[first:] = [[] for _ in range(num_itr)]
+        num_points = [len(lines) - 2 for lines in self._profile_lines[first:]]
+        profile = np.full((num_itr, max(num_points, default=0), 2), np.nan)
+        for (i, lines) in enumerate(self._profile_lines[first:]):
+            if len(lines) > 2:
+                profile[i, :len(lines) - 2] = np.array([line.split()[1:3] for line in lines[2:]],
+                                                       dtype=str).astype(np.float64)
+        self._append({'coordinates': coordinates, 'node_energies': node_energies,
+                      'profile_lengths': profile[:, :, 0], 'profile_energies': profile[:, :, 1]}, num_itr)
+
+        if not float_exact:
+            # keep exact values now, because the text may be released later.
+            for i in range(first, len(self.names)):
+                self._get_path(i)
+
+    def _append(self, rows: Dict[str, np.ndarray], num_itr: int):
+        """
+        append rows of the last num_itr iterations to the arrays
+        """
+        size = len(self.names) - num_itr
+        for (key, value) in rows.items():
+            buffer = value if size == 0 else _append_rows(self._buffers[key], size, value)
+            self._buffers[key] = buffer
+            setattr(self, key, buffer[:len(self.names)])
+
+    def extend(self, iterations: 'LUPIterations'):
+        """
+        append iterations (e.g. parsed in a worker process or read from a running log)
+        """
+        num_itr = len(iterations)
+        if num_itr == 0:
+            return
+        if iterations.num_atom >= 0:
+            if self.num_atom >= 0 and iterations.num_atom != self.num_atom:
+                raise ValueError('Number of atoms is not the same in all iterations of LUP path.')
+            self.num_atom = iterations.num_atom
+        first = len(self.names)
+        self.names = self.names + iterations.names
+        self.num_nodes = self.num_nodes + iterations.num_nodes
+        self._blocks += iterations._blocks
+        self._node_start_lines += iterations._node_start_lines
+        self._node_names += iterations._node_names
+        self._energy_texts += iterations._energy_texts
+        self._profile_lines += iterations._profile_lines
+        self._element_indices += iterations._element_indices
+        self._float_exact += iterations._float_exact
+        for (i, path) in iterations._paths.items():
+            self._paths[first + i] = path
+        self._append({'coordinates': iterations.coordinates, 'node_energies': iterations.node_energies,
+                      'profile_lengths': iterations.profile_lengths,
+                      'profile_energies': iterations.profile_energies}, num_itr)
+
+    def __getstate__(self) -> dict:
+        # the spare part of the buffers and created LUPPath objects (except those with exact values) are not pickled
+        state = self.__dict__.copy()
+        state['_buffers'] = {key: getattr(self, key) for key in self._buffers}
+        state['_paths'] = {i: path for (i, path) in self._paths.items() if not self._float_exact[i]}
+        return state
+
+    def _get_path(self, index: int) -> LUPPath:
+        path = self._paths.get(index)
+        if path is None:
+            path = LUPPath.__new__(LUPPath)
+            path.row_data = self._blocks[index]
+            path.name = self.names[index]
+            path.frozen_atom_coordinates = self.frozen_atom_coordinates
+            path.numeric_mode = self.numeric_mode
+            num_node = self.num_nodes[index]
+            if num_node == 0:
+                path.num_atom = -1
+                path.trajectory = Trajectory.from_lines([], [], self.frozen_atom_coordinates)
+            else:
+                path.num_atom = self.num_atom
+                frame_lines = [self._blocks[index][line + 1:line + self.num_atom + 1]
+                               for line in self._node_start_lines[index]]
+                path.trajectory = Trajectory(self._element_indices[index], self.coordinates[index, :num_node],
+                                             list(self._node_names[index]), frame_lines, self.frozen_atom_block,
+                                             self._float_exact[index])
+            if self.numeric_mode == NUMERIC_FAST:
+                path.energy_list = self.node_energies[index, :num_node].tolist()
+            else:
+                path.energy_list = [Decimal(text) for text in self._energy_texts[index]]
+            path.path_profile_data = list(self._profile_lines[index])
+            path.points = LUPPath._read_points(path.path_profile_data, self.numeric_mode)
+            self._paths[index] = path
+        return path
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @overload
+    def __getitem__(self, index: int) -> LUPPath: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[LUPPath]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[LUPPath, List[LUPPath]]:
+        if isinstance(index, slice):
+            return [self._get_path(i) for i in range(len(self.names))[index]]
+        if index < 0:
+            index += len(self.names)
+        if not 0 <= index < len(self.names):
+            raise IndexError('LUPIterations index out of range')
+        return self._get_path(index)
+
+    def __iter__(self) -> Iterator[LUPPath]:
+        for i in range(len(self.names)):
+            yield self._get_path(i)
+
+    def __repr__(self) -> str:
+        return 'LUPIterations(num_itr={:}, num_atom={:})'.format(len(self.names), self.num_atom)
+
+
 class LUPJob:
-    def __init__(self, lup_block_data, frozen_atom_coordinates = None):
+    def __init__(self, lup_block_data, frozen_atom_coordinates: FrozenAtomsSource = None,
+                 events: Optional[List[LogEvent]] = None, lazy_subjobs: bool = False,
+                 executor: Optional[Executor] = None, numeric_mode: str = NUMERIC_EXACT):
+        """
+        :param lup_block_data: lines from the LUP separator
+        :param events: events of lup_block_data (line offsets relative to the block). Scanned here if not given.
+        :param lazy_subjobs: subjobs are parsed on the first access (LazyJob)
+        :param executor: process pool to parse ITR. @ blocks and subjobs in parallel (used only in __init__)
+        :param numeric_mode: values are Decimal (exact) or float (fast)
+        """
         assert (lup_block_data[0].startswith('LUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUP'))
-        self.row_data = copy.deepcopy(lup_block_data)
-        self.itr_paths = []
+        frozen_atom_coordinates = to_frozen_atoms(frozen_atom_coordinates)
+        self.row_data = lup_block_data
+        self.itr_paths = LUPIterations(frozen_atom_coordinates=frozen_atom_coordinates,
+                                       numeric_mode=numeric_mode)  # ITR. @ blocks
         self.approximate_structures = []
         self.approximate_structure_energy_list = []
         self.subjobs = []
@@ -151,49 +433,91 @@ class LUPJob:
 
         self.frozen_atom_coordinates = frozen_atom_coordinates
 
-        self._parse_row_data()
+        self._parsed_lines = 0  # ITR. @ blocks before this offset have been read (for extend)
+        self._itr_finished = False  # all ITR. @ blocks have been read
+        self.lazy_subjobs = lazy_subjobs
+        self.numeric_mode = numeric_mode
+        self._executor = executor
+
+        if events is None:
+            events = list(scan_log_events(self.row_data))
+        self._parse_row_data(events)
+        self._executor = None
+
+    def extend(self, lup_block_data, events: Optional[List[LogEvent]] = None):
+        """
+        read lines appended to the block of a running job. New ITR. @ blocks are added, and the part after them
+        (approximate structures and subjobs) is read again.
+        :param lup_block_data: lines from the LUP separator (the same start as before, longer end)
+        :param events: events of lup_block_data (line offsets relative to the block). Scanned here if not given.
+        """
+        self.row_data = lup_block_data
+        if events is None:
+            events = list(scan_log_events(self.row_data))
+        self._parse_row_data(events)
+
+    @profiling.profiled('LUPJob', lambda job: {'iterations': len(job.itr_paths), 'subjobs': len(job.subjobs)})
+    def _parse_row_data(self, events: List[LogEvent]):
+        if not self._itr_finished:
+            self._parse_itr_blocks(events)
+
+        if not self._itr_finished or len(self.itr_paths) == 0:
+            return
+
+        self._parse_after_itr_blocks(events)
+        # results of worker processes
+        self.subjobs = [job.result() if isinstance(job, Future) else job for job in self.subjobs]
 
-    def _parse_row_data(self):
+    def _parse_itr_blocks(self, events: List[LogEvent]):
 
-        start_itr_block_lines = []  # indices for ITR. @ of LUP-path optimization
-        for (i, line) in enumerate(self.row_data):
-            if line.startswith('ITR.') and 'of LUP-path optimization' in line:
-                start_itr_block_lines.append(i)
+        # indices for ITR. @ of LUP-path optimization
+        start_itr_block_lines = [e.line for e in events if e.kind == 'lup_itr' and e.line >= self._parsed_lines]
 
         if len(start_itr_block_lines) == 0:
             return
 
-        itr_blocks = []
+        itr_ranges = []
         # separate and store iteration blocks, except for the last one
         for n in range(len(start_itr_block_lines)-1):
             start = start_itr_block_lines[n]
             end = start_itr_block_lines[n+1]
-            itr_blocks.append(self.row_data[start:end])
+            itr_ranges.append((start, end))
 
-        last_block = []
-        end_flag = False
-        for line in self.row_data[start_itr_block_lines[-1]:]:
-            if line.startswith('-------------------------------------') or  line.startswith('---Approximate'):
-                end_flag = True
+        # the last one ends with ----- or ---Approximate line
+        for event in events:
+            if event.line > start_itr_block_lines[-1] and event.kind in ('rule', 'approximate'):
+                itr_ranges.append((start_itr_block_lines[-1], event.line))
+                self._itr_finished = True
                 break
-            else:
-                last_block.append(line)
-        if end_flag:
-            itr_blocks.append(last_block)
-
-        for itr_block in itr_blocks:
-            self.itr_paths.append(LUPPath(itr_block, frozen_atom_coordinates=self.frozen_atom_coordinates))
 
-        if len(self.itr_paths) == 0:
+        if len(itr_ranges) == 0:
             return
-
-        self.num_atom = self.itr_paths[0].num_atom
+        # successive ITR. @ blocks are parsed at once (in chunks of ITR_CHUNK_SIZE blocks with executor)
+        chunk_size = ITR_CHUNK_SIZE if self._executor is not None else len(itr_ranges)
+        chunks = [(itr_ranges[n][0], itr_ranges[min(n + chunk_size, len(itr_ranges)) - 1][1])
+                  for n in range(0, len(itr_ranges), chunk_size)]
+        futures = [submit_block(self._executor, LUPIterations, self.row_data[start:end],
+                                slice_events(events, start, end), frozen_atom_coordinates=self.frozen_atom_coordinates,
+                                numeric_mode=self.numeric_mode)
+                   for (start, end) in chunks]
+        for (future, (start, end)) in zip(futures, chunks):
+            self.itr_paths.extend(future.result())
+            self._parsed_lines = end
+
+        self.num_atom = self.itr_paths.num_atom
+
+    def _parse_after_itr_blocks(self, events: List[LogEvent]):
+        self.approximate_structures = []
+        self.approximate_structure_energy_list = []
+        self.subjobs = []
 
         # get approximate TS/EQ
         count_ts = 0
         count_eq = 0
-        for (i, line) in enumerate(self.row_data):
-            if line.startswith('---Approximate'):
+        for event in events:
+            if event.kind == 'approximate':
+                i = event.line
+                line = event.text
                 structure_type = line.split()[1]  # TS or EQ
                 if structure_type == 'EQ':
                     structure_id = count_eq
@@ -204,102 +528,67 @@ class LUPJob:
                 name = line.replace('---', '').replace(' geometry ', ' ').strip() + ' : App{0:} {1:}'.format(structure_type, structure_id)
                 self.approximate_structures.append(Structure(self.row_data[i + 1:i + self.num_atom + 1], name=name,
                                                              frozen_atom_coordinates=self.frozen_atom_coordinates))
-                self.approximate_structure_energy_list.append(Decimal(self.row_data[i + self.num_atom + 1].split()[2]))
+                self.approximate_structure_energy_list.append(to_number(self.row_data[i + self.num_atom + 1].split()[2],
+                                                                       self.numeric_mode))
 
         # read # Geometry of App blocks (each block contains OPT/FREQ/IRC Job blocks)
-        start_geometry_block_lines = []
-        for (i, line) in enumerate(self.row_data):
-            if line.startswith('# Geometry of App'):
-                start_geometry_block_lines.append(i)
-        geometry_blocks = []
+        start_geometry_block_lines = [e.line for e in events if e.kind == 'app_geometry']
+        geometry_ranges = []
         for n in range(len(start_geometry_block_lines)-1):
             start = start_geometry_block_lines[n]
             end = start_geometry_block_lines[n+1]
-            geometry_blocks.append(self.row_data[start:end])
+            geometry_ranges.append((start, end))
         if len(start_geometry_block_lines) > 0:
-            geometry_blocks.append(self.row_data[start_geometry_block_lines[-1]:])
-
-        for geometry_block in geometry_blocks:
-            name = ' '.join(geometry_block[0].split()[3:5]).rstrip(',')
-
-            current_type = ''  # opt/freq/irc/lup
-            current_block_buffer = []
-            for line in geometry_block:
-                line_type = get_line_type(line)
-                if line_type == 'data':
-                    if current_type != '':
-                        current_block_buffer.append(line)
-                    continue
-                if current_type == '':
-                    current_type = line_type
-                    current_block_buffer = [line]
-                    continue
-                if current_type == line_type:
-                    current_block_buffer.append(line)
-                    self._parse_subjob_block(current_block_buffer, name=name)
-                    current_block_buffer = []
-                    current_type = ''
-                    continue
-                else:
-                    current_block_buffer.append(line)
-                    continue
-
-            if len(current_block_buffer) > 0 and current_type != '':
-                self._parse_subjob_block(current_block_buffer, name=name)
+            geometry_ranges.append((start_geometry_block_lines[-1], len(self.row_data)))
+
+        for (geometry_start, geometry_end) in geometry_ranges:
+            name = ' '.join(self.row_data[geometry_start].split()[3:5]).rstrip(',')
+            for block in group_job_blocks(slice_events(events, geometry_start, geometry_end),
+                                          geometry_end - geometry_start, track_names=False):
+                self._parse_subjob_block(block.type, geometry_start + block.start, geometry_start + block.end,
+                                         events, name=name)
 
         # in case "# Geometry of App" is not found
         if len(start_geometry_block_lines) == 0:
             start = 0
-            for (i, line) in enumerate(self.row_data):
-                if line.strip().startswith('---Approximate'):
-                    start = i
+            for event in events:
+                if event.kind == 'approximate':
+                    start = event.line
             if start == 0:
                 return
 
             count = 1
             name = 'sub'
-            remain_data = self.row_data[start:]
-            current_type = ''  # opt/freq/irc/lup
-            current_block_buffer = []
-            for line in remain_data:
-                line_type = get_line_type(line)
-                if line_type == 'data':
-                    if current_type != '':
-                        current_block_buffer.append(line)
-                    continue
-                if current_type == '':
-                    current_type = line_type
-                    current_block_buffer = [line]
-                    continue
-                if current_type == line_type:
-                    current_block_buffer.append(line)
-                    self._parse_subjob_block(current_block_buffer, name=name + '#.' + str(count))
-                    count += 1
-                    current_block_buffer = []
-                    current_type = ''
-                    continue
-                else:
-                    current_block_buffer.append(line)
-                    continue
-
-            if len(current_block_buffer) > 0 and current_type != '':
-                self._parse_subjob_block(current_block_buffer, name=name + '#.' + str(count))
-
-
-    def _parse_subjob_block(self, block: List[str], name: Optional[str]):
-
-        if block[0].startswith('OPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPT'):
-            job = OPTJob(block, frozen_atom_coordinates=self.frozen_atom_coordinates)
-        if block[0].startswith('IRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRC'):
-            job = IRCJob(block, frozen_atom_coordinates=self.frozen_atom_coordinates)
-        if block[0].startswith('FREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQ'):
-            job = FREQJob(block, frozen_atom_coordinates=self.frozen_atom_coordinates)
-        if block[0].startswith('LUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUP'):
+            for block in group_job_blocks(slice_events(events, start, len(self.row_data)),
+                                          len(self.row_data) - start, track_names=False):
+                self._parse_subjob_block(block.type, start + block.start, start + block.end,
+                                         events, name=name + '#.' + str(count))
+                count += 1
+
+    def _parse_subjob_block(self, job_type: str, start: int, end: int, events: List[LogEvent], name: Optional[str]):
+
+        block = self.row_data[start:end]
+        block_events = slice_events(events, start, end)
+        if job_type == 'lup':
+            return
+        if self._executor is not None and not self.lazy_subjobs:
+            # Future (the result is set to subjobs in _parse_row_data)
+            job_class = {'opt': OPTJob, 'irc': IRCJob, 'freq': FREQJob}[job_type]
+            self.subjobs.append(submit_block(self._executor, job_class, block, block_events, name=name,
+                                             frozen_atom_coordinates=self.frozen_atom_coordinates,
+                                             numeric_mode=self.numeric_mode))
             return
-        job.name = name
+        if job_type == 'opt':
+            job = make_job(OPTJob, job_type, block, block_events, self.frozen_atom_coordinates, name,
+                           lazy=self.lazy_subjobs, numeric_mode=self.numeric_mode)
+        if job_type == 'irc':
+            job = make_job(IRCJob, job_type, block, block_events, self.frozen_atom_coordinates, name,
+                           lazy=self.lazy_subjobs, numeric_mode=self.numeric_mode)
+        if job_type == 'freq':
+            job = make_job(FREQJob, job_type, block, block_events, self.frozen_atom_coordinates, name,
+                           lazy=self.lazy_subjobs, numeric_mode=self.numeric_mode)
         self.subjobs.append(job)
 
     @property
     def type(self) -> str:
         return 'lup'
-
@@ -1,21 +1,140 @@
+import os
 import subprocess
+from typing import List, Optional, Sequence
 
 from grrmsv.structure import Structure
-from grrmsv.utils import tostring, get_temp_file_name
+from grrmsv.utils import tostring, get_temp_file
 
 import config
 
 
+# a session viewer which exits within this time after start is regarded as not supporting the session
+SESSION_START_CHECK_SECONDS = 0.5
+
+
+def is_jmol(viewer_path: str) -> bool:
+    return 'jmol' in os.path.basename(viewer_path).lower()
+
+
+class ViewerSession:
+    """
+    One external viewer process kept alive: each file is loaded by a command written to the standard input of
+    the viewer (e.g. Jmol started with -I), instead of starting the viewer (a JVM for Jmol) for each file.
+    If the session is disabled or the viewer does not keep it (the process exits at once or its input is closed),
+    a new viewer process is started for each file as before.
+    The viewer closed by the user is started again at the next file.
+    """
+
+    def __init__(self, viewer_path: Optional[str] = None, session_args: Optional[Sequence[str]] = None,
+                 load_command: Optional[str] = None, enabled: Optional[bool] = None):
+        """
+        :param viewer_path: viewer executable (config.VIEWER_PATH if None)
+        :param session_args: arguments to start the session process (config.VIEWER_SESSION_ARGS if None)
+        :param load_command: command to load a file, {file} is replaced by the path (config.VIEWER_LOAD_COMMAND)
+        :param enabled: use the session (config.VIEWER_SESSION if None; if it is also None, only for Jmol)
+        """
+        self.viewer_path: str = viewer_path if viewer_path is not None else config.VIEWER_PATH
+        self.session_args: List[str] = list(session_args if session_args is not None else config.VIEWER_SESSION_ARGS)
+        self.load_command: str = load_command if load_command is not None else config.VIEWER_LOAD_COMMAND
+        if enabled is None:
+            enabled = config.VIEWER_SESSION
+        if enabled is None:
+            # other viewers may take -I as a file name or ignore the standard input
+            enabled = is_jmol(self.viewer_path)
+        self.supported: bool = enabled
+        self.process: Optional[subprocess.Popen] = None
+
+    def show(self, file: str) -> bool:
+        """
+        show file in the viewer
+        :return: True if loaded in the session, False if a new viewer process was started for the file
+        """
+        if self.supported and self._send(file):
+            return True
+        self.spawn(file)
+        return False
+
+    def spawn(self, file: str) -> subprocess.Popen:
+        """
+        start a new viewer process for file (without the session)
+        """
+        return subprocess.Popen([self.viewer_path, file])
+
+    def _send(self, file: str) -> bool:
+        command = self.load_command.format(file=file.replace('\\', '/'))
+        # the viewer may have been closed by the user: started again once
+        for _ in range(2):
+            if self.process is None or self.process.poll() is not None:
+                if not self._start():
+                    break
+            try:
+                self.process.stdin.write(command + '\n')
+                self.process.stdin.flush()
+                return True
+            except (OSError, ValueError):
+                # input closed (broken pipe)
+                self.process = None
+        self.supported = False
+        return False
+
+    def _start(self) -> bool:
+        """
+        start the session process
+        :return: False if the viewer could not be started or exited at once (session not supported)
+        """
+        try:
+            process = subprocess.Popen([self.viewer_path] + self.session_args, stdin=subprocess.PIPE,
+                                       text=True, encoding='utf-8')
+        except OSError:
+            return False
+        try:
+            process.wait(timeout=SESSION_START_CHECK_SECONDS)
+        except subprocess.TimeoutExpired:
+            self.process = process
+            return True
+        return False
+
+    def close(self):
+        """
+        close the input of the session process (the viewer itself is left open)
+        """
+        if self.process is not None and self.process.stdin is not None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+        self.process = None
+
+    def __repr__(self) -> str:
+        return 'ViewerSession(viewer_path={:}, supported={:}, running={:})'.format(
+            self.viewer_path, self.supported, self.process is not None and self.process.poll() is None)
+
+
+_session: Optional[ViewerSession] = None
+
+
+def get_session() -> ViewerSession:
+    """
+    the viewer session shared by show_* functions (created at the first call)
+    """
+    global _session
+    if _session is None:
+        _session = ViewerSession()
+    return _session
+
+
 def show_single_xyz(xyz_file: str):
-    subprocess.Popen([config.VIEWER_PATH, xyz_file])
+    get_session().show(xyz_file)
 
 
 def show_multi_xyz(xyz_file: str):
-    subprocess.Popen([config.VIEWER_PATH, xyz_file])
+    get_session().show(xyz_file)
 
 
 def show_structure(structure: Structure, name: str='temp.xyz'):
     prefix = name.rstrip('.xyz')
-    file = get_temp_file_name(prefix=prefix, suffix='.xyz')
-    structure.save_xyz_file(file, title=tostring(structure.name).replace('\n', ' '))
+    title = tostring(structure.name).replace('\n', ' ')
+    # keyed by the content: the same structure shown again reuses the file
+    file = get_temp_file(prefix + '_', '.xyz', lambda f: structure.save_xyz_file(f, title=title),
+                         title, structure.get_string(include_frozen_atoms=True))
     show_single_xyz(file)
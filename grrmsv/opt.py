@@ -1,161 +1,309 @@
-import copy
-from codecs import strict_errors
-from turtledemo.penrose import start
-
-import matplotlib.pyplot as plt
+import numpy as np
 from decimal import Decimal
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Union
 
-from grrmsv.structure import Structure
-from grrmsv.utils import calc_limit_for_plot
+from grrmsv.structure import Structure, FrozenAtoms, FrozenAtomsSource, to_frozen_atoms
+from grrmsv.trajectory import Trajectory
+from grrmsv.plotting import plot_series, pyplot, pyplot_figure_exists
+from grrmsv.profiling import profiled
+from grrmsv.tokenizer import LogEvent, scan_log_events
+from grrmsv.utils import to_number, NUMERIC_EXACT, NUMERIC_FAST
 
 import config
 
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+
+STATUS_EVENTS = {'min_found': 'MIN found',
+                 'saddle_found': 'SADDLE found',
+                 'stationary_found': 'Stationary point found',
+                 'dissociate': 'dissociate'}
+
+
+# Columns of OPTJob.metrics: values (float64) and convergence flags (bool, column + '_conv')
+OPT_VALUE_COLUMNS = ('energy', 'energy1', 'energy2', 'spin2', 'lambda', 'trust_radii', 'step_radii',
+                     'maximum_force', 'maximum_force_th', 'rms_force', 'rms_force_th',
+                     'maximum_displacement', 'maximum_displacement_th', 'rms_displacement', 'rms_displacement_th')
+OPT_CONVERGENCE_COLUMNS = ('maximum_force', 'rms_force', 'maximum_displacement', 'rms_displacement')
+# (column, title) of the panels of OPTJob.draw_plot
+OPT_PLOT_PANELS = (('energy', 'Energy'), ('energy1', 'E1'), ('energy2', 'E2'), ('maximum_force', 'Max Force'),
+                   ('rms_force', 'RMS Force'), ('maximum_displacement', 'Max Displacement'),
+                   ('rms_displacement', 'RMS Displacement'))
+
+OPT_METRICS_DTYPE = np.dtype([(column, np.float64) for column in OPT_VALUE_COLUMNS] +
+                             [(column + '_conv', np.bool_) for column in OPT_CONVERGENCE_COLUMNS])
+
+
+class _MetricList:
+    """
+    *_list attribute of OPTJob (Decimal, float in fast numeric mode, or bool list of a metrics column), created on
+    first access
+    """
+    def __init__(self, column: str):
+        self.column: str = column
+
+    def __get__(self, job: Optional['OPTJob'], owner=None):
+        if job is None:
+            return self
+        return job._get_metric_list(self.column)
+
 
 class OPTJob:
-    def __init__(self, opt_block_data: List[str], frozen_atom_coordinates: Optional[List[str]] = None):
+    energy_list = _MetricList('energy')
+    energy1_list = _MetricList('energy1')
+    energy2_list = _MetricList('energy2')
+    spin2_list = _MetricList('spin2')
+    lambda_list = _MetricList('lambda')
+    trust_radii_list = _MetricList('trust_radii')
+    step_radii_list = _MetricList('step_radii')
+    maximum_force_list = _MetricList('maximum_force')
+    maximum_force_th_list = _MetricList('maximum_force_th')
+    maximum_force_conv_list = _MetricList('maximum_force_conv')
+    rms_force_list = _MetricList('rms_force')
+    rms_force_th_list = _MetricList('rms_force_th')
+    rms_force_conv_list = _MetricList('rms_force_conv')
+    maximum_displacement_list = _MetricList('maximum_displacement')
+    maximum_displacement_th_list = _MetricList('maximum_displacement_th')
+    maximum_displacement_conv_list = _MetricList('maximum_displacement_conv')
+    rms_displacement_list = _MetricList('rms_displacement')
+    rms_displacement_th_list = _MetricList('rms_displacement_th')
+    rms_displacement_conv_list = _MetricList('rms_displacement_conv')
+
+    def __init__(self, opt_block_data: Sequence[str], frozen_atom_coordinates: FrozenAtomsSource = None,
+                 events: Optional[List[LogEvent]] = None, numeric_mode: str = NUMERIC_EXACT):
+        """
+        :param opt_block_data: lines from the OPT separator
+        :param events: events of opt_block_data (line offsets relative to the block). Scanned here if not given.
+        :param numeric_mode: values are Decimal (exact) or float (fast; the value text is not kept)
+        """
 
         assert (opt_block_data[0].startswith('OPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPT'))
 
-        self.row_data: List[str] = copy.deepcopy(opt_block_data)
+        frozen_atom_coordinates = to_frozen_atoms(frozen_atom_coordinates)
+        self.row_data: Sequence[str] = opt_block_data
         self.num_atom: int = -1
-        self.structure_list: List[Structure] = []
-        self.energy_list: List[Decimal] = []
-        self.energy1_list: List[Decimal] = []
-        self.energy2_list: List[Decimal] = []
-        self.spin2_list: List[Decimal] = []
-        self.lambda_list: List[Decimal] = []
-        self.trust_radii_list: List[Decimal] = []
-        self.step_radii_list: List[Decimal] = []
-        self.maximum_force_list: List[Decimal] = []
-        self.maximum_force_th_list: List[Decimal] = []
-        self.maximum_force_conv_list: List[Decimal] = []
-        self.rms_force_list: List[Decimal] = []
-        self.rms_force_th_list: List[Decimal] = []
-        self.rms_force_conv_list: List[Decimal] = []
-        self.maximum_displacement_list: List[Decimal] = []
-        self.maximum_displacement_th_list: List[Decimal] = []
-        self.maximum_displacement_conv_list: List[Decimal] = []
-        self.rms_displacement_list: List[Decimal] = []
-        self.rms_displacement_th_list: List[Decimal] = []
-        self.rms_displacement_conv_list: List[Decimal] = []
+        self.trajectory: Trajectory = Trajectory.from_lines([], [], frozen_atom_coordinates)  # structures of iterations
+        self.metrics: np.ndarray = np.zeros(0, dtype=OPT_METRICS_DTYPE)  # columnar table of iteration values
+        self._metrics_buffer: np.ndarray = self.metrics  # metrics = _metrics_buffer[:num_steps] (see extend)
+        self._metric_text: Dict[str, List[str]] = {column: [] for column in OPT_VALUE_COLUMNS}  # for exact Decimal
+        self._metric_text_start: int = 0  # step of _metric_text[column][0] (text of older steps is dropped if fast)
+        self._metric_lists: Dict[str, list] = {}  # cache for *_list attributes
         self.optimized_structure: Optional[Structure] = None
-        self.optimized_energy: Optional[Decimal] = None
-        self.optimized_energy1: Optional[Decimal] = None
-        self.optimized_energy2: Optional[Decimal] = None
-        self.optimized_spin2: Optional[Decimal] = None
+        self.optimized_energy: Optional[Union[Decimal, float]] = None
+        self.optimized_energy1: Optional[Union[Decimal, float]] = None
+        self.optimized_energy2: Optional[Union[Decimal, float]] = None
+        self.optimized_spin2: Optional[Union[Decimal, float]] = None
         self.status: str = 'unfinished'  # unfinished, MIN found, SADDLE found, finished without MIN/SADDLE
+        self._parsed_lines: int = 0  # lines before this offset have been read (for extend)
+        self._finished: bool = False  # the closing separator has been read
 
-        self.frozen_atom_coordinates: Optional[List[str]] = frozen_atom_coordinates
+        self.frozen_atom_coordinates: Optional[FrozenAtoms] = frozen_atom_coordinates
+        self.numeric_mode: str = numeric_mode
 
-        self._parse_row_data()  # main process: read row data and set value list.
-        self._convergence_check()  # fill *_conv_list with True/False
+        if events is None:
+            events = list(scan_log_events(self.row_data))
+        self._parse_row_data(events)  # main process: read row data and set value text.
+        self._build_metrics()  # convert value text to self.metrics and fill *_conv columns with True/False
 
         self.name: Optional[str] = None
 
-    def _set_num_atom(self):
+    def extend(self, opt_block_data: Sequence[str], events: Optional[List[LogEvent]] = None):
+        """
+        read lines appended to the block of a running job. Only the new part is parsed.
+        :param opt_block_data: lines from the OPT separator (the same start as before, longer end)
+        :param events: events of opt_block_data (line offsets relative to the block). Scanned here if not given.
+        """
+        if self._finished:
+            return
+        self.row_data = opt_block_data
+        if events is None:
+            events = list(scan_log_events(self.row_data))
+        self._parse_row_data(events)
+        self._build_metrics()
+
+    def _set_num_atom(self, events: List[LogEvent]):
         """
         set self.num_atom from self.row_data
         """
-        for (i, line) in enumerate(self.row_data):
-            if line.startswith('# ITR. 0'):
-                start_line_init = i
-            elif 'Item' in line and 'Value' in line and 'Threshold' in line:
-                self.num_atom = i - 1 - start_line_init
+        for event in events:
+            if event.kind == 'itr' and event.text.startswith('# ITR. 0'):
+                start_line_init = event.line
+                for i in range(start_line_init + 1, len(self.row_data)):
+                    line = self.row_data[i]
+                    if 'Item' in line and 'Value' in line and 'Threshold' in line:
+                        self.num_atom = i - 1 - start_line_init
+                        break
                 break
 
-    def _parse_row_data(self):
+    def __getstate__(self) -> dict:
+        # the spare part of the buffer and the cache of *_list attributes are not pickled
+        state = self.__dict__.copy()
+        state['_metrics_buffer'] = self.metrics
+        state['_metric_lists'] = {}
+        return state
+
+    @profiled('OPTJob', lambda job: {'structures': len(job.trajectory)})
+    def _parse_row_data(self, events: List[LogEvent]):
         """
-        read self.row_data
+        read self.row_data at the lines given by events
         :return:
         """
 
-        self._set_num_atom()
-        for (i, line) in enumerate(self.row_data):
-            if line.startswith('# ITR. '):
-                self.structure_list.append(Structure(self.row_data[i + 1:i + 1 + self.num_atom], name=line.strip(),
-                                                     frozen_atom_coordinates=self.frozen_atom_coordinates))
-                # energy and bare energy
-                assert 'ENERGY' in self.row_data[i + self.num_atom + 2].upper()
-                self.energy_list.append(Decimal(self.row_data[i + self.num_atom + 2].strip().split()[1]))
-                if '(' in self.row_data[i + self.num_atom + 2] and ':' in self.row_data[i + self.num_atom + 2]:
-                    # Only in GRRM23
-                    # ENERGY      	-756.738121237908	                          (-756.737782526435 : -756.738567916493)
-                    #                                                                   e1               e2
-                    e1, e2 = self.row_data[i + self.num_atom + 2].split('(')[1].split(':')
-                    self.energy1_list.append(Decimal(e1.strip()))
-                    self.energy2_list.append(Decimal(e2.strip().rstrip(')').strip()))
-                else:
-                    self.energy1_list.append(Decimal('0.000000000000'))  # for GRRM 17: (e1:e2) is not printed
-                    self.energy2_list.append(Decimal('0.000000000000'))
-                # spin**2
-                assert 'SPIN' in self.row_data[i + self.num_atom + 3].upper()
-                self.spin2_list.append(Decimal(self.row_data[i + self.num_atom + 3].strip().split()[1]))
-                assert 'LAMDA' in self.row_data[i + self.num_atom + 4].upper()
-                self.lambda_list.append(Decimal(self.row_data[i + self.num_atom + 4].strip().split()[1]))
-                assert 'TRUST RADII' in self.row_data[i + self.num_atom + 5].upper()
-                self.trust_radii_list.append(Decimal(self.row_data[i + self.num_atom + 5].strip().split()[2]))
-                assert 'STEP RADII' in self.row_data[i + self.num_atom + 6]
-                self.step_radii_list.append(Decimal(self.row_data[i + self.num_atom + 6].strip().split()[2]))
-                assert 'MAXIMUM' in self.row_data[i + self.num_atom + 7].upper()
-                assert 'FORCE' in self.row_data[i + self.num_atom + 7].upper()
-                self.maximum_force_list.append(Decimal(self.row_data[i + self.num_atom + 7].strip().split()[2]))
-                self.maximum_force_th_list.append(Decimal(self.row_data[i + self.num_atom + 7].strip().split()[3]))
-                assert 'RMS' in self.row_data[i + self.num_atom + 8].upper()
-                assert 'FORCE' in self.row_data[i + self.num_atom + 8].upper()
-                self.rms_force_list.append(Decimal(self.row_data[i + self.num_atom + 8].strip().split()[2]))
-                self.rms_force_th_list.append(Decimal(self.row_data[i + self.num_atom + 8].strip().split()[3]))
-                assert 'MAXIMUM' in self.row_data[i + self.num_atom + 9].upper()
-                assert 'DISPLACEMENT' in self.row_data[i + self.num_atom + 9].upper()
-                self.maximum_displacement_list.append(Decimal(self.row_data[i + self.num_atom + 9].strip().split()[2]))
-                self.maximum_displacement_th_list.append(Decimal(self.row_data[i + self.num_atom + 9].strip().split()[3]))
-                assert 'RMS' in self.row_data[i + self.num_atom + 10].upper()
-                assert 'DISPLACEMENT' in self.row_data[i + self.num_atom + 10].upper()
-                self.rms_displacement_list.append(Decimal(self.row_data[i + self.num_atom + 10].strip().split()[2]))
-                self.rms_displacement_th_list.append(Decimal(self.row_data[i + self.num_atom + 10].strip().split()[3]))
-            if line.startswith('Optimized structure'):
+        if self.num_atom == -1:
+            self._set_num_atom(events)
+        frame_lines = []
+        frame_names = []
+        for event in events:
+            i = event.line
+            if i < self._parsed_lines:
+                continue
+            if event.kind == 'itr':
+                if self.num_atom == -1 or i + self.num_atom + 10 >= len(self.row_data):
+                    break  # not written yet (running job)
+                frame_lines.append(self.row_data[i + 1:i + 1 + self.num_atom])
+                frame_names.append(event.text.strip())
+                self._parse_iteration(i)
+            elif event.kind == 'optimized':
+                if i + self.num_atom + 2 >= len(self.row_data):
+                    break  # not written yet (running job)
                 assert self.optimized_structure is None
                 self.optimized_structure = Structure(self.row_data[i + 1:i + 1 + self.num_atom],
                                                      frozen_atom_coordinates=self.frozen_atom_coordinates)
                 assert 'ENERGY' in self.row_data[i + self.num_atom + 1].upper()
-                self.optimized_energy = Decimal(self.row_data[i + self.num_atom + 1].strip().split()[2])
+                self.optimized_energy = to_number(self.row_data[i + self.num_atom + 1].strip().split()[2],
+                                                  self.numeric_mode)
                 if '(' in self.row_data[i + self.num_atom + 1] and ':' in self.row_data[i + self.num_atom + 1]:
                     e1, e2 = self.optimized_bare_energy = self.row_data[i + self.num_atom + 1].split('(')[1].split(':')
-                    self.optimized_energy1 = Decimal(e1.strip())
-                    self.optimized_energy2 = Decimal(e2.strip().rstrip(')').strip())
+                    self.optimized_energy1 = to_number(e1.strip(), self.numeric_mode)
+                    self.optimized_energy2 = to_number(e2.strip().rstrip(')').strip(), self.numeric_mode)
                 else:
-                    self.optimized_energy1 = Decimal('0.000000000000')  # for GRRM 17: (e1:e2) is not printed
-                    self.optimized_energy2 = Decimal('0.000000000000')  # for GRRM 17: (e1:e2) is not printed
+                    # for GRRM 17: (e1:e2) is not printed
+                    self.optimized_energy1 = to_number('0.000000000000', self.numeric_mode)
+                    self.optimized_energy2 = to_number('0.000000000000', self.numeric_mode)
                 assert 'SPIN' in self.row_data[i + self.num_atom + 2].upper()
-                self.optimized_spin2 = Decimal(self.row_data[i + self.num_atom + 2].strip().split()[2])
-            if line.startswith('Minimum point was found'):
-                assert self.optimized_structure is not None
-                self.status = 'MIN found'
-            if line.startswith('1st-Order Saddle point was found'):
-                assert self.optimized_structure is not None
-                self.status = 'SADDLE found'
-            if line.startswith('Stationary point was found'):
-                assert self.optimized_structure is not None
-                self.status = 'Stationary point found'
-            if line.startswith('The structure is dissociating'):
-                self.status = 'dissociate'
-            if line.startswith('OPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPT'):
+                self.optimized_spin2 = to_number(self.row_data[i + self.num_atom + 2].strip().split()[2],
+                                                 self.numeric_mode)
+            elif event.kind in STATUS_EVENTS:
+                if event.kind != 'dissociate':
+                    assert self.optimized_structure is not None
+                self.status = STATUS_EVENTS[event.kind]
+            elif event.kind == 'opt':
                 if i == 0:
+                    self._parsed_lines = i + 1
                     continue
                 if self.status == 'unfinished':
                     self.status = 'not converged'
+                self._finished = True
                 break
+            self._parsed_lines = i + 1
+
+        self.trajectory.extend(frame_lines, frame_names)
+
+    def _parse_iteration(self, i: int):
+        """
+        read values (text) of one '# ITR. @' block starting at line i (structure is read as a part of trajectory)
+        """
+        text = self._metric_text
+        # energy and bare energy
+        assert 'ENERGY' in self.row_data[i + self.num_atom + 2].upper()
+        text['energy'].append(self.row_data[i + self.num_atom + 2].strip().split()[1])
+        if '(' in self.row_data[i + self.num_atom + 2] and ':' in self.row_data[i + self.num_atom + 2]:
+            # Only in GRRM23
+            # ENERGY      	-756.738121237908	                          (-756.737782526435 : -756.738567916493)
+            #                                                                   e1               e2
+            e1, e2 = self.row_data[i + self.num_atom + 2].split('(')[1].split(':')
+            text['energy1'].append(e1.strip())
+            text['energy2'].append(e2.strip().rstrip(')').strip())
+        else:
+            text['energy1'].append('0.000000000000')  # for GRRM 17: (e1:e2) is not printed
+            text['energy2'].append('0.000000000000')
+        # spin**2
+        assert 'SPIN' in self.row_data[i + self.num_atom + 3].upper()
+        text['spin2'].append(self.row_data[i + self.num_atom + 3].strip().split()[1])
+        assert 'LAMDA' in self.row_data[i + self.num_atom + 4].upper()
+        text['lambda'].append(self.row_data[i + self.num_atom + 4].strip().split()[1])
+        assert 'TRUST RADII' in self.row_data[i + self.num_atom + 5].upper()
+        text['trust_radii'].append(self.row_data[i + self.num_atom + 5].strip().split()[2])
+        assert 'STEP RADII' in self.row_data[i + self.num_atom + 6]
+        text['step_radii'].append(self.row_data[i + self.num_atom + 6].strip().split()[2])
+        assert 'MAXIMUM' in self.row_data[i + self.num_atom + 7].upper()
+        assert 'FORCE' in self.row_data[i + self.num_atom + 7].upper()
+        text['maximum_force'].append(self.row_data[i + self.num_atom + 7].strip().split()[2])
+        text['maximum_force_th'].append(self.row_data[i + self.num_atom + 7].strip().split()[3])
+        assert 'RMS' in self.row_data[i + self.num_atom + 8].upper()
+        assert 'FORCE' in self.row_data[i + self.num_atom + 8].upper()
+        text['rms_force'].append(self.row_data[i + self.num_atom + 8].strip().split()[2])
+        text['rms_force_th'].append(self.row_data[i + self.num_atom + 8].strip().split()[3])
+        assert 'MAXIMUM' in self.row_data[i + self.num_atom + 9].upper()
+        assert 'DISPLACEMENT' in self.row_data[i + self.num_atom + 9].upper()
+        text['maximum_displacement'].append(self.row_data[i + self.num_atom + 9].strip().split()[2])
+        text['maximum_displacement_th'].append(self.row_data[i + self.num_atom + 9].strip().split()[3])
+        assert 'RMS' in self.row_data[i + self.num_atom + 10].upper()
+        assert 'DISPLACEMENT' in self.row_data[i + self.num_atom + 10].upper()
+        text['rms_displacement'].append(self.row_data[i + self.num_atom + 10].strip().split()[2])
+        text['rms_displacement_th'].append(self.row_data[i + self.num_atom + 10].strip().split()[3])
+
+    @property
+    def structure_list(self) -> Trajectory:
+        return self.trajectory
+
+    def _build_metrics(self):
+        """
+        append rows of iterations read after the last call to self.metrics
+        """
+        start = len(self.metrics)
+        text_start = self._metric_text_start
+        num_steps = text_start + len(self._metric_text['energy'])
+        if num_steps == start:
+            return
+        if num_steps > len(self._metrics_buffer):
+            buffer = np.zeros(num_steps if start == 0 else max(num_steps, 2 * len(self._metrics_buffer)),
+                              dtype=OPT_METRICS_DTYPE)
+            buffer[:start] = self.metrics
+            self._metrics_buffer = buffer
+        self.metrics = self._metrics_buffer[:num_steps]
+        for column in OPT_VALUE_COLUMNS:
+            assert text_start + len(self._metric_text[column]) == num_steps
+            self.metrics[column][start:] = np.array(self._metric_text[column][start - text_start:],
+                                                    dtype=str).astype(np.float64)
+        self._convergence_check(start)
+        self._metric_lists = {}
+        if self.numeric_mode == NUMERIC_FAST:
+            # values are kept only in self.metrics
+            self._metric_text = {column: [] for column in OPT_VALUE_COLUMNS}
+            self._metric_text_start = num_steps
+
+    def _convergence_check(self, start: int = 0):
+        rows = self.metrics[start:]
+        for column in OPT_CONVERGENCE_COLUMNS:
+            rows[column + '_conv'] = rows[column] <= rows[column + '_th']
+
+    def _get_metric_list(self, column: str) -> list:
+        metric_list = self._metric_lists.get(column)
+        if metric_list is None:
+            if column in self._metric_text and self.numeric_mode != NUMERIC_FAST:
+                metric_list = [Decimal(value) for value in self._metric_text[column]]
+            else:
+                metric_list = self.metrics[column].tolist()
+            self._metric_lists[column] = metric_list
+        return metric_list
+
+    def get_step_values(self, step: int) -> Dict[str, Union[Decimal, float, bool]]:
+        """
+        return values of one iteration: {column: Decimal or float (or bool for *_conv)}
+        """
+        if self.numeric_mode == NUMERIC_FAST:
+            values = {column: float(self.metrics[column][step]) for column in OPT_VALUE_COLUMNS}
+        else:
+            values = {column: Decimal(self._metric_text[column][step]) for column in OPT_VALUE_COLUMNS}
+        for column in OPT_CONVERGENCE_COLUMNS:
+            values[column + '_conv'] = bool(self.metrics[column + '_conv'][step])
+        return values
 
-    def _convergence_check(self):
-        self.maximum_force_conv_list = []
-        self.rms_force_conv_list = []
-        self.maximum_displacement_conv_list = []
-        self.rms_displacement_conv_list = []
-        for i in range(len(self.rms_force_list)):
-            self.maximum_force_conv_list.append(self.maximum_force_list[i] <= self.maximum_force_th_list[i])
-            self.rms_force_conv_list.append(self.rms_force_list[i] <= self.rms_force_th_list[i])
-            self.maximum_displacement_conv_list.append(self.maximum_displacement_list[i] <= self.maximum_displacement_th_list[i])
-            self.rms_displacement_conv_list.append(self.rms_displacement_list[i] <= self.rms_displacement_th_list[i])
+    @property
+    def num_steps(self) -> int:
+        return len(self.metrics)
 
     def save_xyz(self, file: str):
         with open(file, 'w') as f:
@@ -173,52 +321,36 @@ class OPTJob:
                 f.write(self.structure_list[i].get_string(include_frozen_atoms=include_frozen_atom))
             f.write('\n')
 
-    def show_plot(self):
+    def draw_plot(self, figure: 'Figure', step: Optional[int] = None):
+        """
+        draw energies, forces and displacements of each step on figure (cleared first)
+        :param step: the step to be marked (optional)
+        """
+        figure.clear()
+        xs = np.arange(len(self.metrics))
+        for (i, (column, title)) in enumerate(OPT_PLOT_PANELS):
+            axes = figure.add_subplot(len(OPT_PLOT_PANELS), 1, i + 1)
+            axes.set_title(title)
+            plot_series(axes, xs, self.metrics[column], highlight=step)
+        figure.tight_layout()
 
-        xs = range(len(self.energy_list))
-
-        plt.figure('Optimization', figsize=config.OPT_PLOT_SIZE)
-        # energy
-        plt.subplot(7, 1, 1)
-        plt.title('Energy')
-        plt.ylim(*calc_limit_for_plot(self.energy_list))
-        plt.plot(xs, self.energy_list)
-        # E1 (bare energy or state1 1)
-        plt.subplot(7, 1, 2)
-        plt.title('E1')
-        plt.ylim(*calc_limit_for_plot(self.energy1_list))
-        plt.plot(xs, self.energy1_list)
-        # E2 (bare energy or state1 1)
-        plt.subplot(7, 1, 3)
-        plt.title('E2')
-        plt.ylim(*calc_limit_for_plot(self.energy2_list))
-        plt.plot(xs, self.energy2_list)
-        # Maximum Force
-        plt.subplot(7, 1, 4)
-        plt.title('Max Force')
-        plt.ylim(*calc_limit_for_plot(self.maximum_force_list))
-        plt.plot(xs, self.maximum_force_list)
-        # RMS Force
-        plt.subplot(7, 1, 5)
-        plt.title('RMS Force')
-        plt.ylim(*calc_limit_for_plot(self.rms_force_list))
-        plt.plot(xs, self.rms_force_list)
-        # Maximum Displacement
-        plt.subplot(7, 1, 6)
-        plt.title('Max Displacement')
-        plt.ylim(*calc_limit_for_plot(self.maximum_displacement_list))
-        plt.plot(xs, self.maximum_displacement_list)
-        # RMS Force
-        plt.subplot(7, 1, 7)
-        plt.title('RMS Displacement')
-        plt.ylim(*calc_limit_for_plot(self.rms_displacement_list))
-        plt.plot(xs, self.rms_displacement_list)
-
-        plt.tight_layout()
+    def show_plot(self):
+        plt = pyplot()
+        figure = plt.figure('Optimization', figsize=config.OPT_PLOT_SIZE)
+        self.draw_plot(figure)
         plt.show()
 
         return True
 
+    def refresh_plot(self) -> bool:
+        """
+        redraw the plot window with the current data if it is open (e.g. after refresh of a running job)
+        :return: True if redrawn
+        """
+        if not pyplot_figure_exists('Optimization'):
+            return False
+        return self.show_plot()
+
     @property
     def type(self) -> str:
         return 'opt'
\ No newline at end of file
@@ -0,0 +1,42 @@
+from concurrent.futures import Executor, Future
+from typing import Any, List, Optional, Sequence
+
+from grrmsv.logbuffer import LogBuffer, BlockView
+from grrmsv.tokenizer import LogEvent
+
+
+def submit_block(executor: Optional[Executor], job_class: type, block: Sequence[str], events: List[LogEvent],
+                 name: Optional[str] = None, **options) -> Future:
+    """
+    parse a block with job_class (e.g. OPTJob, LUPPath) in a worker process.
+    Only the lines of the block are sent to the worker. The result is a job whose views refer to the buffer of block
+    (see LogBuffer; restored when the result is unpickled in this process).
+    If executor is None (or block is not a BlockView), the block is parsed here and a finished Future is returned.
+    :param events: events of the block (line offsets relative to the block)
+    :param name: set to the name attribute of the job (if not None)
+    :param options: other keyword arguments of job_class (frozen_atom_coordinates etc.)
+    """
+    if executor is None or not isinstance(block, BlockView):
+        future = Future()
+        future.set_result(_parse_view(job_class, block, events, name, options))
+        return future
+    lines = block.buffer.lines[block.start:block.end]
+    return executor.submit(_parse_block, job_class, lines, block.buffer.token, block.buffer.offset + block.start,
+                           events, name, options)
+
+
+def _parse_block(job_class: type, lines: List[str], token: str, offset: int, events: List[LogEvent],
+                 name: Optional[str], options: dict) -> Any:
+    """
+    (worker process) parse lines of a block
+    """
+    buffer = LogBuffer(lines, offset=offset, token=token)
+    return _parse_view(job_class, buffer.view(), events, name, options)
+
+
+def _parse_view(job_class: type, block: Sequence[str], events: List[LogEvent], name: Optional[str],
+                options: dict) -> Any:
+    job = job_class(block, events=events, **options)
+    if name is not None:
+        job.name = name
+    return job
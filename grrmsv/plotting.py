@@ -0,0 +1,127 @@
+import math
+import sys
+from decimal import Decimal
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from grrmsv.utils import calc_limit_for_plot
+
+import config
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+
+
+def pyplot():
+    """
+    matplotlib.pyplot, imported on the first call (importing pyplot sets up a GUI backend, which is slow:
+    modules of this package do not import matplotlib until a plot is drawn)
+    """
+    import matplotlib.pyplot
+    return matplotlib.pyplot
+
+
+def pyplot_figure_exists(name: str) -> bool:
+    """
+    True if a pyplot figure of name is open (pyplot is not imported for this check)
+    """
+    plt = sys.modules.get('matplotlib.pyplot')
+    return plt is not None and plt.fignum_exists(name)
+
+
+def to_float_array(values: Union[Sequence[Union[Decimal, float, int]], np.ndarray]) -> np.ndarray:
+    """
+    float64 array of values (Decimal, float or int list, or array), for matplotlib
+    """
+    if isinstance(values, np.ndarray):
+        return values.astype(np.float64, copy=False)
+    return np.fromiter((float(value) for value in values), dtype=np.float64, count=len(values))
+
+
+def lttb_indices(xs: np.ndarray, ys: np.ndarray, num_points: int) -> np.ndarray:
+    """
+    indices of points kept by Largest-Triangle-Three-Buckets downsampling. The first and last points are kept,
+    and from each bucket of the rest, the point making the largest triangle with the point kept before and
+    the average of the next bucket (so that peaks and turns of the series are kept).
+    :param xs: x values (finite, in drawing order)
+    :param ys: y values (finite)
+    :param num_points: number of points to keep (all points if len(xs) <= num_points)
+    """
+    n = len(xs)
+    if num_points >= n or num_points < 3:
+        return np.arange(n)
+    edges = (np.arange(num_points - 1) * ((n - 2) / (num_points - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    indices = np.empty(num_points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    kept = 0
+    for i in range(num_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = xs[end:next_end].mean()
+        next_y = ys[end:next_end].mean()
+        areas = np.abs((xs[kept] - next_x) * (ys[start:end] - ys[kept]) -
+                       (xs[kept] - xs[start:end]) * (next_y - ys[kept]))
+        kept = start + int(np.argmax(areas))
+        indices[i + 1] = kept
+    return indices
+
+
+def downsample(xs: np.ndarray, ys: np.ndarray, num_points: int, keep: Iterable[int] = ()) -> np.ndarray:
+    """
+    sorted indices of the points to be drawn: LTTB (see lttb_indices) of the finite points, the minimum and maximum
+    of ys, and the points of keep (e.g. the selected step)
+    """
+    finite = np.flatnonzero(np.isfinite(xs) & np.isfinite(ys))
+    keep = [i for i in keep if 0 <= i < len(xs)]
+    if len(finite) <= num_points:
+        return np.union1d(finite, np.array(keep, dtype=np.int64))
+    indices = finite[lttb_indices(xs[finite], ys[finite], num_points)]
+    extremes = finite[[int(np.argmin(ys[finite])), int(np.argmax(ys[finite]))]]
+    return np.union1d(indices, np.concatenate([extremes, np.array(keep, dtype=np.int64)]))
+
+
+def plot_series(axes: 'Axes', xs: Union[Sequence, np.ndarray], ys: Union[Sequence, np.ndarray],
+                scatter: bool = False, labels: Optional[Sequence] = None, highlight: Optional[int] = None,
+                max_points: Optional[int] = None):
+    """
+    draw a series on axes as one artist (line or scatter), downsampled to max_points. The y range is set from all
+    points (as calc_limit_for_plot).
+    :param labels: labels of each point (e.g. # ITR.), drawn at some of the drawn points (see draw_labels)
+    :param highlight: index of the point to be marked (e.g. the selected step)
+    :param max_points: config.PLOT_MAX_POINTS if None
+    """
+    xs = to_float_array(xs)
+    ys = to_float_array(ys)
+    keep = [highlight] if highlight is not None else []
+    indices = downsample(xs, ys, config.PLOT_MAX_POINTS if max_points is None else max_points, keep)
+    if scatter:
+        axes.scatter(xs[indices], ys[indices])
+    else:
+        axes.plot(xs[indices], ys[indices])
+    finite_ys = ys[np.isfinite(ys)]
+    if len(finite_ys) > 0:
+        axes.set_ylim(*calc_limit_for_plot(finite_ys))
+    if labels is not None:
+        draw_labels(axes, xs[indices], ys[indices], [labels[i] for i in indices])
+    if highlight is not None and 0 <= highlight < len(xs):
+        axes.plot([xs[highlight]], [ys[highlight]], 'o', color='red', zorder=3)
+
+
+def draw_labels(axes: 'Axes', xs: np.ndarray, ys: np.ndarray, labels: List, max_labels: Optional[int] = None):
+    """
+    label points. Labels are thinned to max_labels (every k-th point and the last one) and added together,
+    so that the figure is drawn once for all of them.
+    :param max_labels: config.PLOT_MAX_LABELS if None
+    """
+    if len(labels) == 0:
+        return
+    max_labels = config.PLOT_MAX_LABELS if max_labels is None else max_labels
+    step = max(1, math.ceil(len(labels) / max(max_labels, 1)))
+    indices = list(range(0, len(labels), step))
+    if indices[-1] != len(labels) - 1:
+        indices.append(len(labels) - 1)
+    for i in indices:
+        axes.annotate(str(labels[i]), xy=(float(xs[i]), float(ys[i])))
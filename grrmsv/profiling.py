@@ -0,0 +1,230 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class StageRecord:
+    """
+    wall time, line count and object counts of one parse stage (a call of a parse method, a job block etc.)
+    """
+
+    def __init__(self, name: str, depth: int, parent: int, label: Optional[str] = None, lines: Optional[int] = None):
+        """
+        :param name: stage name (class name for job parsers, e.g. OPTJob)
+        :param depth: nesting level (0: top)
+        :param parent: index of the parent record in ParseProfiler.records (-1 for a top stage)
+        :param label: block name etc. (optional)
+        :param lines: number of lines handled in the stage (optional)
+        """
+        self.name: str = name
+        self.depth: int = depth
+        self.parent: int = parent
+        self.label: Optional[str] = label
+        self.lines: Optional[int] = lines
+        self.counts: Dict[str, int] = {}
+        self.elapsed: float = 0.0  # seconds (including child stages)
+        self.child_elapsed: float = 0.0
+
+    def count(self, **counts: int):
+        """
+        add object counts (structures, modes, jobs etc.)
+        """
+        for (key, value) in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+
+    @property
+    def self_elapsed(self) -> float:
+        """
+        seconds spent in the stage itself (excluding child stages)
+        """
+        return self.elapsed - self.child_elapsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'name': self.name, 'label': self.label, 'depth': self.depth, 'parent': self.parent,
+                'elapsed': self.elapsed, 'self_elapsed': self.self_elapsed, 'lines': self.lines,
+                'counts': dict(self.counts)}
+
+
+class _NullRecord:
+    """
+    record of a stage when no profiler is active (lines and counts are ignored)
+    """
+
+    @property
+    def lines(self) -> Optional[int]:
+        return None
+
+    @lines.setter
+    def lines(self, value: Optional[int]):
+        pass
+
+    def count(self, **counts: int):
+        pass
+
+
+_NULL_RECORD = _NullRecord()
+
+
+class ParseProfiler:
+    """
+    Recorder of parse stages. Stages are recorded while the profiler is active in the thread (see activate).
+    Parsers mark their stages with the stage function or the profiled decorator of this module, which do nothing
+    if no profiler is active.
+    """
+
+    def __init__(self):
+        self.records: List[StageRecord] = []  # in the order of start
+        self._stack: List[int] = []  # indices of open records
+
+    @contextmanager
+    def stage(self, name: str, label: Optional[str] = None, lines: Optional[int] = None,
+              **counts: int) -> Iterator[StageRecord]:
+        """
+        record the block of with statement as a stage. The record is yielded to add counts.
+        """
+        parent = self._stack[-1] if len(self._stack) > 0 else -1
+        record = StageRecord(name, len(self._stack), parent, label, lines)
+        record.count(**counts)
+        self.records.append(record)
+        self._stack.append(len(self.records) - 1)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.elapsed = time.perf_counter() - start
+            self._stack.pop()
+            if parent >= 0:
+                self.records[parent].child_elapsed += record.elapsed
+
+    @property
+    def total_elapsed(self) -> float:
+        return sum(record.elapsed for record in self.records if record.depth == 0)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        totals for each stage name: calls, elapsed, self_elapsed (seconds), lines and counts
+        """
+        summary: Dict[str, Dict[str, Any]] = {}
+        for record in self.records:
+            total = summary.setdefault(record.name, {'calls': 0, 'elapsed': 0.0, 'self_elapsed': 0.0, 'lines': 0,
+                                                     'counts': {}})
+            total['calls'] += 1
+            total['self_elapsed'] += record.self_elapsed
+            # nested stages of the same name (e.g. subjobs of LUP) are not counted twice
+            if not self._has_ancestor(record, record.name):
+                total['elapsed'] += record.elapsed
+            if record.lines is not None:
+                total['lines'] += record.lines
+            for (key, value) in record.counts.items():
+                total['counts'][key] = total['counts'].get(key, 0) + value
+        return summary
+
+    def _has_ancestor(self, record: StageRecord, name: str) -> bool:
+        while record.parent >= 0:
+            record = self.records[record.parent]
+            if record.name == name:
+                return True
+        return False
+
+    def report(self) -> Dict[str, Any]:
+        """
+        structured report: total elapsed time, all stages (in the order of start) and the summary by stage name
+        """
+        return {'total_elapsed': self.total_elapsed, 'stages': [record.to_dict() for record in self.records],
+                'summary': self.summary()}
+
+    def format_report(self, max_depth: int = 2) -> List[str]:
+        """
+        report as text lines: stages up to max_depth (as a tree) and the summary by stage name (slowest first)
+        """
+        lines = ['parse profile: {:.3f} s'.format(self.total_elapsed)]
+        for record in self.records:
+            if record.depth > max_depth:
+                continue
+            text = '{:}{:}{:}: {:.3f} s (self {:.3f} s)'.format(
+                '  ' * (record.depth + 1), record.name, ' [' + record.label + ']' if record.label else '',
+                record.elapsed, record.self_elapsed)
+            lines.append(text + self._format_counts(record.lines, record.counts))
+        lines.append('  summary by stage (self time):')
+        summary = sorted(self.summary().items(), key=lambda item: item[1]['self_elapsed'], reverse=True)
+        for (name, total) in summary:
+            text = '    {:}: {:} calls, {:.3f} s (self {:.3f} s)'.format(name, total['calls'], total['elapsed'],
+                                                                       total['self_elapsed'])
+            lines.append(text + self._format_counts(total['lines'] or None, total['counts']))
+        return lines
+
+    @staticmethod
+    def _format_counts(lines: Optional[int], counts: Dict[str, int]) -> str:
+        items = ([] if lines is None else ['{:} lines'.format(lines)]) + \
+                ['{:} {:}'.format(value, key) for (key, value) in counts.items()]
+        return ', ' + ', '.join(items) if len(items) > 0 else ''
+
+    def __repr__(self) -> str:
+        return 'ParseProfiler(stages={:}, total_elapsed={:.3f})'.format(len(self.records), self.total_elapsed)
+
+
+# active profilers of each thread (the last one records)
+_local = threading.local()
+
+
+def current_profiler() -> Optional[ParseProfiler]:
+    """
+    the active profiler of this thread, or None
+    """
+    profilers = getattr(_local, 'profilers', None)
+    return profilers[-1] if profilers else None
+
+
+@contextmanager
+def activate(profiler: Optional[ParseProfiler]) -> Iterator[Optional[ParseProfiler]]:
+    """
+    make profiler active in this thread during the with statement (nothing is done if profiler is None)
+    """
+    if profiler is None:
+        yield None
+        return
+    if getattr(_local, 'profilers', None) is None:
+        _local.profilers = []
+    _local.profilers.append(profiler)
+    try:
+        yield profiler
+    finally:
+        _local.profilers.pop()
+
+
+@contextmanager
+def stage(name: str, label: Optional[str] = None, lines: Optional[int] = None, **counts: int):
+    """
+    record the block of with statement as a stage of the active profiler. Without an active profiler, a record
+    which ignores counts is yielded.
+    """
+    profiler = current_profiler()
+    if profiler is None:
+        yield _NULL_RECORD
+        return
+    with profiler.stage(name, label, lines, **counts) as record:
+        yield record
+
+
+def profiled(name: str, counts: Optional[Callable[[Any], Dict[str, int]]] = None) -> Callable:
+    """
+    decorator of a parse method: each call is recorded as a stage of the active profiler.
+    The line count is len(self.row_data) (if the object has row_data).
+    :param counts: called with the object after the call, returns object counts (e.g. {'structures': 10})
+    """
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = current_profiler()
+            if profiler is None:
+                return method(self, *args, **kwargs)
+            row_data = getattr(self, 'row_data', None)
+            with profiler.stage(name, lines=len(row_data) if row_data is not None else None) as record:
+                result = method(self, *args, **kwargs)
+                if counts is not None:
+                    record.count(**counts(self))
+            return result
+        return wrapper
+    return decorator
@@ -1,68 +1,236 @@
 import numpy as np
 from decimal import Decimal
-from typing import Optional, List, Tuple, Union
+from typing import Optional, List, Tuple, Union, Sequence, Dict
+
+
+# Interned element symbols. Structures keep indices into this table instead of str objects.
+ELEMENT_TABLE: List[str] = []
+_ELEMENT_INDEX: Dict[str, int] = {}
+
+# Float formatting ('{:>20.12f}') reproduces the Decimal formatting of the text exactly when the text has
+# no more than 12 decimal places, no exponent and |value| < 8192 (rounding error of float64 < 0.5e-12).
+_FLOAT_EXACT_DECIMALS = 12
+_FLOAT_EXACT_LIMIT = 8192.0
+
+_LINE_FORMAT = '{0:<4} {1:>20.12f} {2:>20.12f} {3:>20.12f}'
+
+
+def element_index(atom: str) -> int:
+    """
+    return index of atom symbol in ELEMENT_TABLE (registered if not found)
+    """
+    index = _ELEMENT_INDEX.get(atom)
+    if index is None:
+        index = len(ELEMENT_TABLE)
+        ELEMENT_TABLE.append(atom)
+        _ELEMENT_INDEX[atom] = index
+    return index
+
+
+def is_float_exact(tokens: np.ndarray, values: np.ndarray) -> bool:
+    """
+    check whether float values reproduce the Decimal formatting of the original tokens (see _FLOAT_EXACT_LIMIT)
+    :param tokens: numeric strings (numpy str array)
+    :param values: tokens converted to float64 (same shape)
+    """
+    if values.size == 0:
+        return True
+    if not float(np.max(np.abs(values))) < _FLOAT_EXACT_LIMIT:  # also False for nan
+        return False
+    if (np.strings.find(tokens, 'e') >= 0).any() or (np.strings.find(tokens, 'E') >= 0).any():
+        return False
+    points = np.strings.find(tokens, '.')
+    decimals = np.where(points >= 0, np.strings.str_len(tokens) - points - 1, 0)
+    return bool(np.max(decimals) <= _FLOAT_EXACT_DECIMALS)
+
+
+class CoordinateBlock:
+    """
+    atoms and xyz coordinates read from lines of 'atom x y z'.
+    Internally, data are saved as element index array (N) and coordinate array (N, 3; float64).
+    [atom:str, x:Decimal, y:Decimal, z:Decimal] tuples are created from the original text only when requested.
+    """
+    __slots__ = ('element_indices', 'coordinates', 'float_exact', '_lines', '_decimal_tuples')
+
+    def __init__(self, lines: Sequence[str]):
+        rows = []
+        for line in lines:
+            terms = line.split()
+            if len(terms) == 0:
+                continue
+            if len(terms) < 4:
+                raise ValueError('Error reading structure line:', line.strip())
+            rows.append(terms)
+
+        self.element_indices: np.ndarray = np.array([element_index(terms[0].capitalize()) for terms in rows],
+                                                    dtype=np.uint16)
+        tokens = np.array([terms[1:4] for terms in rows], dtype=str).reshape(-1, 3)
+        try:
+            self.coordinates: np.ndarray = tokens.astype(np.float64)
+        except ValueError:
+            raise ValueError('Error reading structure lines:', ''.join(lines))
+        self._lines: Optional[Sequence[str]] = lines
+        self._decimal_tuples: Optional[List[Tuple[str, Decimal, Decimal, Decimal]]] = None
+        self.float_exact: bool = is_float_exact(tokens, self.coordinates)
+        if not self.float_exact:
+            # keep exact values now, because the text may be released later.
+            self._decimal_tuples = self._read_decimal_tuples()
+
+    @classmethod
+    def from_arrays(cls, element_indices: np.ndarray, coordinates: np.ndarray,
+                    lines: Optional[Sequence[str]] = None, float_exact: bool = True) -> 'CoordinateBlock':
+        """
+        construct from parsed arrays. lines (original text) are used to create Decimal values if given.
+        """
+        block = cls.__new__(cls)
+        block.element_indices = element_indices
+        block.coordinates = coordinates
+        block.float_exact = float_exact
+        block._lines = lines
+        block._decimal_tuples = None
+        if not float_exact:
+            block._decimal_tuples = block._read_decimal_tuples()
+        return block
+
+    @property
+    def num_atom(self) -> int:
+        return len(self.element_indices)
+
+    @property
+    def atoms(self) -> List[str]:
+        table = ELEMENT_TABLE
+        return [table[i] for i in self.element_indices.tolist()]
+
+    def _read_decimal_tuples(self) -> List[Tuple[str, Decimal, Decimal, Decimal]]:
+        decimal_tuples = []
+        for line in self._lines:
+            if line.strip() == '':
+                continue
+            atom, x, y, z, *_ = line.strip().split()
+            decimal_tuples.append((atom.strip().capitalize(), Decimal(x.strip()), Decimal(y.strip()), Decimal(z.strip())))
+        return decimal_tuples
+
+    def get_decimal_tuples(self) -> List[Tuple[str, Decimal, Decimal, Decimal]]:
+        if self._decimal_tuples is None:
+            try:
+                self._decimal_tuples = self._read_decimal_tuples()
+            except (RuntimeError, TypeError):
+                # the original text is not available (released): exact for float_exact data
+                self._decimal_tuples = [(atom, Decimal('{:.12f}'.format(x)), Decimal('{:.12f}'.format(y)),
+                                         Decimal('{:.12f}'.format(z)))
+                                        for (atom, (x, y, z)) in zip(self.atoms, self.coordinates.tolist())]
+        return self._decimal_tuples
+
+    def get_lines(self) -> List[str]:
+        """
+        return formatted lines without line feeds: 'atom x y z'
+        """
+        if self.float_exact:
+            return [_LINE_FORMAT.format(atom, x, y, z) for (atom, (x, y, z)) in zip(self.atoms, self.coordinates.tolist())]
+        else:
+            return [_LINE_FORMAT.format(*atom_coord) for atom_coord in self.get_decimal_tuples()]
+
+    def get_text(self) -> str:
+        """
+        return formatted lines joined with line feeds (a line feed at the end)
+        """
+        return '\n'.join(self.get_lines()) + '\n'
+
+
+class FrozenAtoms(CoordinateBlock):
+    """
+    frozen atoms of a job (Frozen Atoms in the com file), parsed once and shared by all structures of all jobs
+    of the log. Arrays are read-only, and the formatted text is created once.
+    """
+    __slots__ = ('_text',)
+
+    def __init__(self, lines: Sequence[str]):
+        super().__init__(lines)
+        self._text: Optional[str] = None
+        self._freeze()
+
+    def _freeze(self):
+        self.element_indices.setflags(write=False)
+        self.coordinates.setflags(write=False)
+
+    def __setstate__(self, state):
+        # pickled with the jobs (cache files and worker processes): arrays are read-only again
+        for name, value in state[1].items():
+            object.__setattr__(self, name, value)
+        self._freeze()
+
+    def get_text(self) -> str:
+        if self._text is None:
+            self._text = super().get_text()
+        return self._text
+
+
+# frozen atoms given to jobs and structures: FrozenAtoms (shared), or lines (str or list of str) parsed there
+FrozenAtomsSource = Union[None, FrozenAtoms, str, Sequence[str]]
+
+
+def to_frozen_atoms(frozen_atom_coordinates: FrozenAtomsSource) -> Optional[FrozenAtoms]:
+    """
+    FrozenAtoms of frozen_atom_coordinates (itself if already FrozenAtoms, None if None)
+    """
+    if frozen_atom_coordinates is None or isinstance(frozen_atom_coordinates, FrozenAtoms):
+        return frozen_atom_coordinates
+    return FrozenAtoms(Structure._to_lines(frozen_atom_coordinates))
 
 
 class Structure:
     """
     molecular structure data class
-    Internally, data are saved as [atom:str, x:Decimal, y:Decimal, z:Decimal]
+    Internally, data are saved as CoordinateBlock (element index and float64 coordinate arrays);
+    atom_coordinates [atom:str, x:Decimal, y:Decimal, z:Decimal] are created on demand.
     """
 
     def __init__(self,
-                 atom_coordinates: Union[str, List[str]],
+                 atom_coordinates: Union[str, Sequence[str]],
                  name: Optional[str] = None,
-                 frozen_atom_coordinates: Union[None, str, List[str]] = None):
+                 frozen_atom_coordinates: FrozenAtomsSource = None):
 
         self.name: Optional[str] = name
-        self.atom_coordinates: List[Tuple[str, Decimal, Decimal, Decimal]] = []
-        self.frozen_atom_coordinates: Optional[List[Tuple[str, Decimal, Decimal, Decimal]]] = None
+        self.atom_block: CoordinateBlock = CoordinateBlock(self._to_lines(atom_coordinates))
+        # shared (not copied) if FrozenAtoms is given
+        self.frozen_atom_block: Optional[CoordinateBlock] = to_frozen_atoms(frozen_atom_coordinates)
 
-        if type(atom_coordinates) == str:
-            coord_list = atom_coordinates.split('\n')
+    @staticmethod
+    def _to_lines(coordinates: Union[str, Sequence[str]]) -> Sequence[str]:
+        if type(coordinates) == str:
+            return coordinates.split('\n')
         else:
-            coord_list = list(atom_coordinates)
+            return coordinates
 
-        for line in coord_list:
-            if line.strip() == '':
-                continue
-            try:
-                atom, x, y, z, *_ = line.strip().split()
-            except:
-                raise ValueError('Error reading structure line:', line.strip())
-            atom = atom.strip().capitalize()
-            x = Decimal(x.strip())
-            y = Decimal(y.strip())
-            z = Decimal(z.strip())
-            self.atom_coordinates.append((atom, x, y, z))
-
-        if frozen_atom_coordinates is not None:
-            self.frozen_atom_coordinates = []
-            if type(frozen_atom_coordinates) == str:
-                coord_list = frozen_atom_coordinates.split('\n')
-            else:
-                coord_list = list(frozen_atom_coordinates)
-
-            for line in coord_list:
-                if line.strip() == '':
-                    continue
-                atom, x, y, z, *_ = line.strip().split()
-                atom = atom.strip().capitalize()
-                x = Decimal(x.strip())
-                y = Decimal(y.strip())
-                z = Decimal(z.strip())
-                self.frozen_atom_coordinates.append((atom, x, y, z))
+    @classmethod
+    def from_blocks(cls, atom_block: CoordinateBlock, name: Optional[str] = None,
+                    frozen_atom_block: Optional[CoordinateBlock] = None) -> 'Structure':
+        structure = cls.__new__(cls)
+        structure.name = name
+        structure.atom_block = atom_block
+        structure.frozen_atom_block = frozen_atom_block
+        return structure
+
+    @property
+    def atom_coordinates(self) -> List[Tuple[str, Decimal, Decimal, Decimal]]:
+        return self.atom_block.get_decimal_tuples()
+
+    @property
+    def frozen_atom_coordinates(self) -> Optional[List[Tuple[str, Decimal, Decimal, Decimal]]]:
+        if self.frozen_atom_block is None:
+            return None
+        return self.frozen_atom_block.get_decimal_tuples()
 
     @property
     def num_atom(self) -> int:
-        return len(self.atom_coordinates)
+        return self.atom_block.num_atom
 
     @property
     def num_frozen_atom(self) -> int:
-        if self.frozen_atom_coordinates is None:
+        if self.frozen_atom_block is None:
             return 0
         else:
-            return len(self.frozen_atom_coordinates)
+            return self.frozen_atom_block.num_atom
 
     def get_string(self, include_frozen_atoms: bool = True) -> str:
         """
@@ -71,12 +239,10 @@ class Structure:
         atom2 x2 y2 z2
         ...
         """
-        data = '\n'.join(['{0:<4} {1:>20.12f} {2:>20.12f} {3:>20.12f}'.format(
-            atom_coord[0], atom_coord[1], atom_coord[2], atom_coord[3]) for atom_coord in self.atom_coordinates]) + '\n'
+        data = '\n'.join(self.atom_block.get_lines()) + '\n'
 
-        if self.frozen_atom_coordinates is not None and include_frozen_atoms:
-            data += '\n'.join(['{0:<4} {1:>20.12f} {2:>20.12f} {3:>20.12f}'.format(
-            atom_coord[0], atom_coord[1], atom_coord[2], atom_coord[3]) for atom_coord in self.frozen_atom_coordinates]) + '\n'
+        if self.frozen_atom_block is not None and include_frozen_atoms:
+            data += self.frozen_atom_block.get_text()
 
         return data
 
@@ -85,13 +251,10 @@ class Structure:
         return xyz coordinates as n*3 numpy array (float)
         :return: numpy array
         """
-        coordinates = []
-        for atom_coordinate in self.atom_coordinates:
-            coordinates.append([float(w) for w in atom_coordinate[1:]])  # slice xyz coordinates and converted to float
-        return np.array(coordinates, dtype=float)
+        return self.atom_block.coordinates.copy()
 
     def get_atoms(self) -> List[str]:
-        return [line[0] for line in self.atom_coordinates]
+        return self.atom_block.atoms
 
     def save_xyz_file(self, file: str, title: str =''):
         with open(file, 'w') as f:
@@ -101,4 +264,3 @@ class Structure:
 
     def __str__(self):
         return self.get_string()
-
@@ -0,0 +1,268 @@
+import re
+from bisect import bisect_left
+from collections.abc import Sequence
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+
+OPT_SEPARATOR = 'OPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPT'
+IRC_SEPARATOR = 'IRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRC'
+FREQ_SEPARATOR = 'FREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQ'
+LUP_SEPARATOR = 'LUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUPLUP'
+
+JOB_TYPES = ('opt', 'freq', 'irc', 'lup')
+
+# (line prefix, event kind). Lines are dispatched by their first two characters, so that
+# coordinate and value lines are rejected by a single dict lookup.
+EVENT_PREFIXES: List[Tuple[str, str]] = [
+    (OPT_SEPARATOR, 'opt'),
+    (IRC_SEPARATOR, 'irc'),
+    (FREQ_SEPARATOR, 'freq'),
+    (LUP_SEPARATOR, 'lup'),
+    ('# ITR. ', 'itr'),
+    ('ITR.', 'lup_itr'),  # ITR. @ of LUP-path optimization
+    ('# NODE', 'node'),
+    ('# STEP', 'step'),
+    ('# Geometry of App', 'app_geometry'),
+    ('---Profile of AFIR path', 'afir_profile'),
+    ('---Profile of LUP path', 'lup_profile'),
+    ('---Approximate', 'approximate'),
+    ('-------------------------------------', 'rule'),
+    ('Optimized structure', 'optimized'),
+    ('Minimum point was found', 'min_found'),
+    ('1st-Order Saddle point was found', 'saddle_found'),
+    ('Stationary point was found', 'stationary_found'),
+    ('The structure is dissociating', 'dissociate'),
+    ('INITIAL STRUCTURE', 'init_structure'),
+    ('IRC FOLLOWING (FORWARD) STARTING FROM', 'irc_path'),
+    ('IRC FOLLOWING (BACKWARD) STARTING FROM', 'irc_path'),
+    ('SOFTEST MODE FOLLOWING (FORWARD) STARTING FROM', 'irc_path'),
+    ('SOFTEST MODE FOLLOWING (BACKWARD) STARTING FROM', 'irc_path'),
+    ('STEEPEST-DESCENT PATH FOLLOWING STARTING FROM NON-STATIONARY POINT', 'irc_path'),
+    ('Energy profile along IRC', 'irc_profile'),
+    ('Geometry (Origin = Center of Mass', 'freq_geometry'),
+    ('Thermochemistry', 'thermochemistry'),
+    ('Normal termination of the GRRM Program', 'termination'),
+]
+
+_PREFIX_TABLE = {}
+for (_prefix, _kind) in EVENT_PREFIXES:
+    _PREFIX_TABLE.setdefault(_prefix[:2], []).append((_prefix, _kind))
+
+
+def _compile_event_pattern() -> Tuple[str, List[str]]:
+    """
+    regular expression of event lines (without the leading line feed) and the event kind of each group.
+    Prefixes are grouped by their first character, so that a line is rejected by one character class test
+    (the same order as EVENT_PREFIXES in each group).
+    """
+    groups = {}
+    for (prefix, kind) in EVENT_PREFIXES:
+        groups.setdefault(prefix[0], []).append((prefix, kind))
+    kinds = []
+    alternatives = []
+    for (first, prefixes) in groups.items():
+        branches = []
+        for (prefix, kind) in prefixes:
+            rest = re.escape(prefix[1:])
+            if kind == 'lup_itr':
+                rest += r'[^\n]*?of LUP-path optimization'
+            branches.append('(' + rest + ')')
+            kinds.append(kind)
+        alternatives.append(re.escape(first) + '(?:' + '|'.join(branches) + ')')
+    # For GRRM23 LUP job (followed by OPT job for appEQs): >>Start / >>>Start (after blanks)
+    alternatives.append(r'([^\S\n]*>>>?Start)')
+    kinds.append('start')
+    return '(?:' + '|'.join(alternatives) + r')[^\n]*', kinds
+
+
+_EVENT_SOURCE, _EVENT_KINDS = _compile_event_pattern()
+# '\n' first: the regular expression engine skips to each line feed at C speed
+_EVENT_PATTERN = re.compile('\n' + _EVENT_SOURCE)
+_FIRST_EVENT_PATTERN = re.compile(_EVENT_SOURCE)
+_EVENT_PATTERN_BYTES = re.compile(('\n' + _EVENT_SOURCE).encode('ascii'))
+_FIRST_EVENT_PATTERN_BYTES = re.compile(_EVENT_SOURCE.encode('ascii'))
+
+
+class LogEvent(NamedTuple):
+    kind: str  # opt/freq/irc/lup (separators), itr, lup_itr, afir_profile, approximate, ... (see EVENT_PREFIXES)
+    line: int  # line offset in the scanned data
+    text: str  # the line itself
+
+
+class JobBlock(NamedTuple):
+    type: str  # opt/freq/irc/lup
+    start: int  # line offset of the opening separator
+    end: int  # line offset after the closing separator (or the end of data if unterminated)
+    name: Optional[str] = None
+
+
+def locate_event_offsets(buffer: Union[str, bytes, bytearray, memoryview], pos: int = 0,
+                         endpos: Optional[int] = None) -> Iterator[Tuple[str, int, int]]:
+    """
+    (kind, start, end) of event lines in buffer[pos:endpos], found by one regular expression search over the buffer.
+    Offsets are byte offsets for a bytes-like buffer (bytes, mmap etc.), or character offsets for str.
+    end is the offset of the line feed of the line (or endpos). pos must be at the start of a line.
+    """
+    if endpos is None:
+        endpos = len(buffer)
+    if isinstance(buffer, str):
+        pattern, first_pattern = _EVENT_PATTERN, _FIRST_EVENT_PATTERN
+    else:
+        pattern, first_pattern = _EVENT_PATTERN_BYTES, _FIRST_EVENT_PATTERN_BYTES
+    kinds = _EVENT_KINDS
+    match = first_pattern.match(buffer, pos, endpos)
+    if match is not None:
+        yield kinds[match.lastindex - 1], pos, match.end()
+    for match in pattern.finditer(buffer, pos, endpos):
+        yield kinds[match.lastindex - 1], match.start() + 1, match.end()
+
+
+def locate_events(text: str, start: int = 0, endpos: Optional[int] = None) -> Iterator[LogEvent]:
+    """
+    Events of text (joined lines), located by a regular expression search over the whole text instead of a loop
+    over lines. The result is the same as scan_log_events of the lines of text[:endpos].
+    :param start: line offset of the first line of text
+    :param endpos: end of the text to search (e.g. before the incomplete last line)
+    """
+    if endpos is None:
+        endpos = len(text)
+    line = start
+    offset = 0
+    for (kind, line_start, line_end) in locate_event_offsets(text, 0, endpos):
+        line += text.count('\n', offset, line_start)
+        offset = line_start
+        yield LogEvent(kind, line, text[line_start:line_end + 1 if line_end < endpos else line_end])
+
+
+def scan_log_events(lines: Iterable[str], start: int = 0) -> Iterator[LogEvent]:
+    """
+    Generator of typed events from GRRM log lines. A sequence of lines (each ending with a line feed, except for
+    the last one) is joined and searched at once (see locate_events). Other iterables are examined line by line.
+    :param lines: iterable of lines (list, file object, ...)
+    :param start: line offset of the first line
+    """
+    if isinstance(lines, Sequence):
+        if len(lines) == 0:
+            return
+        text = ''.join(lines)
+        if text.count('\n') == len(lines) - (0 if lines[-1].endswith('\n') else 1):
+            yield from locate_events(text, start)
+            return
+    yield from _scan_lines(lines, start)
+
+
+def _scan_lines(lines: Iterable[str], start: int = 0) -> Iterator[LogEvent]:
+    """
+    line by line version of scan_log_events. Each line is examined only once.
+    """
+    table = _PREFIX_TABLE
+    for (i, line) in enumerate(lines, start):
+        candidates = table.get(line[:2])
+        if candidates is not None:
+            for (prefix, kind) in candidates:
+                if line.startswith(prefix):
+                    if kind == 'lup_itr' and 'of LUP-path optimization' not in line:
+                        continue
+                    yield LogEvent(kind, i, line)
+                    break
+        elif line[:1] == '>' or line[:1].isspace():
+            # For GRRM23 LUP job (followed by OPT job for appEQs): >>Start / >>>Start
+            stripped = line.lstrip()
+            if stripped.startswith('>>Start') or stripped.startswith('>>>Start'):
+                yield LogEvent('start', i, line)
+
+
+class BlockGrouper:
+    """
+    Resumable grouping of separator events into job blocks (OPT/FREQ/IRC/LUP). Separators of other types inside a
+    block are nested jobs and belong to the outer block. Events can be fed in several chunks (e.g. for a running job).
+    """
+
+    def __init__(self, track_names: bool = True):
+        """
+        :param track_names: set names from '>>Start ... AppEQ@' lines (GRRM23 LUP job)
+        """
+        self.track_names: bool = track_names
+        self.current_type: str = ''
+        self.current_start: int = -1
+        self.current_name: Optional[str] = None
+
+    def feed(self, events: Iterable[LogEvent]) -> Iterator[JobBlock]:
+        """
+        yield blocks closed by the events (in line order)
+        """
+        for event in events:
+            kind = event.kind
+            if kind == 'start':
+                if not self.track_names:
+                    continue
+                stripped = event.text.strip()
+                if stripped.startswith('>>Start') or stripped.startswith('>>>Start') and self.current_type == '':
+                    last_term = stripped.split()[-1]
+                    self.current_name = last_term.strip() if 'AppEQ' in last_term else None
+                continue
+            if kind not in JOB_TYPES:
+                continue
+            if self.current_type == '':
+                self.current_type = kind
+                self.current_start = event.line
+            elif self.current_type == kind:
+                yield JobBlock(self.current_type, self.current_start, event.line + 1, self.current_name)
+                self.current_name = None
+                self.current_type = ''
+
+    def open_block(self, num_lines: int) -> Optional[JobBlock]:
+        """
+        the block not closed yet (closed at num_lines), or None
+        """
+        if self.current_type == '':
+            return None
+        return JobBlock(self.current_type, self.current_start, num_lines, self.current_name)
+
+
+def group_job_blocks(events: Iterable[LogEvent], num_lines: int, track_names: bool = True) -> Iterator[JobBlock]:
+    """
+    Group separator events into job blocks (OPT/FREQ/IRC/LUP). An unterminated last block is closed at num_lines.
+    :param events: events in line order
+    :param num_lines: number of lines (end offset) of the scanned data
+    :param track_names: set names from '>>Start ... AppEQ@' lines (GRRM23 LUP job)
+    """
+    grouper = BlockGrouper(track_names=track_names)
+    yield from grouper.feed(events)
+    block = grouper.open_block(num_lines)
+    if block is not None:
+        yield block
+
+
+def slice_events(events: List[LogEvent], start: int, end: int) -> List[LogEvent]:
+    """
+    Events in [start, end) with line offsets rebased to start.
+    """
+    low = bisect_left(events, start, key=_event_line)
+    high = bisect_left(events, end, key=_event_line)
+    if start == 0:
+        return events[low:high]
+    return [LogEvent(e.kind, e.line - start, e.text) for e in events[low:high]]
+
+
+def _event_line(event: LogEvent) -> int:
+    return event.line
+
+
+def find_sub_block(events: List[LogEvent], job_type: str, num_lines: int) -> Optional[Tuple[int, int]]:
+    """
+    Event-based counterpart of utils.extract_sub_block: (start, end) of the first sub block of job_type.
+    For freq, None is returned if the block is not finished.
+    """
+    start = -1
+    for event in events:
+        if event.kind == job_type:
+            if start == -1:
+                start = event.line
+            else:
+                return start, event.line + 1
+    if start == -1:
+        return None
+    if job_type == 'freq':
+        return None
+    return start, num_lines
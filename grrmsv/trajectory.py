@@ -0,0 +1,265 @@
+import itertools
+from typing import Iterator, List, Optional, Sequence, Tuple, Union, overload
+
+import numpy as np
+
+from grrmsv import profiling
+from grrmsv.structure import Structure, CoordinateBlock, FrozenAtomsSource, element_index, is_float_exact, \
+    to_frozen_atoms
+
+
+class Trajectory(Sequence[Structure]):
+    """
+    Sequence of structures (frames) with the same atoms, e.g. OPT iterations, IRC steps or LUP nodes.
+    Coordinates are saved as one (n_frames, n_atoms, 3) float64 array with shared element indices and frozen atoms.
+    Structure objects for frames are created on demand. Slicing returns a Trajectory on the same array.
+    """
+
+    def __init__(self,
+                 element_indices: np.ndarray,
+                 coordinates: np.ndarray,
+                 names: List[str],
+                 frame_lines: Optional[List[Sequence[str]]] = None,
+                 frozen_atom_block: Optional[CoordinateBlock] = None,
+                 float_exact: bool = True):
+        """
+        :param element_indices: (n_atoms) shared by all frames, or (n_frames, n_atoms)
+        :param coordinates: (n_frames, n_atoms, 3)
+        :param names: frame names ('# ITR. 0' etc.)
+        :param frame_lines: original text lines of each frame (used for exact Decimal values)
+        :param frozen_atom_block: frozen atoms shared by all frames
+        :param float_exact: float formatting of coordinates reproduces the original text
+        """
+        self.element_indices: np.ndarray = element_indices
+        self.coordinates: np.ndarray = coordinates
+        self._buffer: np.ndarray = coordinates  # coordinates = _buffer[:n_frames] (see extend)
+        self.names: List[str] = names
+        self.frame_lines: Optional[List[Sequence[str]]] = frame_lines
+        self.frozen_atom_block: Optional[CoordinateBlock] = frozen_atom_block
+        self.float_exact: bool = float_exact
+        self._structures: List[Optional[Structure]] = [None] * len(names)
+        if not float_exact:
+            # keep exact values now, because the text may be released later.
+            for i in range(len(names)):
+                self._get_structure(i)
+
+    @classmethod
+    def from_lines(cls,
+                   frame_lines: List[Sequence[str]],
+                   names: List[str],
+                   frozen_atom_coordinates: FrozenAtomsSource = None) -> 'Trajectory':
+        """
+        parse all frames at once.
+        :param frame_lines: list of coordinate lines (atom x y z) for each frame
+        :param names: frame names
+        :param frozen_atom_coordinates: frozen atoms (common to all frames; FrozenAtoms is shared, lines are parsed)
+        """
+        assert len(frame_lines) == len(names)
+        frozen_atom_block = to_frozen_atoms(frozen_atom_coordinates)
+
+        if len(frame_lines) == 0:
+            return cls(np.zeros(0, dtype=np.uint16), np.zeros((0, 0, 3), dtype=np.float64), [], [], frozen_atom_block)
+
+        with profiling.stage('structures', lines=sum(len(lines) for lines in frame_lines), frames=len(frame_lines)):
+            element_indices, coordinates, float_exact = cls._parse_frames(frame_lines)
+        return cls(element_indices, coordinates, names, frame_lines, frozen_atom_block, float_exact)
+
+    @staticmethod
+    def _parse_frames(frame_lines: List[Sequence[str]]) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """
+        :return: element indices ((n_atoms) or (n_frames, n_atoms)), coordinates (n_frames, n_atoms, 3), float_exact
+        """
+        texts = [''.join(lines) for lines in frame_lines]
+        frame_tokens = [text.split() for text in texts]
+        num_tokens = len(frame_tokens[0])
+        if all(len(tokens) == num_tokens == 4 * sum(1 for line in lines if line.strip() != '')
+               for (tokens, lines) in zip(frame_tokens, frame_lines)):
+            # every line is 'atom x y z': parse all frames as one array
+            table = np.array(list(itertools.chain.from_iterable(frame_tokens))).reshape(len(texts), num_tokens // 4, 4)
+            try:
+                coordinates = table[:, :, 1:].astype(np.float64)
+            except ValueError:
+                raise ValueError('Error reading structure lines:', texts[0])
+            float_exact = is_float_exact(table[:, :, 1:], coordinates)
+            atoms = table[:, :, 0]
+            if (atoms == atoms[0]).all():
+                element_indices = np.array([element_index(atom.capitalize()) for atom in atoms[0].tolist()],
+                                           dtype=np.uint16)
+            else:
+                element_indices = np.array([[element_index(atom.capitalize()) for atom in frame_atoms]
+                                            for frame_atoms in atoms.tolist()], dtype=np.uint16)
+        else:
+            blocks = [CoordinateBlock(lines) for lines in frame_lines]
+            if any(block.num_atom != blocks[0].num_atom for block in blocks):
+                raise ValueError('Number of atoms is not the same in all structures of trajectory.')
+            coordinates = np.stack([block.coordinates for block in blocks])
+            element_indices = np.stack([block.element_indices for block in blocks])
+            if (element_indices == element_indices[0]).all():
+                element_indices = element_indices[0].copy()
+            float_exact = all(block.float_exact for block in blocks)
+        return element_indices, coordinates, float_exact
+
+    def extend(self, frame_lines: List[Sequence[str]], names: List[str]):
+        """
+        append frames (e.g. new iterations of a running job). Array storage grows geometrically.
+        """
+        assert len(frame_lines) == len(names)
+        if len(frame_lines) == 0:
+            return
+        with profiling.stage('structures', lines=sum(len(lines) for lines in frame_lines), frames=len(frame_lines)):
+            element_indices, coordinates, float_exact = self._parse_frames(frame_lines)
+        num_frames = len(self.names)
+        if num_frames == 0:
+            self.element_indices = element_indices
+            self._buffer = coordinates
+        else:
+            if coordinates.shape[1] != self.coordinates.shape[1]:
+                raise ValueError('Number of atoms is not the same in all structures of trajectory.')
+            if element_indices.ndim == 1 and self.element_indices.ndim == 1:
+                if not (element_indices == self.element_indices).all():
+                    element_indices = np.tile(element_indices, (len(names), 1))
+            if element_indices.ndim == 2 or self.element_indices.ndim == 2:
+                old = self.element_indices
+                if old.ndim == 1:
+                    old = np.tile(old, (num_frames, 1))
+                if element_indices.ndim == 1:
+                    element_indices = np.tile(element_indices, (len(names), 1))
+                self.element_indices = np.concatenate([old, element_indices])
+            if num_frames + len(names) > len(self._buffer):
+                buffer = np.empty((max(num_frames + len(names), 2 * len(self._buffer)),) + self._buffer.shape[1:],
+                                  dtype=np.float64)
+                buffer[:num_frames] = self.coordinates
+                self._buffer = buffer
+            self._buffer[num_frames:num_frames + len(names)] = coordinates
+        self.coordinates = self._buffer[:num_frames + len(names)]
+        self.names = self.names + names
+        if self.frame_lines is not None:
+            self.frame_lines = self.frame_lines + frame_lines
+        self._structures = self._structures + [None] * len(names)
+        if self.float_exact and not float_exact:
+            self.float_exact = False
+            self._structures = [None] * len(self.names)
+        if not self.float_exact:
+            for i in range(num_frames, len(self.names)):
+                self._get_structure(i)
+
+    def __getstate__(self) -> dict:
+        # the spare part of the buffer and the structure cache are not pickled
+        state = self.__dict__.copy()
+        state['_buffer'] = self.coordinates
+        if self.float_exact:
+            state['_structures'] = [None] * len(self.names)
+        return state
+
+    @property
+    def num_frames(self) -> int:
+        return len(self.names)
+
+    @property
+    def num_atom(self) -> int:
+        return self.coordinates.shape[1]
+
+    def _get_structure(self, index: int) -> Structure:
+        structure = self._structures[index]
+        if structure is None:
+            if self.element_indices.ndim == 2:
+                element_indices = self.element_indices[index]
+            else:
+                element_indices = self.element_indices
+            lines = self.frame_lines[index] if self.frame_lines is not None else None
+            atom_block = CoordinateBlock.from_arrays(element_indices, self.coordinates[index], lines=lines,
+                                                     float_exact=self.float_exact)
+            structure = Structure.from_blocks(atom_block, name=self.names[index],
+                                              frozen_atom_block=self.frozen_atom_block)
+            self._structures[index] = structure
+        return structure
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @overload
+    def __getitem__(self, index: int) -> Structure: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'Trajectory': ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Structure, 'Trajectory']:
+        if isinstance(index, slice):
+            element_indices = self.element_indices
+            if element_indices.ndim == 2:
+                element_indices = element_indices[index]
+            trajectory = Trajectory.__new__(Trajectory)
+            trajectory.element_indices = element_indices
+            trajectory.coordinates = self.coordinates[index]
+            trajectory._buffer = trajectory.coordinates
+            trajectory.names = self.names[index]
+            trajectory.frame_lines = self.frame_lines[index] if self.frame_lines is not None else None
+            trajectory.frozen_atom_block = self.frozen_atom_block
+            trajectory.float_exact = self.float_exact
+            trajectory._structures = self._structures[index]
+            return trajectory
+        if index < 0:
+            index += len(self.names)
+        if not 0 <= index < len(self.names):
+            raise IndexError('Trajectory index out of range')
+        return self._get_structure(index)
+
+    def __iter__(self) -> Iterator[Structure]:
+        for i in range(len(self.names)):
+            yield self._get_structure(i)
+
+    def get_coordinates_np(self) -> np.ndarray:
+        """
+        return xyz coordinates of all frames as (n_frames, n_atoms, 3) numpy array (float)
+        """
+        return self.coordinates.copy()
+
+    def get_atoms(self) -> List[str]:
+        """
+        return atoms of the first frame
+        """
+        if len(self.names) == 0:
+            return []
+        return self._get_structure(0).get_atoms()
+
+    def frame_displacements(self) -> np.ndarray:
+        """
+        return displacement vectors between successive frames as (n_frames-1, n_atoms, 3) numpy array
+        """
+        return np.diff(self.coordinates, axis=0)
+
+    def rms_displacements(self) -> np.ndarray:
+        """
+        return RMS of atomic displacements between successive frames (n_frames-1)
+        """
+        displacements = self.frame_displacements()
+        if displacements.shape[1] == 0:
+            return np.zeros(displacements.shape[0])
+        return np.sqrt(np.mean(np.sum(displacements ** 2, axis=2), axis=1))
+
+    def max_displacements(self) -> np.ndarray:
+        """
+        return maximum atomic displacement between successive frames (n_frames-1)
+        """
+        displacements = self.frame_displacements()
+        if displacements.shape[1] == 0:
+            return np.zeros(displacements.shape[0])
+        return np.max(np.linalg.norm(displacements, axis=2), axis=1)
+
+    def rmsd_to(self, reference: int) -> np.ndarray:
+        """
+        return RMSD (without alignment) of all frames from the reference frame (n_frames)
+        """
+        if self.num_atom == 0:
+            return np.zeros(len(self.names))
+        difference = self.coordinates - self.coordinates[reference]
+        return np.sqrt(np.mean(np.sum(difference ** 2, axis=2), axis=1))
+
+    def distances(self, atom1: int, atom2: int) -> np.ndarray:
+        """
+        return distance between atom1 and atom2 (0-based indices) in all frames (n_frames)
+        """
+        return np.linalg.norm(self.coordinates[:, atom1, :] - self.coordinates[:, atom2, :], axis=1)
+
+    def __repr__(self) -> str:
+        return 'Trajectory(num_frames={:}, num_atom={:})'.format(len(self.names), self.num_atom)
@@ -1,82 +1,217 @@
 import os
 import re
+import shutil
 import tempfile
 import atexit
+import bz2
+import gzip
+import hashlib
+import lzma
+import uuid
+import weakref
+from collections import OrderedDict
 from pathlib import Path
 from decimal import Decimal
-from typing import Tuple, List, Optional, Any, Union
+from typing import Tuple, List, Dict, Optional, Any, Union, BinaryIO, Callable
 
+from grrmsv.tokenizer import scan_log_events, find_sub_block
 
-class TempFileManager:
-    def __init__(self):
-        self.file_list: List[Path] = []
+import config
 
-    def add_file(self, file: str):
-        self.file_list.append(Path(file))
 
-    def delete_files(self):
-        for file in self.file_list:
-            try:
-                file.unlink()
-            except:
-                pass
+# values keyed by their repr in TempFileCache.make_key (other objects, e.g. jobs, are keyed by identity)
+_KEY_VALUE_TYPES = (str, bytes, int, float, Decimal, bool, type(None))
 
 
-temp_file_manager = TempFileManager()
+class TempFileCache:
+    """
+    Temporary files (xyz files for the viewer) in one temporary directory, reused for the same data.
+    A file is keyed by a hash of its key parts: the objects it is written from (a job, by identity) and values
+    such as the number of frames and options, so that the same trajectory shown again is not written again,
+    and a running job with new steps gets a new file.
+    The least recently used files are deleted when the total size or the number of files exceeds the budget
+    (the file just written is always kept). All files are deleted at exit.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, max_files: Optional[int] = None):
+        """
+        :param max_bytes: budget of the total file size (no limit if None)
+        :param max_files: budget of the number of files (no limit if None)
+        """
+        self.max_bytes: Optional[int] = max_bytes
+        self.max_files: Optional[int] = max_files
+        self.directory: Optional[Path] = None  # created at the first file
+        self._files: 'OrderedDict[str, Tuple[Path, int]]' = OrderedDict()  # key: (file, size), oldest use first
+        self._tokens: 'weakref.WeakKeyDictionary[Any, str]' = weakref.WeakKeyDictionary()
+        self.total_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def make_key(self, *key_parts: Any) -> str:
+        """
+        hash of key parts: values (str, numbers, None, and tuples/lists of them) by repr, and other objects
+        by a token given to each object (not id(), which may be reused by a new object)
+        """
+        return hashlib.sha1(repr(tuple(self._key_value(part) for part in key_parts)).encode('utf-8')).hexdigest()
+
+    def _key_value(self, part: Any) -> Any:
+        if isinstance(part, _KEY_VALUE_TYPES):
+            return part
+        if isinstance(part, (tuple, list)):
+            return tuple(self._key_value(value) for value in part)
+        token = self._tokens.get(part)
+        if token is None:
+            token = uuid.uuid4().hex
+            self._tokens[part] = token
+        return '<{:} {:}>'.format(type(part).__name__, token)
+
+    def get_file(self, prefix: str, suffix: str, write: Callable[[str], None], *key_parts: Any) -> str:
+        """
+        the file of key_parts (see make_key): the existing one, or a new file written by write(file)
+        :param prefix: prefix of the file name (followed by the key)
+        :param suffix: suffix of the file name (e.g. '.xyz')
+        :return: path of the file
+        """
+        key = self.make_key(*key_parts)
+        entry = self._files.get(key)
+        if entry is not None:
+            if entry[0].exists():
+                self._files.move_to_end(key)
+                self.hits += 1
+                return str(entry[0])
+            self._remove(key)
+        self.misses += 1
+        file = self._get_directory() / (prefix + key[:16] + suffix)
+        try:
+            write(str(file))
+        except BaseException:
+            self._unlink(file)
+            raise
+        self._add(key, file)
+        return str(file)
+
+    def new_file(self, prefix: str, suffix: str) -> str:
+        """
+        a new empty file (not reused), deleted by the budget or at exit as the other files
+        """
+        fd, file = tempfile.mkstemp(prefix=prefix, suffix=suffix, dir=self._get_directory())
+        os.close(fd)
+        self._add(uuid.uuid4().hex, Path(file))
+        return file
+
+    def _get_directory(self) -> Path:
+        if self.directory is None or not self.directory.is_dir():
+            self.directory = Path(tempfile.mkdtemp(prefix='grrmsv_'))
+        return self.directory
+
+    def _add(self, key: str, file: Path):
+        try:
+            size = file.stat().st_size
+        except OSError:
+            size = 0
+        self._files[key] = (file, size)
+        self.total_bytes += size
+        self.evict()
+
+    def _remove(self, key: str):
+        file, size = self._files.pop(key)
+        self.total_bytes -= size
+        self._unlink(file)
+
+    @staticmethod
+    def _unlink(file: Path):
+        try:
+            file.unlink()
+        except OSError:
+            pass
+
+    def evict(self):
+        """
+        delete the least recently used files beyond the budget (the newest file is kept)
+        """
+        while len(self._files) > 1 and (
+                (self.max_bytes is not None and self.total_bytes > self.max_bytes) or
+                (self.max_files is not None and len(self._files) > self.max_files)):
+            self._remove(next(iter(self._files)))
+            self.evictions += 1
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        hits, misses, evictions, and the current number of files and total bytes
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'files': len(self._files), 'bytes': self.total_bytes}
+
+    def clear(self):
+        """
+        delete all files and the directory
+        """
+        for key in list(self._files):
+            self._remove(key)
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+    def __repr__(self) -> str:
+        return 'TempFileCache(directory={:}, {:})'.format(
+            self.directory, ', '.join('{:}={:}'.format(name, value) for name, value in self.stats.items()))
+
+
+temp_file_cache = TempFileCache(config.TEMP_FILE_CACHE_MAX_BYTES, config.TEMP_FILE_CACHE_MAX_FILES)
+
+
+# Numeric modes of parsed values (energies, convergence values, thermal data etc.)
+NUMERIC_EXACT = 'exact'  # Decimal of the original text (exact digits, e.g. to be written back into com/gjf files)
+NUMERIC_FAST = 'fast'  # float (faster and smaller)
+NUMERIC_MODES = (NUMERIC_EXACT, NUMERIC_FAST)
+
+
+def to_number(text: str, numeric_mode: str = NUMERIC_EXACT) -> Union[Decimal, float]:
+    """
+    convert a number text to Decimal (NUMERIC_EXACT) or float (NUMERIC_FAST).
+    For values printed with up to 12 decimals, tostring gives the same string in both modes.
+    """
+    if numeric_mode == NUMERIC_FAST:
+        return float(text)
+    return Decimal(text)
+
+
+def check_numeric_mode(numeric_mode: str) -> str:
+    if numeric_mode not in NUMERIC_MODES:
+        raise ValueError('Unknown numeric mode: {:} (exact or fast)'.format(numeric_mode))
+    return numeric_mode
 
 
 @atexit.register
 def temp_file_cleanup():
-    temp_file_manager.delete_files()
+    temp_file_cache.clear()
 
 
 def get_temp_file_name(prefix: str, suffix: str) -> str:
-    fd, file = tempfile.mkstemp(prefix=prefix, suffix=suffix)
-    temp_file_manager.add_file(file)
-    return file
+    return temp_file_cache.new_file(prefix, suffix)
+
+
+def get_temp_file(prefix: str, suffix: str, write: Callable[[str], None], *key_parts: Any) -> str:
+    """
+    temporary file written by write(file), reused for the same key_parts (see TempFileCache.get_file)
+    """
+    return temp_file_cache.get_file(prefix, suffix, write, *key_parts)
 
 
 def extract_sub_block(data: List[str], job_type: str) -> Optional[List[str]]:
     """
     Extract sub block (str list). Only the first block is returned if several ones are detected.
     dtype = 'opt' or 'freq' or 'irc'
+    Separators are located by the regular expression search of tokenizer (see find_sub_block).
     """
-    if job_type.lower() == 'opt':
-        separate_line = 'OPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPT'
-    elif job_type.lower() == 'freq':
-        separate_line = 'FREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQFREQ'
-    elif job_type.lower() == 'irc':
-        separate_line = 'IRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRCIRC'
-    else:
+    if job_type.lower() not in ('opt', 'freq', 'irc'):
         raise ValueError('type should be opt/freq/irc to extract sub blocks')
-
-    start = -1
-    end = -1
-    for (i, line) in enumerate(data):
-        if line.startswith(separate_line):
-            if start == -1:
-                start = i
-                continue
-            else:
-                end = i + 1
-                break
-
-    if start == -1:
+    block_range = find_sub_block(list(scan_log_events(data)), job_type.lower(), len(data))
+    if block_range is None:
         return None
-
-    # for opt/freq
-    if job_type.lower() in ['opt', 'irc']:
-        if end == -1:
-            return data[start:]
-        else:
-            return data[start:end]
-
-    # for freq (return None if not finished)
-    elif job_type.lower() == 'freq':
-        if end == -1:
-            return None
-        else:
-            return data[start:end]
+    return data[block_range[0]:block_range[1]]
 
 
 def get_line_type(line: str) -> str:
@@ -176,10 +311,47 @@ def options_convert_grrm_to_gjf(options: List[str]) -> List[str]:
     return gaussian_options
 
 
+# compressed logs (xxx.log.gz etc.) are read as a stream with these modules
+COMPRESSION_MODULES = {'.gz': gzip, '.xz': lzma, '.bz2': bz2}
+
+
+def split_compression_extension(file: Union[str, Path]) -> Tuple[str, Optional[str]]:
+    """
+    :return: (file without the compression extension, compression extension ('.gz', '.xz' or '.bz2') or None)
+    """
+    file = str(file)
+    root, ext = os.path.splitext(file)
+    if ext.lower() in COMPRESSION_MODULES:
+        return root, ext.lower()
+    return file, None
+
+
+def open_decompressed(raw: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    """
+    :param raw: file opened in binary mode
+    :param compression: compression extension (see split_compression_extension)
+    :return: binary stream of the decompressed data (raw itself if compression is None)
+    """
+    if compression is None:
+        return raw
+    return COMPRESSION_MODULES[compression].open(raw, 'rb')
+
+
+def find_log_file(log_file: str) -> Optional[str]:
+    """
+    :return: log_file if exists, or its compressed file (log_file + '.gz' etc.), or None if not found
+    """
+    for file in [log_file] + [log_file + ext for ext in COMPRESSION_MODULES]:
+        if os.path.exists(file):
+            return file
+    return None
+
+
 def find_parent_com_file(log_file: Union[str, Path]) -> Optional[str]:
     """
     :return: parent com file path or None if not exist.
     """
+    log_file = split_compression_extension(log_file)[0]  # xxxxxx_PT100.log for xxxxxx_PT100.log.gz
     logdir = os.path.dirname(log_file)
     base = os.path.basename(log_file)   # xxxxxx_PT100.log / xxxxxx.log
 
@@ -0,0 +1,109 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.loggen import write_log
+from grrmsv.grrm_single_job import GRRMSingleJob
+from grrmsv.utils import tostring
+
+
+# (kind, energy format, number of frozen atoms) of the synthetic logs used by the tests
+LOG_CASES = [(kind, energy_format, num_frozen)
+             for kind in ('min', 'saddle_irc', 'lup', 'afir')
+             for (energy_format, num_frozen) in (('grrm17', 0), ('grrm23', 3))]
+
+NUM_ATOM = 4
+NUM_ITR = 4
+NUM_NODE = 4
+
+
+def case_id(case: Tuple[str, str, int]) -> str:
+    return '{:}-{:}-f{:}'.format(*case)
+
+
+def write_case(directory: str, kind: str, energy_format: str, num_frozen: int) -> Tuple[str, Optional[str]]:
+    """
+    write a small synthetic log (and its com file with frozen atoms) into directory
+    :return: log file, com file (None without frozen atoms)
+    """
+    return write_log(directory, kind, NUM_ITR, NUM_ATOM, num_frozen, energy_format, NUM_NODE)
+
+
+def read_text(file: str) -> str:
+    with open(file, 'r') as f:
+        return f.read()
+
+
+def summarize(grrm_job: GRRMSingleJob) -> Dict[str, Any]:
+    """
+    everything the viewer shows of a parsed log as plain data (values as display strings, so that exact and fast
+    numeric modes give the same summary)
+    """
+    return {'normal_termination': grrm_job.normal_termination,
+            'jobs': [summarize_job(job) for job in grrm_job.jobs],
+            'afirpath': None if grrm_job.afirpath is None else _summarize_afirpath(grrm_job.afirpath)}
+
+
+def summarize_job(job) -> Dict[str, Any]:
+    return {'opt': _summarize_opt, 'freq': _summarize_freq, 'irc': _summarize_irc, 'lup': _summarize_lup}[job.type](job)
+
+
+def _strings(values) -> List[str]:
+    return [tostring(value) for value in values]
+
+
+def _summarize_structure(structure) -> Optional[List[str]]:
+    if structure is None:
+        return None
+    return [tostring(structure.name), structure.get_string()]
+
+
+def _summarize_opt(job) -> Dict[str, Any]:
+    columns = ('energy', 'energy1', 'energy2', 'spin2', 'lambda', 'trust_radii', 'step_radii',
+               'maximum_force', 'rms_force', 'maximum_displacement', 'rms_displacement')
+    data = {'type': job.type, 'status': job.status,
+            'structures': [_summarize_structure(structure) for structure in job.structure_list],
+            'optimized_structure': _summarize_structure(job.optimized_structure),
+            'optimized_energy': tostring(job.optimized_energy)}
+    for column in columns:
+        data[column] = _strings(getattr(job, column + '_list'))
+    for column in columns[7:]:
+        data[column + '_conv'] = list(getattr(job, column + '_conv_list'))
+    return data
+
+
+def _summarize_freq(job) -> Dict[str, Any]:
+    return {'type': job.type, 'init_structure': _summarize_structure(job.init_structure),
+            'freq_list': ['{:.8f}'.format(value) for value in job.freq_list],
+            'normal_modes': [['{:.8f}'.format(value) for value in mode.ravel().tolist()] for mode in job.normal_modes],
+            'thermal_data': [[data.header] + _strings(getattr(data, field) for field in data.__dataclass_fields__
+                                                      if field != 'header')
+                             for data in job.thermal_data_list]}
+
+
+def _summarize_irc(job) -> Dict[str, Any]:
+    return {'type': job.type, 'init_structure': _summarize_structure(job.init_structure),
+            'init_energy': tostring(job.init_energy),
+            'init_freq_job': None if job.init_freq_job is None else _summarize_freq(job.init_freq_job),
+            'paths': [{'direction': path.direction, 'mode': path.mode, 'energy': _strings(path.energy_list),
+                       'structures': [_summarize_structure(structure) for structure in path.structure_list],
+                       'opt_job': None if path.opt_job is None else _summarize_opt(path.opt_job),
+                       'freq_job': None if path.freq_job is None else _summarize_freq(path.freq_job)}
+                      for path in job.paths],
+            'profile': None if job.energy_profile_points is None else
+            [_strings((point.length, point.energy)) for point in job.energy_profile_points]}
+
+
+def _summarize_lup(job) -> Dict[str, Any]:
+    return {'type': job.type,
+            'paths': [{'name': path.name, 'energy': _strings(path.energy_list),
+                       'structures': [_summarize_structure(structure) for structure in path.structure_list],
+                       'points': [[point.node] + _strings((point.length, point.energy)) for point in path.points]}
+                      for path in job.itr_paths],
+            'approximate_structures': [_summarize_structure(structure) for structure in job.approximate_structures],
+            'approximate_energies': _strings(job.approximate_structure_energy_list),
+            'subjobs': [summarize_job(subjob) for subjob in job.subjobs]}
+
+
+def _summarize_afirpath(path) -> Dict[str, Any]:
+    return {'points': [[point.itr] + _strings((point.length, point.energy)) for point in path.points],
+            'approximate_structures': [_summarize_structure(structure) for structure in path.approximate_structures],
+            'approximate_energies': _strings(path.approximate_structure_energy_list)}
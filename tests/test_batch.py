@@ -0,0 +1,57 @@
+import csv
+import json
+import re
+
+import pytest
+
+from grrmsv import batch
+from grrmsv.grrm_single_job import GRRMSingleJob
+from tests.jobdata import LOG_CASES, case_id, write_case, read_text
+
+
+@pytest.fixture(params=LOG_CASES, ids=case_id)
+def case(request, tmp_path):
+    kind = request.param[0]
+    log_file, com_file = write_case(str(tmp_path), *request.param)
+    return kind, log_file
+
+
+def test_energies(case):
+    kind, log_file = case
+    rows = batch.summarize_log(log_file, numeric_mode='exact')
+    grrm_job = GRRMSingleJob(log_file, batch.find_com_file(log_file))
+    assert [row['type'] for row in rows] == [job.type for job in grrm_job.jobs]
+    for (row, job) in zip(rows, grrm_job.jobs):
+        if job.type == 'opt':
+            assert row['energy'] == job.optimized_energy
+        elif job.type == 'irc':
+            init_structure = read_text(log_file).split('INITIAL STRUCTURE\n')[1]
+            assert str(row['ts_energy']) == re.search(r'^ENERGY +(\S+)', init_structure, re.M).group(1)
+            for path in job.paths:
+                assert row[path.direction + '_energy'] == path.opt_job.optimized_energy
+        elif job.type == 'lup':
+            assert row.get('energy') is None
+            assert row['max_energy'] == max(job.itr_paths[-1].energy_list)
+
+
+def test_numeric_modes_agree(case):
+    _, log_file = case
+    writers = {}
+    for numeric_mode in ('exact', 'fast'):
+        rows = batch.summarize_log(log_file, numeric_mode=numeric_mode)
+        writers[numeric_mode] = [{column: batch.CSVRowWriter._format(row.get(column))
+                                  for column in batch.SUMMARY_COLUMNS} for row in rows]
+    assert writers['exact'] == writers['fast']
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'json'])
+def test_main(tmp_path, output_format):
+    for case in LOG_CASES:
+        write_case(str(tmp_path), *case)
+    output = str(tmp_path / ('summary.' + output_format))
+    assert batch.main([str(tmp_path), '-o', output, '-j', '0']) == 0
+    with open(output, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f)) if output_format == 'csv' else json.load(f)
+    assert len({row['file'] for row in rows}) == len(LOG_CASES)
+    assert all(not row['error'] for row in rows)
+    assert all(row['ts_energy'] for row in rows if row['type'] == 'irc')
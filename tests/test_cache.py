@@ -0,0 +1,93 @@
+import pytest
+
+from grrmsv import cache as cache_module
+from grrmsv.cache import ParseCache
+from grrmsv.grrm_single_job import GRRMSingleJob
+from tests.jobdata import LOG_CASES, case_id, write_case, summarize
+
+
+@pytest.fixture(params=LOG_CASES, ids=case_id)
+def case(request, tmp_path):
+    log_file, com_file = write_case(str(tmp_path), *request.param)
+    return log_file, com_file
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParseCache(str(tmp_path / 'cache'))
+
+
+def test_cached_job_agrees(case, cache):
+    log_file, com_file = case
+    parsed = GRRMSingleJob(log_file, com_file, cache=cache)
+    assert not parsed.from_cache
+    cached = GRRMSingleJob(log_file, com_file, cache=cache)
+    assert cached.from_cache
+    assert summarize(cached) == summarize(parsed)
+
+
+def test_cached_job_keeps_options(case, cache):
+    """
+    only parsed data are restored from the cache: the options and the file paths are those of the call
+    """
+    log_file, com_file = case
+    GRRMSingleJob(log_file, com_file, cache=cache, workers=2, memory_map=True)
+    cached = GRRMSingleJob(log_file, com_file, cache=cache, lazy=True, memory_map=False)
+    assert cached.from_cache
+    assert (cached.lazy, cached.workers, cached.memory_map) == (True, 0, False)
+    assert (cached.log_file, cached.com_file) == (log_file, com_file)
+    with pytest.raises(RuntimeError):
+        cached.refresh()
+
+
+def test_changed_log_is_parsed(case, cache):
+    log_file, com_file = case
+    GRRMSingleJob(log_file, com_file, cache=cache)
+    with open(log_file, 'a') as f:
+        f.write('\n')
+    assert not GRRMSingleJob(log_file, com_file, cache=cache).from_cache
+
+
+def test_lazy_load_stores_later(case, cache):
+    """
+    in lazy mode, the jobs are not parsed when the log is loaded: they are parsed and stored by store_cache
+    """
+    log_file, com_file = case
+    grrm_job = GRRMSingleJob(log_file, com_file, cache=cache, lazy=True)
+    assert grrm_job.cache_pending
+    assert not any(job.parsed for job in grrm_job.jobs)
+    assert cache.load(log_file, com_file) is None
+    grrm_job.store_cache()
+    assert not grrm_job.cache_pending
+    cached = GRRMSingleJob(log_file, com_file, cache=cache, lazy=True)
+    assert cached.from_cache
+    assert summarize(cached) == summarize(GRRMSingleJob(log_file, com_file))
+
+
+def test_log_grown_before_store(case, cache):
+    """
+    the entry has the identity of the log when it was parsed: the grown log is parsed again
+    """
+    log_file, com_file = case
+    grrm_job = GRRMSingleJob(log_file, com_file, cache=cache, lazy=True)
+    with open(log_file, 'a') as f:
+        f.write('\n')
+    grrm_job.store_cache()
+    assert not GRRMSingleJob(log_file, com_file, cache=cache).from_cache
+
+
+@pytest.mark.parametrize('attribute, value', [('CACHE_FORMAT_VERSION', 4), ('_class_layout', 'old layout')])
+def test_entry_of_old_format_is_parsed(case, cache, monkeypatch, attribute, value):
+    """
+    an entry pickled by another format version or other definitions of the job classes is removed, and the log is
+    parsed again
+    """
+    log_file, com_file = case
+    with monkeypatch.context() as context:
+        context.setattr(cache_module, attribute, value)
+        GRRMSingleJob(log_file, com_file, cache=cache)
+        assert cache.load(log_file, com_file) is not None
+    grrm_job = GRRMSingleJob(log_file, com_file, cache=cache)
+    assert not grrm_job.from_cache
+    assert summarize(grrm_job) == summarize(GRRMSingleJob(log_file, com_file))
+    assert GRRMSingleJob(log_file, com_file, cache=cache).from_cache
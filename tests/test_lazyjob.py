@@ -0,0 +1,38 @@
+import pickle
+import threading
+import time
+
+from grrmsv.lazyjob import LazyJob
+
+
+class SlowJob:
+    calls = 0
+
+    def __init__(self, block_data, frozen_atom_coordinates=None, events=None):
+        SlowJob.calls += 1
+        time.sleep(0.05)
+        self.block_data = list(block_data)
+        self.name = None
+
+
+def test_parsed_once_from_threads():
+    job = LazyJob(SlowJob, 'opt', ['line'], [])
+    SlowJob.calls = 0
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(job.get_job())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert SlowJob.calls == 1
+    assert len(results) == 8 and all(result is results[0] for result in results)
+
+
+def test_pickle():
+    job = LazyJob(SlowJob, 'opt', ['line'], [], name='name')
+    restored = pickle.loads(pickle.dumps(job))
+    assert not restored.parsed
+    restored.extend(['line', 'line'])
+    assert restored.block_data == ['line', 'line'] and restored.name == 'name'
+    job.get_job()
+    assert pickle.loads(pickle.dumps(job)).block_data == ['line']
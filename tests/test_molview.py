@@ -0,0 +1,107 @@
+import os
+import stat
+import sys
+import time
+from typing import List
+
+import pytest
+
+from grrmsv.molview import ViewerSession
+
+import config
+
+STANDIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'viewer_standin.py')
+
+
+@pytest.fixture
+def viewer(tmp_path, monkeypatch) -> str:
+    """
+    executable starting viewer_standin.py (the viewer path of ViewerSession)
+    """
+    monkeypatch.setenv('VIEWER_STANDIN_RECORD', str(tmp_path / 'record.txt'))
+    if sys.platform == 'win32':
+        launcher = str(tmp_path / 'viewer.bat')
+        with open(launcher, 'w') as f:
+            f.write('@"{:}" "{:}" %*\n'.format(sys.executable, STANDIN))
+    else:
+        launcher = str(tmp_path / 'viewer.sh')
+        with open(launcher, 'w') as f:
+            f.write('#!/bin/sh\nexec "{:}" "{:}" "$@"\n'.format(sys.executable, STANDIN))
+        os.chmod(launcher, os.stat(launcher).st_mode | stat.S_IEXEC)
+    return launcher
+
+
+def read_records(count: int, timeout: float = 10.0) -> List[List[str]]:
+    """
+    records of the stand-in viewers ([kind, pid, arguments]), waiting until there are count records
+    """
+    file = os.environ['VIEWER_STANDIN_RECORD']
+    deadline = time.monotonic() + timeout
+    while True:
+        records = []
+        if os.path.exists(file):
+            with open(file, 'r', encoding='utf-8') as f:
+                records = [line.rstrip('\n').split(' ', 2) for line in f]
+        if len(records) >= count or time.monotonic() > deadline:
+            return records
+        time.sleep(0.05)
+
+
+def test_session_reuses_process(viewer):
+    session = ViewerSession(viewer, session_args=['-I'], load_command='load "{file}"', enabled=True)
+    files = ['a.xyz', 'b.xyz', 'c.xyz']
+    try:
+        assert all(session.show(file) for file in files)
+        records = read_records(4)
+    finally:
+        session.close()
+    assert records[0][0] == 'start' and records[0][2] == '-I'
+    assert records[1:] == [['load', records[0][1], file] for file in files]
+
+
+def test_spawn_if_disabled(viewer):
+    session = ViewerSession(viewer, session_args=['-I'], load_command='load "{file}"', enabled=False)
+    assert not session.show('a.xyz')
+    assert not session.show('b.xyz')
+    records = read_records(4)
+    assert session.process is None
+    assert sorted(record[2] for record in records if record[0] == 'start') == ['a.xyz', 'b.xyz']
+
+
+def test_spawn_if_viewer_exits(viewer):
+    """
+    a viewer exiting at once (without the session argument here) does not support the session
+    """
+    session = ViewerSession(viewer, session_args=[], load_command='load "{file}"', enabled=True)
+    assert not session.show('a.xyz')
+    assert not session.supported
+    assert not session.show('b.xyz')
+    records = read_records(5)
+    assert sorted(record[2] for record in records if record[0] == 'load') == ['a.xyz', 'b.xyz']
+
+
+def test_restart_after_viewer_closed(viewer):
+    session = ViewerSession(viewer, session_args=['-I'], load_command='load "{file}"', enabled=True)
+    try:
+        assert session.show('a.xyz')
+        read_records(2)
+        first_process = session.process
+        first_process.kill()  # closed by the user
+        first_process.wait()
+        assert session.show('b.xyz')
+        records = read_records(4)
+    finally:
+        session.close()
+    assert session.supported
+    starts = [record[1] for record in records if record[0] == 'start']
+    assert len(starts) == 2 and starts[0] != starts[1]
+    assert [record[1:] for record in records if record[0] == 'load'] == [[starts[0], 'a.xyz'], [starts[1], 'b.xyz']]
+
+
+@pytest.mark.parametrize('viewer_path, supported', [('D:/programs/jmol/jmol.bat', True), ('/usr/bin/jmol', True),
+                                                     ('C:/Program Files/Avogadro/avogadro.exe', False)])
+def test_session_default_only_for_jmol(monkeypatch, viewer_path, supported):
+    monkeypatch.setattr(config, 'VIEWER_SESSION', None)
+    assert ViewerSession(viewer_path).supported == supported
+    monkeypatch.setattr(config, 'VIEWER_SESSION', True)
+    assert ViewerSession(viewer_path).supported
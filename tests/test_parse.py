@@ -0,0 +1,193 @@
+import re
+from decimal import Decimal
+from typing import List
+
+import numpy as np
+import pytest
+
+from grrmsv.grrm_single_job import GRRMSingleJob
+from grrmsv.tokenizer import OPT_SEPARATOR, IRC_SEPARATOR, FREQ_SEPARATOR, LUP_SEPARATOR
+from grrmsv.utils import NUMERIC_MODES, NUMERIC_EXACT
+from tests.jobdata import LOG_CASES, NUM_ATOM, NUM_ITR, NUM_NODE, case_id, write_case, read_text, summarize
+
+# Expected values are read from the text of the synthetic logs with regular expressions (independent of
+# the parsers), and compared with the parsed values in both numeric modes.
+
+
+def number(text: str, numeric_mode: str):
+    return Decimal(text) if numeric_mode == NUMERIC_EXACT else float(text)
+
+
+def numbers(texts: List[str], numeric_mode: str) -> list:
+    return [number(text, numeric_mode) for text in texts]
+
+
+def between(text: str, separator: str, index: int = 0) -> str:
+    """
+    text of the index-th block between separator lines
+    """
+    return text.split(separator + '\n')[2 * index + 1]
+
+
+def geometries(text: str, header: str) -> List[List[List[str]]]:
+    """
+    coordinate lines (split) following the lines matching header
+    """
+    lines = text.split('\n')
+    return [[line.split() for line in lines[i + 1:i + 1 + NUM_ATOM]]
+            for (i, line) in enumerate(lines) if re.match(header, line)]
+
+
+def check_structure(structure, atoms: List[List[str]], num_frozen: int, numeric_mode: str):
+    assert structure.get_atoms() == [terms[0] for terms in atoms]
+    expected = np.array([[float(value) for value in terms[1:4]] for terms in atoms])
+    assert np.array_equal(structure.get_coordinates_np(), expected)
+    assert structure.atom_coordinates == [(terms[0], Decimal(terms[1]), Decimal(terms[2]), Decimal(terms[3]))
+                                          for terms in atoms]
+    assert structure.num_frozen_atom == num_frozen
+
+
+def check_opt(job, text: str, energy_format: str, num_frozen: int, numeric_mode: str):
+    iterations = text.split('Optimized structure\n')[0]
+    assert job.num_steps == len(re.findall(r'^# ITR\. \d+$', iterations, re.M)) > 0
+    assert job.energy_list == numbers(re.findall(r'^ENERGY {9}(\S+)', iterations, re.M), numeric_mode)
+    if energy_format == 'grrm23':
+        pairs = re.findall(r'^ENERGY .*\((\S+) : (\S+)\)$', iterations, re.M)
+        assert job.energy1_list == numbers([pair[0] for pair in pairs], numeric_mode)
+        assert job.energy2_list == numbers([pair[1] for pair in pairs], numeric_mode)
+    assert job.maximum_force_list == numbers(re.findall(r'^Maximum  Force +(\S+)', iterations, re.M), numeric_mode)
+    assert job.rms_displacement_th_list == numbers(re.findall(r'^RMS      Displacement +\S+ +(\S+)', iterations,
+                                                              re.M), numeric_mode)
+    for column in ('maximum_force', 'rms_force', 'maximum_displacement', 'rms_displacement'):
+        assert getattr(job, column + '_conv_list') == \
+            [value <= threshold for (value, threshold) in zip(getattr(job, column + '_list'),
+                                                              getattr(job, column + '_th_list'))]
+    last_step = job.get_step_values(job.num_steps - 1)
+    assert (last_step['energy'], last_step['rms_force_conv']) == (job.energy_list[-1], job.rms_force_conv_list[-1])
+    for (structure, atoms) in zip(job.structure_list, geometries(iterations, r'# ITR\. \d+$'), strict=True):
+        check_structure(structure, atoms, num_frozen, numeric_mode)
+    assert job.optimized_energy == number(re.search(r'^ENERGY    =   (\S+)', text, re.M).group(1), numeric_mode)
+    check_structure(job.optimized_structure, geometries(text, 'Optimized structure$')[0], num_frozen, numeric_mode)
+
+
+def check_freq(job, text: str, num_frozen: int, numeric_mode: str):
+    freq_texts = [value for line in re.findall(r'^Freq\.  :(.*)$', text, re.M) for value in line.split()]
+    assert len(freq_texts) > 0
+    assert job.freq_list == numbers(freq_texts, numeric_mode)
+    assert job.freq_array.tolist() == [float(value) for value in freq_texts]
+    if numeric_mode == NUMERIC_EXACT:
+        assert [str(value) for value in job.freq_list] == freq_texts
+    assert job.normal_modes.shape == (len(job.freq_list), NUM_ATOM, 3)
+    first_atom_x = re.search(r'^\S+ 1 X :(.*)$', text, re.M).group(1).split()
+    assert job.normal_modes[:len(first_atom_x), 0, 0].tolist() == [float(value) for value in first_atom_x]
+    check_structure(job.init_structure, geometries(text, 'Geometry ')[0], num_frozen, numeric_mode)
+    free_energies = re.findall(r'^Free Energy += +(\S+)', text, re.M)
+    assert [data.g for data in job.thermal_data_list] == numbers(free_energies, numeric_mode)
+    assert [data.e_el for data in job.thermal_data_list] == \
+        numbers(re.findall(r'^E\(el\) += +(\S+)', text, re.M), numeric_mode)
+    for data in job.thermal_data_list:
+        assert type(data.g) is (Decimal if numeric_mode == NUMERIC_EXACT else float)
+
+
+@pytest.fixture(params=LOG_CASES, ids=case_id)
+def case(request, tmp_path):
+    kind, energy_format, num_frozen = request.param
+    log_file, com_file = write_case(str(tmp_path), kind, energy_format, num_frozen)
+    return kind, energy_format, num_frozen, log_file, com_file
+
+
+@pytest.mark.parametrize('numeric_mode', NUMERIC_MODES)
+def test_parsed_values(case, numeric_mode):
+    kind, energy_format, num_frozen, log_file, com_file = case
+    text = read_text(log_file)
+    grrm_job = GRRMSingleJob(log_file, com_file, numeric_mode=numeric_mode)
+
+    assert grrm_job.normal_termination
+    if num_frozen > 0:
+        assert grrm_job.frozen_atom_coordinates.num_atom == num_frozen
+    else:
+        assert grrm_job.frozen_atom_coordinates is None
+
+    if kind == 'min':
+        assert [job.type for job in grrm_job.jobs] == ['opt', 'freq']
+        assert grrm_job.jobs[0].status == 'MIN found'
+        check_opt(grrm_job.jobs[0], between(text, OPT_SEPARATOR), energy_format, num_frozen, numeric_mode)
+        check_freq(grrm_job.jobs[1], between(text, FREQ_SEPARATOR), num_frozen, numeric_mode)
+
+    elif kind == 'saddle_irc':
+        assert [job.type for job in grrm_job.jobs] == ['opt', 'freq', 'irc']
+        assert grrm_job.jobs[0].status == 'SADDLE found'
+        irc = grrm_job.jobs[2]
+        irc_text = between(text, IRC_SEPARATOR)
+        check_structure(irc.init_structure, geometries(irc_text, 'INITIAL STRUCTURE$')[0], num_frozen, numeric_mode)
+        assert irc.init_energy == number(re.search(r'^ENERGY +(\S+)', irc_text.split('INITIAL STRUCTURE\n')[1],
+                                                   re.M).group(1), numeric_mode)
+        assert [path.direction for path in irc.paths] == ['forward', 'backward']
+        for (path, path_text) in zip(irc.paths, irc_text.split('IRC FOLLOWING')[1:], strict=True):
+            steps = path_text.split(OPT_SEPARATOR)[0]
+            assert path.energy_list == numbers(re.findall(r'^ENERGY    =  (\S+)', steps, re.M), numeric_mode)
+            assert len(path.structure_list) == NUM_ITR
+            for (structure, atoms) in zip(path.structure_list, geometries(steps, r'# STEP \d+$'), strict=True):
+                check_structure(structure, atoms, num_frozen, numeric_mode)
+            assert path.opt_job.type == 'opt' and path.freq_job.type == 'freq'
+            check_opt(path.opt_job, between(path_text, OPT_SEPARATOR), energy_format, num_frozen, numeric_mode)
+        profile = re.findall(r'^  (\S+)   (\S+)$', irc_text.split('Energy profile along IRC\n')[1], re.M)
+        assert [(point.length, point.energy) for point in irc.energy_profile_points] == \
+            [(number(length, numeric_mode), number(energy, numeric_mode)) for (length, energy) in profile]
+
+    elif kind == 'lup':
+        lup = grrm_job.jobs[0]
+        lup_text = between(text, LUP_SEPARATOR)
+        iterations = re.split(r'^ITR\. \d+ of LUP-path optimization$', lup_text.split('-' * 60 + '\n')[0],
+                              flags=re.M)[1:]
+        assert len(lup.itr_paths) == NUM_ITR
+        for (path, itr_text) in zip(lup.itr_paths, iterations, strict=True):
+            nodes = itr_text.split('---Profile of LUP path')[0]
+            assert path.energy_list == numbers(re.findall(r'^ENERGY   (\S+)', nodes, re.M), numeric_mode)
+            assert path.num_node == NUM_NODE
+            for (structure, atoms) in zip(path.structure_list, geometries(nodes, r'# NODE \d+$'), strict=True):
+                check_structure(structure, atoms, num_frozen, numeric_mode)
+        approximate = lup_text.split('-' * 60 + '\n')[1].split('# Geometry of')[0]
+        assert lup.approximate_structure_energy_list == \
+            numbers(re.findall(r'^ENERGY    =  (\S+)', approximate, re.M), numeric_mode)
+        assert [subjob.type for subjob in lup.subjobs] == ['opt', 'irc', 'opt', 'freq']
+
+    elif kind == 'afir':
+        assert [job.type for job in grrm_job.jobs] == ['opt']
+        check_opt(grrm_job.jobs[0], between(text, OPT_SEPARATOR), energy_format, num_frozen, numeric_mode)
+        profile = re.findall(r'^  (\d+)   (\S+)   (\S+)$', text.split('---Profile of AFIR path\n')[1], re.M)
+        assert [(point.itr, point.length, point.energy) for point in grrm_job.afirpath.points] == \
+            [(int(itr), number(length, numeric_mode), number(energy, numeric_mode))
+             for (itr, length, energy) in profile]
+        assert len(grrm_job.afirpath.approximate_structures) == 4
+
+
+def test_numeric_modes_agree(case):
+    """
+    exact and fast modes give the same display strings
+    """
+    _, _, _, log_file, com_file = case
+    assert summarize(GRRMSingleJob(log_file, com_file, numeric_mode='exact')) == \
+        summarize(GRRMSingleJob(log_file, com_file, numeric_mode='fast'))
+
+
+def test_lazy_and_eager_agree(case):
+    _, _, _, log_file, com_file = case
+    assert summarize(GRRMSingleJob(log_file, com_file, lazy=True)) == summarize(GRRMSingleJob(log_file, com_file))
+
+
+def test_frozen_atoms_in_xyz(case, tmp_path):
+    _, _, num_frozen, log_file, com_file = case
+    grrm_job = GRRMSingleJob(log_file, com_file)
+    structure = grrm_job.jobs[0].structure_list[0] if grrm_job.jobs[0].type != 'lup' else \
+        grrm_job.jobs[0].itr_paths[0].structure_list[0]
+    file = str(tmp_path / 'structure.xyz')
+    structure.save_xyz_file(file, title='title')
+    lines = read_text(file).splitlines()
+    assert lines[0] == str(NUM_ATOM + num_frozen)
+    assert len(lines) == 2 + NUM_ATOM + num_frozen
+    if num_frozen > 0:
+        com_lines = read_text(com_file).split('Frozen Atoms\n')[1].splitlines()[:num_frozen]
+        assert [line.split() for line in lines[2 + NUM_ATOM:]] == \
+            [[terms[0]] + ['{:.12f}'.format(Decimal(value)) for value in terms[1:4]]
+             for terms in (line.split() for line in com_lines)]
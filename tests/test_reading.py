@@ -0,0 +1,77 @@
+import bz2
+import gzip
+import lzma
+import random
+import shutil
+
+import pytest
+
+from grrmsv.grrm_single_job import GRRMSingleJob
+from tests.jobdata import LOG_CASES, case_id, write_case, summarize
+
+COMPRESSORS = {'.gz': gzip.open, '.xz': lzma.open, '.bz2': bz2.open}
+
+
+@pytest.fixture(params=LOG_CASES, ids=case_id)
+def case(request, tmp_path):
+    log_file, com_file = write_case(str(tmp_path), *request.param)
+    return log_file, com_file
+
+
+@pytest.mark.parametrize('lazy', [False, True], ids=['eager', 'lazy'])
+@pytest.mark.parametrize('memory_map', [False, True], ids=['list', 'mmap'])
+@pytest.mark.parametrize('seed', range(3))
+def test_refresh_in_chunks(case, tmp_path, lazy, memory_map, seed):
+    """
+    a log growing in chunks (cut at any byte, e.g. in the middle of a line) followed by refresh() gives the result
+    of a one-shot parse
+    """
+    log_file, com_file = case
+    with open(log_file, 'rb') as f:
+        data = f.read()
+    expected = summarize(GRRMSingleJob(log_file, com_file))
+
+    generator = random.Random(seed)
+    # the first chunk has the header and a part of the first job
+    cuts = sorted(generator.sample(range(data.index(b'\n\n') + 2, len(data)), 6)) + [len(data)]
+    growing_file = str(tmp_path / 'growing.log')
+    with open(growing_file, 'wb') as f:
+        f.write(data[:cuts[0]])
+    grrm_job = GRRMSingleJob(growing_file, com_file, lazy=lazy, memory_map=memory_map)
+    for (start, end) in zip(cuts, cuts[1:]):
+        with open(growing_file, 'ab') as f:
+            f.write(data[start:end])
+        assert grrm_job.refresh()
+        summarize(grrm_job)  # readable at any time
+    assert not grrm_job.refresh()
+    assert summarize(grrm_job) == expected
+
+
+@pytest.mark.parametrize('lazy', [False, True], ids=['eager', 'lazy'])
+def test_memory_map_agrees(case, lazy):
+    log_file, com_file = case
+    mapped = GRRMSingleJob(log_file, com_file, memory_map=True, lazy=lazy)
+    assert mapped.memory_map
+    assert summarize(mapped) == summarize(GRRMSingleJob(log_file, com_file, memory_map=False, lazy=lazy))
+
+
+def test_memory_map_crlf(case, tmp_path):
+    log_file, com_file = case
+    crlf_file = str(tmp_path / 'crlf.log')
+    with open(log_file, 'rb') as f, open(crlf_file, 'wb') as out:
+        out.write(f.read().replace(b'\n', b'\r\n'))
+    assert summarize(GRRMSingleJob(crlf_file, com_file, memory_map=True)) == \
+        summarize(GRRMSingleJob(log_file, com_file, memory_map=False))
+
+
+@pytest.mark.parametrize('extension', list(COMPRESSORS))
+def test_compressed_log(case, tmp_path, extension):
+    log_file, com_file = case
+    compressed_file = str(tmp_path / ('compressed.log' + extension))
+    with open(log_file, 'rb') as f, COMPRESSORS[extension](compressed_file, 'wb') as out:
+        shutil.copyfileobj(f, out)
+    grrm_job = GRRMSingleJob(compressed_file, com_file, memory_map=True)
+    assert grrm_job.compression == extension
+    assert not grrm_job.memory_map
+    assert summarize(grrm_job) == summarize(GRRMSingleJob(log_file, com_file))
+    assert not grrm_job.refresh()
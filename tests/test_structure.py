@@ -0,0 +1,43 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from grrmsv.structure import Structure
+
+LINES = ['C   0.100000000000   0.200000000000   0.300000000000\n',
+         'H  -1.000000000000   0.000000000000   2.500000000000\n',
+         'O   1.000000000000  -0.500000000000   0.000000000000\n',
+         'N   0.000000000000   3.000000000000  -1.250000000000\n']
+
+# values not reproduced by float formatting: more than 12 decimals, exponent, large values
+INEXACT_LINES = ['C   0.1234567890123456   1E-3   9000.000000000001\n',
+                 'h  -8192.5   0.000000000000   2.500000000000\n']
+
+
+def expected_string(lines) -> str:
+    """
+    format of the original parser (Decimal of each value)
+    """
+    return ''.join('{0:<4} {1:>20.12f} {2:>20.12f} {3:>20.12f}\n'.format(
+        terms[0].capitalize(), *[Decimal(value) for value in terms[1:4]]) for terms in (line.split() for line in lines))
+
+
+@pytest.mark.parametrize('lines', [LINES, INEXACT_LINES, [line.rstrip('\n') + '   1\n' for line in LINES]],
+                         ids=['exact', 'inexact', 'extra column'])
+def test_values(lines):
+    structure = Structure(lines, name='name')
+    rows = [line.split() for line in lines]
+    assert structure.num_atom == len(lines)
+    assert structure.atom_coordinates == [(terms[0].capitalize(), Decimal(terms[1]), Decimal(terms[2]),
+                                           Decimal(terms[3])) for terms in rows]
+    assert np.array_equal(structure.get_coordinates_np(), np.array([[float(value) for value in terms[1:4]]
+                                                                     for terms in rows]))
+    assert structure.get_string() == expected_string(lines)
+
+
+def test_frozen_atoms():
+    structure = Structure(LINES[:2], frozen_atom_coordinates=INEXACT_LINES + LINES[2:])
+    assert structure.num_frozen_atom == 4
+    assert structure.get_string() == expected_string(LINES[:2] + INEXACT_LINES + LINES[2:])
+    assert structure.get_string(include_frozen_atoms=False) == expected_string(LINES[:2])
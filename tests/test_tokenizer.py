@@ -0,0 +1,28 @@
+import pytest
+
+from grrmsv.tokenizer import locate_events, scan_log_events
+from tests.jobdata import LOG_CASES, case_id, write_case, read_text
+
+
+@pytest.fixture(params=LOG_CASES, ids=case_id)
+def lines(request, tmp_path):
+    log_file, _ = write_case(str(tmp_path), *request.param)
+    return read_text(log_file).splitlines(keepends=True)
+
+
+def test_search_agrees_with_line_scan(lines):
+    """
+    the regular expression search over the joined lines finds the events of the line by line scan
+    """
+    expected = list(scan_log_events(iter(lines)))  # not a sequence: examined line by line
+    assert len(expected) > 0
+    assert list(scan_log_events(lines)) == expected
+    assert list(locate_events(''.join(lines))) == expected
+
+
+def test_search_from_offset(lines):
+    start = len(lines) // 2
+    text = ''.join(lines[start:])
+    expected = list(scan_log_events(iter(lines[start:-1]), start=start))
+    # the last line is excluded by endpos
+    assert list(locate_events(text, start=start, endpos=len(text) - len(lines[-1]))) == expected
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from grrmsv.structure import Structure
+from grrmsv.trajectory import Trajectory
+
+LINES = ['C   0.100000000000   0.200000000000   0.300000000000\n',
+         'H  -1.000000000000   0.000000000000   2.500000000000\n',
+         'O   1.000000000000  -0.500000000000   0.000000000000\n',
+         'N   0.000000000000   3.000000000000  -1.250000000000\n']
+
+
+def frames(lines, num_frames: int = 3):
+    return [lines[i:] + lines[:i] for i in range(num_frames)]
+
+
+@pytest.mark.parametrize('lines', [LINES, [line.rstrip('\n') + '   1\n' for line in LINES], LINES + ['\n']],
+                         ids=['xyz', 'extra column', 'blank line'])
+def test_from_lines_agrees_with_structure(lines):
+    """
+    the frames parsed at once give the same structures as Structure (lines with extra columns are accepted)
+    """
+    frame_lines = frames(lines)
+    trajectory = Trajectory.from_lines(frame_lines, ['# ITR. {:}'.format(i) for i in range(len(frame_lines))])
+    assert len(trajectory) == len(frame_lines)
+    for (structure, lines_of_frame) in zip(trajectory, frame_lines):
+        expected = Structure(lines_of_frame)
+        assert structure.get_atoms() == expected.get_atoms()
+        assert np.array_equal(structure.get_coordinates_np(), expected.get_coordinates_np())
+        assert structure.atom_coordinates == expected.atom_coordinates
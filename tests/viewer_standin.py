@@ -0,0 +1,34 @@
+"""
+Stand-in of an external viewer (Jmol) for the tests of molview.ViewerSession. Each start and each loaded file are
+appended to the file given by the environment variable VIEWER_STANDIN_RECORD:
+    start <pid> <arguments>
+    load <pid> <file>
+With -I, load "<file>" commands are read from the standard input until it is closed. Otherwise the file given as
+the argument is loaded and the viewer exits (without arguments, it exits at once).
+"""
+import os
+import re
+import sys
+
+
+def record(line: str):
+    with open(os.environ['VIEWER_STANDIN_RECORD'], 'a', encoding='utf-8') as f:
+        f.write(line + '\n')
+
+
+def main(args: list) -> int:
+    pid = os.getpid()
+    record('start {:} {:}'.format(pid, ' '.join(args)))
+    if '-I' not in args:
+        for file in args:
+            record('load {:} {:}'.format(pid, file))
+        return 0
+    for line in sys.stdin:
+        match = re.match(r'load "(.*)"$', line.strip())
+        if match is not None:
+            record('load {:} {:}'.format(pid, match.group(1)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))